@@ -0,0 +1,111 @@
+"""Measure what loading the page costs: bytes, requests and time to first byte.
+
+Usage: python benchmarks/bench_assets.py [--requests N]
+
+Starts a game server and loads the page the way a browser would, twice:
+as before (plain /static/ files, no compression, every file revalidated on
+a repeat visit) and as now (compressed, fingerprinted assets under /assets/
+that a repeat visit doesn't ask for again). Also times page requests that
+render the template every time against the cached page, in process.
+"""
+import argparse
+import http.client
+import os
+import re
+import secrets
+import socket
+import statistics
+import sys
+import time
+
+# Make the black_jack package importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from black_jack.src.app import app
+from black_jack.src.router import spawn_nodes, wait_until_ready
+
+ASSET_LINK = re.compile(r'(?:href|src)="(/(?:static|assets)/[^"]+)"')
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def fetch(connection, path, headers):
+    """(status, headers, body bytes, seconds to the first byte of the response)."""
+    started = time.perf_counter()
+    connection.request('GET', path, headers=headers)
+    response = connection.getresponse()
+    first_byte = time.perf_counter() - started
+    return response.status, dict(response.getheaders()), response.read(), first_byte
+
+def load_page(port, before, repeats):
+    """Bytes and requests of a first and a repeat visit, and the median TTFB per URL."""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {} if before else {'Accept-Encoding': 'gzip, br'}
+    _, page_headers, body, _ = fetch(connection, '/', headers)
+    page = body.decode() if 'Content-Encoding' not in page_headers else None
+    if page is None:
+        page = fetch(connection, '/', {})[2].decode()
+    urls = ASSET_LINK.findall(page)
+    if before:
+        # The old page linked the plain files
+        urls = [re.sub(r'^/assets/(.*)\.[0-9a-f]{12}(\.\w+)$', r'/static/\1\2', url) for url in urls]
+
+    first_bytes = requests = 0
+    repeat_bytes = repeat_requests = 0
+    ttfb = {}
+    for url in ['/'] + urls:
+        _, response_headers, body, _ = fetch(connection, url, headers)
+        first_bytes += len(body)
+        requests += 1
+        cache_control = response_headers.get('Cache-Control', '')
+        if 'immutable' not in cache_control:
+            # A repeat visit asks whether the file changed; the old page had no ETag
+            etag = '' if before and url == '/' else response_headers.get('ETag', '')
+            _, _, body, _ = fetch(connection, url, {**headers, 'If-None-Match': etag})
+            repeat_bytes += len(body)
+            repeat_requests += 1
+        ttfb[url] = statistics.median(fetch(connection, url, headers)[3] for _ in range(repeats))
+    connection.close()
+    return first_bytes, requests, repeat_bytes, repeat_requests, ttfb
+
+def time_page_requests(repeats):
+    """Microseconds per page request, rendering the template every time (as before) and cached."""
+    from flask import render_template
+    app.add_url_rule('/uncached', 'uncached_home', lambda: render_template('index.html'))
+    client = app.test_client()
+    timings = []
+    for path in ('/uncached', '/'):
+        client.get(path)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            client.get(path)
+        timings.append((time.perf_counter() - started) / repeats * 1e6)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='requests per URL for the TTFB medians')
+    args = parser.parse_args()
+
+    port = free_port()
+    processes = spawn_nodes([port], secrets.token_hex(16))
+    try:
+        wait_until_ready([f"http://127.0.0.1:{port}"])
+        for label, before in (('before', True), ('after', False)):
+            first_bytes, requests, repeat_bytes, repeat_requests, ttfb = load_page(port, before, args.requests)
+            print(f"{label}: first visit {first_bytes:,} bytes in {requests} requests, "
+                  f"repeat visit {repeat_bytes:,} bytes in {repeat_requests} requests")
+            for url, seconds in ttfb.items():
+                print(f"  TTFB {url:<40} {seconds * 1000:6.2f} ms")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    rendered, cached = time_page_requests(args.requests)
+    print(f"page request in process: rendered each time {rendered:,.0f} us, cached {cached:,.0f} us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Measure how fast the bot scheduler plays bot-only tables.
+
+Usage: python benchmarks/bench_bots.py [--tables N] [--bots N] [--workers N] [--think-ms MS]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Make the black_jack package importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from black_jack.src.bots import BotScheduler
+from black_jack.src.gameSession import GameSession
+from black_jack.src.sessionManager import SessionManager
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tables', type=int, default=2000)
+    parser.add_argument('--bots', type=int, default=5, help='bot seats per table')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--think-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    manager = SessionManager()
+    scheduler = BotScheduler(manager, workers=args.workers, think_time=args.think_ms / 1000)
+    session_ids = []
+    for number in range(args.tables):
+        session = GameSession(f"t{number}", "Bot 0", max_players=args.bots, seed=number)
+        for seat in range(args.bots):
+            session.add_player(f"Bot {seat}", bot='basic')
+        manager.add(session)
+        session_ids.append(session.session_id)
+
+    started = time.perf_counter()
+    for session_id in session_ids:
+        with manager.locked(session_id) as session:
+            session.start_game()
+    while any(manager.get(session_id).status != 'finished' for session_id in session_ids):
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    scheduler.stop()
+
+    stats = scheduler.stats()
+    print(f"{args.tables:,} tables x {args.bots} bots, {args.workers} workers, {args.think_ms:g} ms think time")
+    print(f"  {stats['actions']:,} moves in {elapsed:.2f}s: {stats['actions'] / elapsed:,.0f} moves/s, "
+          f"{args.tables / elapsed:,.0f} rounds/s, mean lag {stats['mean_lag_ms']:.1f} ms, "
+          f"{stats['errors']} errors")
+
+if __name__ == '__main__':
+    main()
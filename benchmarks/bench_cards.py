@@ -0,0 +1,93 @@
+"""Compare the string card evaluator with the integer / lookup-table one.
+
+Usage: python benchmarks/bench_cards.py [--hands N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+# Make the black_jack package importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from black_jack.src.cards import CARD_NAMES, add_card, hand_value, new_deck
+
+def legacy_deck():
+    """The deck as it was built before: 52 f-strings per deal."""
+    values = ['A', 'K', 'Q', 'J'] + [str(i) for i in range(2, 11)]
+    suits = ['H', 'D', 'C', 'S']
+    return [f"{value}{suit}" for suit in suits for value in values]
+
+def legacy_calculate(cards):
+    """The old evaluator: re-parse every card of the hand on each hit."""
+    value = 0
+    aces = 0
+    for card in cards:
+        val = card[:-1] if len(card) > 1 else card
+        if val in ['K', 'Q', 'J']:
+            value += 10
+        elif val == 'A':
+            value += 11
+            aces += 1
+        else:
+            value += int(val)
+    while value > 21 and aces > 0:
+        value -= 10
+        aces -= 1
+    return value
+
+def play_legacy(rng):
+    deck = legacy_deck()
+    rng.shuffle(deck)
+    cards = []
+    total = 0
+    while total < 17:
+        cards.append(deck.pop())
+        total = legacy_calculate(cards)
+    return total
+
+def play_new(rng):
+    deck = new_deck()
+    rng.shuffle(deck)
+    total = soft_aces = 0
+    while total < 17:
+        total, soft_aces = add_card(total, soft_aces, deck.pop())
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hands', type=int, default=100000, help='hands played to 17 per run')
+    args = parser.parse_args()
+
+    # Both evaluators must agree on every hand
+    rng = random.Random(0)
+    for _ in range(10000):
+        hand = rng.sample(range(52), rng.randint(1, 6))
+        assert legacy_calculate([CARD_NAMES[card] for card in hand]) == hand_value(hand)[0]
+
+    def per_op(stmt):
+        """Best-of-3 nanoseconds per call."""
+        return min(timeit.repeat(stmt, number=args.hands, repeat=3)) / args.hands * 1e9
+
+    # Building a fresh deck for a deal
+    print(f"deck build:  legacy {per_op(legacy_deck):6.0f} ns   new {per_op(new_deck):6.0f} ns")
+
+    # Taking the 4th card of a hand: full re-parse vs. incremental update
+    names = ['AH', '7D', '5C', '9S']
+    hand = [CARD_NAMES.index(name) for name in names]
+    total, soft_aces = hand_value(hand[:3])
+    legacy_eval = per_op(lambda: legacy_calculate(names))
+    new_eval = per_op(lambda: add_card(total, soft_aces, hand[3]))
+    print(f"per hit:     legacy {legacy_eval:6.0f} ns   new {new_eval:6.0f} ns   "
+          f"({legacy_eval / new_eval:.1f}x)")
+
+    # A whole dealer hand to 17, including the shuffle both versions share
+    rng = random.Random(0)
+    legacy_hand = per_op(lambda: play_legacy(rng))
+    new_hand = per_op(lambda: play_new(rng))
+    print(f"hand to 17:  legacy {legacy_hand:6.0f} ns   new {new_hand:6.0f} ns   "
+          f"({legacy_hand / new_hand:.2f}x, shuffling dominates)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Measure journal write throughput and recovery time.
+
+Usage: python benchmarks/bench_journal.py [--events N] [--dir PATH]
+
+Writes go to --dir (default: a temporary directory); point it at the disk
+the server will use, fsync cost depends entirely on it.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Make the black_jack package importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from black_jack.src.gameSession import GameSession
+from black_jack.src.journal import EVENTS, SNAPSHOT, Journal, JournaledSessionStore, frame
+from black_jack.src.sessionStore import encode_session
+
+EVENT = json.dumps({"v": 12, "t": 1700000000.0, "a": [["hit", "alice"]]}).encode()
+
+def write_throughput(path, events, threads):
+    """Events/s with `threads` writers each waiting for their record to be durable."""
+    if os.path.exists(path):
+        os.remove(path)
+    journal = Journal(path, compact_at=None)
+    per_thread = events // threads
+
+    def writer(number):
+        record = frame(EVENTS, f"t{number}", EVENT)
+        for _ in range(per_thread):
+            journal.append(record)
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    journal.close()
+    return per_thread * threads / elapsed, journal.records / journal.commits
+
+def build_journal(path, sessions, events_per_session):
+    """A journal of `sessions` tables, each a snapshot followed by some events."""
+    snapshot = GameSession("x", "alice", seed=1)
+    snapshot.add_player("alice")
+    snapshot.add_player("bob")
+    with open(path, 'wb') as f:
+        for number in range(sessions):
+            session_id = f"s{number:07d}"
+            snapshot.session_id = session_id
+            f.write(frame(SNAPSHOT, session_id, encode_session(snapshot)))
+            for _ in range(events_per_session):
+                f.write(frame(EVENTS, session_id, json.dumps(
+                    {"v": snapshot.version, "t": 1700000000.0, "a": []}).encode()))
+    return os.path.getsize(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--dir', default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        path = os.path.join(tmpdir, 'bench.journal')
+
+        print("durable appends (fsync per commit):")
+        for threads in (1, 8, 32):
+            rate, batch = write_throughput(path, args.events, threads)
+            print(f"  {threads:3d} writers: {rate:10,.0f} events/s   {batch:6.1f} records per fsync")
+
+        print("recovery:")
+        for sessions in (1000, 10000, 50000):
+            size = build_journal(path, sessions, events_per_session=5)
+            started = time.perf_counter()
+            store = JournaledSessionStore(path, fsync=False)
+            boot = time.perf_counter() - started
+            started = time.perf_counter()
+            store.get("s0000000")
+            first = time.perf_counter() - started
+            started = time.perf_counter()
+            store.items()
+            everything = time.perf_counter() - started
+            store.close()
+            print(f"  {sessions:6,d} sessions, {size / 1e6:6.1f} MB: open {boot * 1000:7.1f} ms   "
+                  f"first table {first * 1000:5.2f} ms   all tables {everything:6.2f} s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Measure memory per game session, idle and in a round.
+
+Usage: python benchmarks/bench_memory.py [--sessions N] [--players N] [--out FILE] [--compare FILE]
+
+Idle tables have their players seated but no round dealt; active tables
+have dealt a round and had every player but the last act. `--out` saves
+the results as JSON and `--compare` prints the change against saved ones.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+# Make the black_jack package importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from black_jack.src.gameSession import GameSession
+
+def build(sessions, players, active):
+    tables = []
+    for number in range(sessions):
+        names = [f"t{number}p{seat}" for seat in range(players)]
+        session = GameSession(f"s{number:07d}", names[0], seed=number)
+        for name in names:
+            session.add_player(name)
+        if active:
+            session.start_game()
+            for name in names[:-1]:
+                session.stand(name)
+        tables.append(session)
+    return tables
+
+def bytes_per_session(sessions, players, active):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tables = build(sessions, players, active)
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del tables
+    return used / sessions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--out', help='save the results as JSON')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {
+        'sessions': args.sessions,
+        'players': args.players,
+        'idle': bytes_per_session(args.sessions, args.players, active=False),
+        'active': bytes_per_session(args.sessions, args.players, active=True)
+    }
+    print(f"{args.sessions:,} sessions x {args.players} players")
+    for state in ('idle', 'active'):
+        old = baseline.get(state)
+        change = f"   was {old:8,.0f} B ({(results[state] - old) / old * 100:+.0f}%)" if old else ''
+        print(f"  {state:<6} {results[state]:8,.0f} B per session{change}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
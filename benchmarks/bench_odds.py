@@ -0,0 +1,79 @@
+"""Compare the NumPy odds engine with a plain Python loop over the same rules.
+
+Usage: python benchmarks/bench_odds.py [--trials N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Make the black_jack package importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from black_jack.src import odds
+from black_jack.src.cards import CARD_VALUES, add_card
+from black_jack.src.rules import DEALER_STANDS_ON, PAYOUTS, settle
+from black_jack.src.simulator import basic_strategy
+
+# A value stands in for a card of that value: 11 is an ace, any other the matching card
+VALUE_CARD = {CARD_VALUES[card]: card for card in range(52)}
+
+def scalar_estimate(player_total, soft_aces, upcard, unseen, trials, rng):
+    """One trial at a time, the way looping Dealer/calculate() would."""
+    stand = hit = 0.0
+    cards = [VALUE_CARD[value] for value in unseen]
+    for _ in range(trials):
+        deck = cards[:]
+        rng.shuffle(deck)
+
+        def dealer(position):
+            total, soft = add_card(0, 0, VALUE_CARD[upcard])
+            while total < DEALER_STANDS_ON:
+                total, soft = add_card(total, soft, deck[position])
+                position += 1
+            return total
+
+        def payout(player, dealer_total):
+            return PAYOUTS[settle(player, player > 21, player == 21,
+                                  dealer_total, dealer_total > 21, dealer_total == 21)]
+
+        stand += payout(player_total, dealer(0))
+        total, soft, position = player_total, soft_aces, 0
+        while True:
+            total, soft = add_card(total, soft, deck[position])
+            position += 1
+            if total >= 21 or not basic_strategy(total, soft, upcard):
+                break
+        hit += payout(total, dealer(position))
+    return stand / trials, hit / trials
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trials', type=int, default=20000)
+    parser.add_argument('--decks', type=int, default=6)
+    args = parser.parse_args()
+    if not odds.available():
+        sys.exit("numpy is not installed")
+
+    # Hard 16 against a 10, everything but those three cards unseen
+    shoe = [CARD_VALUES[card] for card in range(52)] * args.decks
+    for value in (10, 6, 10):
+        shoe.remove(value)
+
+    started = time.perf_counter()
+    scalar = scalar_estimate(16, 0, 10, shoe, args.trials, random.Random(0))
+    scalar_time = time.perf_counter() - started
+
+    odds.estimate(16, 0, 10, shoe, trials=100)  # build the strategy table
+    started = time.perf_counter()
+    vector = odds.estimate(16, 0, 10, shoe, trials=args.trials)
+    vector_time = time.perf_counter() - started
+
+    print(f"16 vs 10, {args.decks} decks, {args.trials:,} trials")
+    print(f"scalar:  stand {scalar[0]:+.3f}  hit {scalar[1]:+.3f}  {scalar_time * 1000:8.1f} ms")
+    print(f"numpy:   stand {vector['ev']['stand']:+.3f}  hit {vector['ev']['hit']:+.3f}  "
+          f"{vector_time * 1000:8.1f} ms  ({scalar_time / vector_time:.1f}x)")
+
+if __name__ == '__main__':
+    main()
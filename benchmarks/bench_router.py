@@ -0,0 +1,79 @@
+"""Measure aggregate throughput through the router for different node counts.
+
+Usage: python benchmarks/bench_router.py [--nodes 1,2,4] [--tables N] [--concurrency N]
+
+Starts the game servers and the router as local processes, then plays the
+load test's virtual tables through the router (and, as a baseline, against
+a single server directly). Throughput only grows with the node count while
+there are idle CPU cores for the extra processes.
+"""
+import argparse
+import os
+import secrets
+import socket
+import subprocess
+import sys
+
+# Make the black_jack package and the load test importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import loadtest
+from black_jack.src.router import spawn_nodes, wait_until_ready
+
+def free_ports(count):
+    sockets = [socket.socket() for _ in range(count)]
+    for sock in sockets:
+        sock.bind(('127.0.0.1', 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+def spawn_router(port, nodes, token):
+    env = {**os.environ, 'BLACKJACK_INTERNAL_TOKEN': token,
+           'PYTHONPATH': os.pathsep.join(filter(None, [
+               os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')), os.environ.get('PYTHONPATH')]))}
+    return subprocess.Popen([sys.executable, '-m', 'black_jack.src.router', '--nodes', ','.join(nodes),
+                             '--port', str(port)], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def measure(url, args):
+    results = loadtest.run(argparse.Namespace(url=url, tables=args.tables, players=args.players,
+                                              rounds=args.rounds, concurrency=args.concurrency))
+    errors = sum(stats['errors'] for stats in results['endpoints'].values())
+    return results['requests_per_second'], errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', default='1,2,4', help='node counts to try')
+    parser.add_argument('--tables', type=int, default=40)
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    token = secrets.token_hex(16)
+    print(f"{os.cpu_count()} CPUs, {args.tables} tables x {args.players} players x {args.rounds} rounds, "
+          f"{args.concurrency} at a time")
+    for count in [None] + [int(n) for n in args.nodes.split(',')]:
+        ports = free_ports((count or 1) + 1)
+        nodes = [f"http://127.0.0.1:{port}" for port in ports[1:]]
+        processes = spawn_nodes(ports[1:], token)
+        try:
+            if count is None:
+                wait_until_ready(nodes)
+                label, url = 'single server, no router', nodes[0]
+            else:
+                processes.append(spawn_router(ports[0], nodes, token))
+                url = f"http://127.0.0.1:{ports[0]}"
+                wait_until_ready(nodes + [url])
+                label = f"router + {count} node{'s' if count > 1 else ''}"
+            rate, errors = measure(url, args)
+            print(f"  {label:<26} {rate:8,.0f} req/s   {errors} errors")
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+if __name__ == '__main__':
+    main()
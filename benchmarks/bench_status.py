@@ -0,0 +1,66 @@
+"""Measure status request throughput for tables of different sizes.
+
+Usage: python benchmarks/bench_status.py [--requests N] [--sizes 1,5,8]
+
+For each table size, reports encodes/s of the full state with Flask's
+encoder (what /status did before states were cached), with the cached
+encoding when nothing changed, and when one player acts between requests;
+then GET /status requests/s through Flask's test client.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Make the black_jack package importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from black_jack.src import app as app_module
+from black_jack.src import encoding
+from black_jack.src.gameSession import GameSession
+
+def rate(func, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - started)
+
+def table(players):
+    session = GameSession(f"bench{players}", "p0", max_players=players, seed=players)
+    for seat in range(players):
+        session.add_player(f"p{seat}")
+    session.start_game()
+    return session
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--sizes', default='1,5,8', help='players per table')
+    args = parser.parse_args()
+
+    client = app_module.app.test_client()
+    print(f"encoder: {'orjson' if encoding.orjson is not None else 'json'}")
+    print(f"{'players':>7} {'flask json/s':>13} {'cached/s':>11} {'one player/s':>13} {'GET /status/s':>14}")
+    for players in (int(size) for size in args.sizes.split(',')):
+        session = table(players)
+        legacy = rate(lambda: app_module.app.json.dumps(session.get_game_state()).encode(), args.requests)
+        cached = rate(session.encoded_state, args.requests)
+
+        # A chip change on one player bumps the version, as an action would
+        player = session.players[-1]
+
+        def one_player_acts():
+            player.chips += 1
+            session.version += 1
+            session.encoded_state()
+        dirty = rate(one_player_acts, args.requests)
+
+        app_module.active_sessions.clear()
+        app_module.active_sessions.add(session)
+        url = f'/api/sessions/{session.session_id}/status'
+        requests = rate(lambda: client.get(url), max(args.requests // 10, 1))
+        app_module.active_sessions.clear()
+        print(f"{players:>7} {legacy:>13,.0f} {cached:>11,.0f} {dirty:>13,.0f} {requests:>14,.0f}")
+
+if __name__ == '__main__':
+    main()
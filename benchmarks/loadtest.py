@@ -0,0 +1,205 @@
+"""Load test for the HTTP API.
+
+Virtual tables play the same flow as static/script.js: the creator makes a
+table, the other players join, the game starts, then every player polls
+the status and hits below 17 or stands, and the table deals a new round.
+Reports p50/p99 latency per endpoint, requests per second and (in process)
+memory per session, and can save the results as JSON and compare against
+an earlier run.
+
+Usage:
+    python benchmarks/loadtest.py --tables 50 --players 3 --rounds 5 --out run.json
+    python benchmarks/loadtest.py --url http://localhost:5000 --tables 20
+    python benchmarks/loadtest.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Make the black_jack package importable when run from a checkout
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# Session IDs are collapsed so results group by route
+SESSION_PATH = re.compile(r'^/api/sessions/[^/]+/')
+
+class TestClientTransport:
+    """Requests through Flask's test client, in this process."""
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+class HttpTransport:
+    """Requests to a running server."""
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as error:
+            return error.code, None
+
+class Recorder:
+    """Latencies per endpoint, from every table's thread."""
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def call(self, transport, method, path, body=None):
+        started = time.perf_counter()
+        status, data = transport.request(method, path, body)
+        elapsed = time.perf_counter() - started
+        endpoint = f"{method} {SESSION_PATH.sub('/api/sessions/<id>/', path.split('?')[0])}"
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            if status >= 500:
+                self.errors[endpoint] += 1
+        return status, data
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+def play_table(transport, recorder, number, players, rounds):
+    """One virtual table, start to finish."""
+    names = [f"t{number}p{seat}" for seat in range(players)]
+    _, data = recorder.call(transport, 'POST', '/api/sessions', {'creator_name': names[0]})
+    session_id = data['session_id']
+    base = f'/api/sessions/{session_id}'
+    for name in names[1:]:
+        recorder.call(transport, 'POST', f'{base}/join', {'player_name': name})
+    recorder.call(transport, 'POST', f'{base}/start')
+
+    for round_number in range(rounds):
+        if round_number:
+            recorder.call(transport, 'POST', f'{base}/reset')
+        while True:
+            _, state = recorder.call(transport, 'GET', f'{base}/status')
+            if state is None or state['status'] != 'in_progress':
+                break
+            current = state['current_player']
+            total = next(p['total'] for p in state['players'] if p['name'] == current)
+            action = 'hit' if total < 17 else 'stand'
+            recorder.call(transport, 'POST', f'{base}/{action}', {'player_name': current})
+        recorder.call(transport, 'GET', '/api/sessions?status=waiting&limit=20')
+
+def memory_per_session(app_module, tables, players):
+    """Bytes allocated per table, idle (created and joined) and in a round."""
+    app_module.active_sessions.clear()
+    transport = TestClientTransport(app_module.app)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    session_ids = []
+    for number in range(tables):
+        _, data = transport.request('POST', '/api/sessions', {'creator_name': f'm{number}p0'})
+        session_ids.append(data['session_id'])
+        for seat in range(1, players):
+            transport.request('POST', f"/api/sessions/{data['session_id']}/join",
+                              {'player_name': f'm{number}p{seat}'})
+    idle = tracemalloc.get_traced_memory()[0]
+    for session_id in session_ids:
+        transport.request('POST', f'/api/sessions/{session_id}/start')
+    active = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    app_module.active_sessions.clear()
+    return {'idle': (idle - baseline) / tables, 'active': (active - baseline) / tables}
+
+def run(args):
+    if args.url:
+        make_transport = lambda: HttpTransport(args.url)
+        app_module = None
+    else:
+        from black_jack.src import app as app_module
+        app_module.active_sessions.clear()
+        make_transport = lambda: TestClientTransport(app_module.app)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        futures = [pool.submit(play_table, make_transport(), recorder, number, args.players, args.rounds)
+                   for number in range(args.tables)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    requests = sum(len(values) for values in recorder.latencies.values())
+    results = {
+        'config': {'tables': args.tables, 'players': args.players, 'rounds': args.rounds,
+                   'concurrency': args.concurrency, 'target': args.url or 'test-client'},
+        'seconds': elapsed,
+        'requests': requests,
+        'requests_per_second': requests / elapsed,
+        'endpoints': {
+            endpoint: {
+                'count': len(values),
+                'p50_ms': percentile(values, 0.5) * 1000,
+                'p99_ms': percentile(values, 0.99) * 1000,
+                'errors': recorder.errors[endpoint]
+            } for endpoint, values in sorted(recorder.latencies.items())
+        }
+    }
+    if app_module is not None:
+        results['bytes_per_session'] = memory_per_session(app_module, min(args.tables, 200), args.players)
+    return results
+
+def report(results, baseline=None):
+    def change(new, old):
+        return f" ({(new - old) / old * 100:+.0f}%)" if old else ''
+
+    config = results['config']
+    print(f"{config['tables']} tables x {config['players']} players x {config['rounds']} rounds "
+          f"against {config['target']}, {config['concurrency']} at a time")
+    old_rate = baseline['requests_per_second'] if baseline else None
+    print(f"{results['requests']:,} requests in {results['seconds']:.2f}s: "
+          f"{results['requests_per_second']:,.0f} req/s{change(results['requests_per_second'], old_rate)}")
+    print(f"{'endpoint':<36} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for endpoint, stats in results['endpoints'].items():
+        old = (baseline or {}).get('endpoints', {}).get(endpoint, {})
+        print(f"{endpoint:<36} {stats['count']:>7} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{stats['errors']:>6}{change(stats['p99_ms'], old.get('p99_ms'))}")
+    memory = results.get('bytes_per_session')
+    if memory:
+        old = (baseline or {}).get('bytes_per_session', {})
+        print(f"memory per session: idle {memory['idle']:,.0f} B{change(memory['idle'], old.get('idle'))}, "
+              f"in a round {memory['active']:,.0f} B{change(memory['active'], old.get('active'))}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tables', type=int, default=50)
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8, help='tables played at once')
+    parser.add_argument('--url', help='base URL of a running server (default: in-process test client)')
+    parser.add_argument('--out', help='save the results as JSON')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    results = run(args)
+    report(results, baseline)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,21 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template, url_for
 from .gameSession import GameSession
-import random
-import string
-from datetime import datetime, timedelta
+from .events import EventBroker
+from .sessionManager import SESSION_ID_PATTERN, SessionManager, generate_session_id
+from .sessionStore import ConcurrentModificationError, create_store
+from .expiry import SessionSweeper
+from .lobby import LobbyCache
+from .messageLog import MessageLog
+from .playerRegistry import PlayerRegistry
+from . import metrics, odds
+from .assets import Asset, AssetBundle
+from .bots import BotScheduler, resolve_strategy
+from .solver import composition, default_solver
+import atexit
+import threading
+import json
+import time
+import zlib
 import os
 
 # Get the base directory of the project
@@ -15,60 +28,292 @@ app = Flask(__name__,
             template_folder=TEMPLATE_DIR,
             static_folder=STATIC_DIR)
 
-# In-memory storage for active game sessions
-active_sessions = {}
+# Active game sessions. In memory by default; point BLACKJACK_SESSION_STORE at
+# journal:///path/to/file to keep them across restarts, or at
+# sqlite:///path/to.db or redis://host:port/db to share them between workers.
+active_sessions = SessionManager(create_store(os.environ.get('BLACKJACK_SESSION_STORE')))
 
-# Clean up old sessions that are older than 24 hours
-def cleanup_old_sessions():
-    current_time = datetime.utcnow()
-    expired_sessions = [
-        session_id for session_id, session in active_sessions.items()
-        if current_time - session.created_at > timedelta(hours=24)
-    ]
-    for session_id in expired_sessions:
-        del active_sessions[session_id]
+# Upper bound for how long a long-poll request may be parked, in seconds
+LONG_POLL_MAX_WAIT = 30
 
-# Generate a random session ID
-def generate_session_id():
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=8))
+# Push channel: subscribers to each session's event stream
+event_broker = EventBroker()
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_HEARTBEAT = 15
+
+# How long an event stream client waits before reconnecting, in milliseconds
+SSE_RETRY_MS = 2000
+
+# Forward session changes to the event stream subscribers
+def publish_change(session):
+    event_broker.publish(session.session_id, session.version)
+
+active_sessions.add_listener(publish_change)
+
+# Lobby listing, rebuilt only when a table is created, joined, started or
+# expired. Other workers' changes are picked up every couple of seconds.
+lobby = LobbyCache(active_sessions, max_age=2 if active_sessions.shared else None)
+
+# Lobby page size limits
+LOBBY_PAGE_SIZE = 50
+LOBBY_MAX_PAGE_SIZE = 200
+
+# Messages kept per table, and the /messages page size limits
+MESSAGE_HISTORY = int(os.environ.get('BLACKJACK_MESSAGE_HISTORY', MessageLog.DEFAULT_LENGTH))
+MESSAGES_PAGE_SIZE = 20
+MESSAGES_MAX_PAGE_SIZE = 100
+
+# Drop expired sessions from the lobby and their event stream subscribers
+def close_expired_session(session_id):
+    lobby.session_removed(session_id)
+    event_broker.close_session(session_id)
+
+# Expire inactive tables in the background (TTLs in seconds)
+session_sweeper = SessionSweeper(
+    active_sessions,
+    idle_ttl=float(os.environ.get('BLACKJACK_IDLE_TTL', 24 * 3600)),
+    finished_ttl=float(os.environ.get('BLACKJACK_FINISHED_TTL', 3600)),
+    on_expire=close_expired_session
+)
+session_sweeper.start(track_existing=True)
+
+# Plays bot seats' turns for every table; think time in milliseconds
+bot_scheduler = BotScheduler(
+    active_sessions,
+    workers=int(os.environ.get('BLACKJACK_BOT_WORKERS', 4)),
+    think_time=float(os.environ.get('BLACKJACK_BOT_THINK_MS', 500)) / 1000
+)
+# Tables from before a restart (journal) or from a worker that died (shared stores)
+bot_scheduler.resume()
+
+# Player balances and statistics, recorded as rounds are settled. Kept in
+# memory unless BLACKJACK_PLAYER_DB names a SQLite database to keep them in.
+player_registry = PlayerRegistry(os.environ.get('BLACKJACK_PLAYER_DB'))
+active_sessions.add_save_listener(player_registry.session_saved)
+atexit.register(player_registry.close)
+
+# Leaderboard page size limits
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+
+# Table and seat counts, read when /metrics is scraped
+metrics.REGISTRY.gauge('blackjack_active_sessions', 'Tables in play or waiting', lambda: len(active_sessions))
+metrics.REGISTRY.gauge('blackjack_active_players', 'Players seated at a table',
+                       lambda: sum(summary['player_count'] for summary in active_sessions.summaries()))
+metrics.REGISTRY.gauge('blackjack_bot_tables_queued', 'Tables waiting for a bot to move',
+                       lambda: bot_scheduler.stats()['queued'])
+
+# Opt-in: profile a sample of requests (BLACKJACK_PROFILE_SAMPLE, default 1%) and
+# keep cProfile stats for those slower than BLACKJACK_PROFILE_SLOW_MS in
+# BLACKJACK_PROFILE_DIR
+slow_request_profiler = None
+if os.environ.get('BLACKJACK_PROFILE_DIR'):
+    slow_request_profiler = metrics.SlowRequestProfiler(
+        os.environ['BLACKJACK_PROFILE_DIR'],
+        threshold=float(os.environ.get('BLACKJACK_PROFILE_SLOW_MS', 250)) / 1000,
+        sample_rate=float(os.environ.get('BLACKJACK_PROFILE_SAMPLE', 0.01))
+    )
+
+@app.before_request
+def start_request_timer():
+    if metrics.REGISTRY.enabled or slow_request_profiler is not None:
+        g.request_started = time.perf_counter()
+        g.profile = slow_request_profiler.start() if slow_request_profiler is not None else None
+
+@app.after_request
+def record_request_time(response):
+    # Streaming responses are timed up to the first byte
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.REQUEST_SECONDS.observe(elapsed, route, request.method, str(response.status_code))
+    profile = g.pop('profile', None)
+    if profile is not None:
+        slow_request_profiler.finish(profile, elapsed, f"{request.method} {route}")
+    return response
+
+# Entity tag identifying a particular version of a session's state
+def session_etag(session_id, version):
+    return f"{session_id}-{version}"
+
+# Format one server-sent event frame
+def sse_event(event, data, event_id):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Full game state, or just the changes since the client's version if it has one
+def state_payload(session, since=None):
+    if since is not None:
+        delta = session.get_state_delta(since)
+        if delta is not None:
+            return delta
+    return session.get_game_state()
+
+# Idempotency keys (the Idempotency-Key header) longer than this are refused
+IDEMPOTENCY_KEY_MAX_LENGTH = 128
+
+# Most decisions one /actions request may carry
+MAX_BATCH_ACTIONS = 20
+
+def idempotent(session, act):
+    """Answer with `act()`'s (body, status), or with the remembered reply on a retry.
+
+    A request that changed the table is remembered under its Idempotency-Key,
+    so retrying it repeats the reply instead of acting again. Replies carry
+    the current game state, not the one at the time.
+    """
+    key = request.headers.get('Idempotency-Key')
+    if key is not None and not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        return jsonify({'error': 'Invalid Idempotency-Key'}), 400
+    reply = session.reply_for(key) if key is not None else None
+    if reply is None:
+        version = session.version
+        body, status = act()
+        changed = session.version != version
+        if key is not None and changed:
+            session.remember_reply(key, [body, status])
+    else:
+        (body, status), changed = reply, True
+    if changed:
+        body = {**body, 'game_state': state_payload(session, request.args.get('since', type=int))}
+    response = jsonify(body)
+    if reply is not None:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response, status
+
+def player_action(message):
+    return ({'message': message}, 200) if message is not None else ({'error': 'Not your turn'}, 400)
+
+def not_modified(session_id, version):
+    response = app.response_class(status=304)
+    response.set_etag(session_etag(session_id, version))
+    return response
+
+@app.errorhandler(ConcurrentModificationError)
+def concurrent_modification(error):
+    # Another worker changed the session first; the client can simply retry
+    return jsonify({'error': 'Session was modified concurrently, please retry'}), 409
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics.REGISTRY.enabled:
+        return jsonify({'error': 'Metrics are disabled, set BLACKJACK_METRICS=1'}), 404
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# Static files, fingerprinted and compressed once at startup. The page links
+# to them under /assets/ so browsers can keep them for good; /static/ still
+# serves the plain files.
+static_assets = AssetBundle(STATIC_DIR)
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+@app.template_global()
+def asset_url(filename):
+    url_name = static_assets.url_name(filename)
+    if url_name is None:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=url_name)
+
+def send_asset(asset, cache_control):
+    encoding = asset.negotiate(request.accept_encodings)
+    etag = asset.etag_for(encoding)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    found = static_assets.by_url_name.get(filename)
+    if found is None:
+        return jsonify({'error': 'Not found'}), 404
+    return send_asset(found, f'public, max-age={ASSET_MAX_AGE}, immutable')
+
+# The page is the same for everybody, so it's rendered once (on every
+# request in debug mode, to pick up template edits)
+index_page = None
+index_page_lock = threading.Lock()
 
 @app.route('/')
 def home():
-    return render_template('index.html')
+    global index_page
+    if app.debug:
+        return render_template('index.html')
+    if index_page is None:
+        with index_page_lock:
+            if index_page is None:
+                index_page = Asset('index.html', render_template('index.html').encode())
+    # Revalidated on each visit, so a new deploy's asset URLs are picked up
+    return send_asset(index_page, 'no-cache')
 
 @app.route('/api/sessions', methods=['GET'])
 def list_sessions():
-    cleanup_old_sessions()
-    return jsonify({
-        'sessions': [
-            {
-                'session_id': session_id,
-                'creator': session.creator,
-                'player_count': len(session.players),
-                'max_players': session.max_players,
-                'status': session.status,
-                'created_at': session.created_at.isoformat()
-            }
-            for session_id, session in active_sessions.items()
-        ]
-    })
+    # ?status=waiting filters, ?cursor=<next_cursor> continues from the previous page
+    status = request.args.get('status') or None
+    cursor = request.args.get('cursor') or None
+    limit = min(max(request.args.get('limit', LOBBY_PAGE_SIZE, type=int), 1), LOBBY_MAX_PAGE_SIZE)
+    
+    try:
+        body = lobby.page(status, cursor, limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    # Content-based so that every worker agrees on it
+    etag = f"lobby-{zlib.crc32(body):08x}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
 
 @app.route('/api/sessions', methods=['POST'])
 def create_session():
     data = request.json
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
     creator_name = data.get('creator_name')
-    max_players = int(data.get('max_players', 5))
+    try:
+        max_players = int(data.get('max_players', 5))
+        # Shoe configuration: number of decks and how far in the cut card sits
+        decks = int(data.get('decks', 1))
+        penetration = float(data.get('penetration', 0.75))
+        # Optional shoe seed, to reproduce a game
+        seed = data.get('seed')
+        seed = None if seed is None else int(seed)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_players, decks, penetration and seed must be numbers'}), 400
+    # A router picks the ID itself, to know which node the table lives on
+    requested_id = data.get('session_id')
     
     if not creator_name:
         return jsonify({'error': 'Creator name is required'}), 400
-    
-    session_id = generate_session_id()
-    while session_id in active_sessions:
-        session_id = generate_session_id()
-    
-    session = GameSession(session_id, creator_name, max_players)
-    session.add_player(creator_name)
-    active_sessions[session_id] = session
+    if requested_id is not None and not SESSION_ID_PATTERN.fullmatch(str(requested_id)):
+        return jsonify({'error': 'Invalid session ID'}), 400
+    
+    # Recorded as a buy-in only once the table exists
+    balance = player_registry.balance(creator_name)
+    
+    # Retry on the (unlikely) session ID collision
+    session = None
+    while session is None or not active_sessions.add(session):
+        if session is not None and requested_id is not None:
+            return jsonify({'error': 'Session ID is taken'}), 409
+        try:
+            session = GameSession(requested_id or generate_session_id(), creator_name, max_players, decks,
+                                  penetration, seed, message_history=MESSAGE_HISTORY)
+        except ValueError as error:
+            return jsonify({'error': str(error)}), 400
+        session.add_player(creator_name, player_registry.stack(balance))
+    player_registry.buy_in(creator_name, balance)
+    session_id = session.session_id
     
     return jsonify({
         'session_id': session_id,
@@ -77,165 +322,350 @@ def create_session():
 
 @app.route('/api/sessions/<session_id>/join', methods=['POST'])
 def join_session(session_id):
-    if session_id not in active_sessions:
-        return jsonify({'error': 'Session not found'}), 404
-    
-    session = active_sessions[session_id]
-    data = request.json
-    player_name = data.get('player_name')
-    
-    if not player_name:
-        return jsonify({'error': 'Player name is required'}), 400
-    
-    if session.status != 'waiting':
-        return jsonify({'error': 'Game has already started'}), 400
-    
-    if not session.add_player(player_name):
-        return jsonify({'error': 'Could not add player (name might be taken or session is full)'}), 400
-    
-    return jsonify({
-        'message': f'Player {player_name} joined session {session_id}',
-        'session_status': session.status,
-        'player_count': len(session.players)
-    })
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        player_name = data.get('player_name')
+        
+        if not player_name:
+            return jsonify({'error': 'Player name is required'}), 400
+        
+        if session.status != 'waiting':
+            return jsonify({'error': 'Game has already started'}), 400
+        
+        balance = player_registry.balance(player_name)
+        if not session.add_player(player_name, player_registry.stack(balance)):
+            return jsonify({'error': 'Could not add player (name might be taken or session is full)'}), 400
+        player_registry.buy_in(player_name, balance)
+        
+        return jsonify({
+            'message': f'Player {player_name} joined session {session_id}',
+            'session_status': session.status,
+            'player_count': len(session.players)
+        })
+
+@app.route('/api/sessions/<session_id>/bots', methods=['POST'])
+def add_bot(session_id):
+    data = request.get_json(silent=True) or {}
+    strategy = data.get('strategy', 'basic')
+    try:
+        resolve_strategy(strategy)
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    try:
+        chips = int(data.get('chips', 100))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Chips must be a number'}), 400
+    
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        if session.status != 'waiting':
+            return jsonify({'error': 'Game has already started'}), 400
+        
+        # Bots are named "Bot 1", "Bot 2"... unless the request names them
+        bot_name = data.get('player_name') or next(
+            f'Bot {n}' for n in range(1, len(session.players) + 2) if session.get_player(f'Bot {n}') is None)
+        if not session.add_player(bot_name, chips, bot=strategy):
+            return jsonify({'error': 'Could not add bot (name might be taken or session is full)'}), 400
+        
+        return jsonify({
+            'message': f'{bot_name} ({strategy}) joined session {session_id}',
+            'player_name': bot_name,
+            'session_status': session.status,
+            'player_count': len(session.players)
+        })
 
 @app.route('/api/sessions/<session_id>/start', methods=['POST'])
 def start_session(session_id):
-    if session_id not in active_sessions:
-        return jsonify({'error': 'Session not found'}), 404
-    
-    session = active_sessions[session_id]
-    
-    if session.status != 'waiting':
-        return jsonify({'error': 'Game has already started or finished'}), 400
-    
-    if not session.start_game():
-        return jsonify({'error': 'Not enough players to start the game'}), 400
-    
-    return jsonify({
-        'message': 'Game started!',
-        'game_state': session.get_game_state()
-    })
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        if session.status != 'waiting':
+            return jsonify({'error': 'Game has already started or finished'}), 400
+        
+        if not session.start_game():
+            return jsonify({'error': 'Not enough players to start the game'}), 400
+        
+        return jsonify({
+            'message': 'Game started!',
+            'game_state': state_payload(session, request.args.get('since', type=int))
+        })
 
 @app.route('/api/sessions/<session_id>/status', methods=['GET'])
 def get_session_status(session_id):
     if session_id not in active_sessions:
         return jsonify({'error': 'Session not found'}), 404
     
-    return jsonify(active_sessions[session_id].get_game_state())
+    # Long-poll: ?since=<version>&wait=<seconds> blocks until the state moves on
+    since = request.args.get('since', type=int)
+    if since is not None:
+        wait = min(max(request.args.get('wait', 0, type=float), 0), LONG_POLL_MAX_WAIT)
+        if not active_sessions.wait_for_change(session_id, since, wait):
+            return not_modified(session_id, since)
+    
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        if request.if_none_match.contains(session_etag(session_id, session.version)):
+            return not_modified(session_id, session.version)
+        
+        # ?delta=1 asks for only what changed since the client's version
+        delta = session.get_state_delta(since) if since is not None and request.args.get('delta', type=int) else None
+        if delta is None:
+            # Full state, served from the session's cached encoding
+            response = app.response_class(session.encoded_state(), mimetype='application/json')
+        else:
+            response = jsonify(delta)
+        response.set_etag(session_etag(session_id, session.version))
+        return response
 
-@app.route('/api/sessions/<session_id>/hit', methods=['POST'])
-def hit(session_id):
+@app.route('/api/sessions/<session_id>/events', methods=['GET'])
+def session_events(session_id):
     if session_id not in active_sessions:
         return jsonify({'error': 'Session not found'}), 404
     
-    session = active_sessions[session_id]
-    data = request.json
-    player_name = data.get('player_name')
-    
-    if not player_name:
-        return jsonify({'error': 'Player name is required'}), 400
-    
-    current_player = session.get_current_player()
-    if not current_player or current_player.name.lower() != player_name.lower():
-        return jsonify({'error': 'Not your turn'}), 400
-    
-    # Player hits
-    current_player.hit(session.deck.pop())
-    
-    message = f"{player_name} hits and has {current_player.total}"
-    
-    # Check if player has blackjack or busted
-    if current_player.blackjack:
-        message = f"{player_name} has Blackjack with {current_player.total}!"
-        # Move to next player
-        if not session.next_turn():
-            # Game is over, dealer's turn
-            session.determine_winners()
-        return jsonify({
-            'message': message,
-            'game_state': session.get_game_state()
-        })
-    elif current_player.busted:
-        message = f"{player_name} busted with {current_player.total}!"
-        # Move to next player
-        if not session.next_turn():
-            # Game is over, dealer's turn
-            session.determine_winners()
-        return jsonify({
-            'message': message,
-            'game_state': session.get_game_state()
-        })
-    
-    return jsonify({
-        'message': message,
-        'game_state': session.get_game_state()
+    subscriber = event_broker.subscribe(session_id)
+    if subscriber is None:
+        # Too many listeners, the client falls back to long-polling
+        return jsonify({'error': 'Too many subscribers, use /status instead'}), 503
+    
+    # Resume from the last version the client saw after a reconnect
+    last_version = request.headers.get('Last-Event-ID', type=int)
+    
+    # Other workers can't push to us, so with a shared store re-check periodically
+    wait = active_sessions.POLL_INTERVAL if active_sessions.shared else SSE_HEARTBEAT
+    
+    def stream():
+        sent = last_version
+        last_write = time.monotonic()
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            while not subscriber.closed:
+                version = active_sessions.version(session_id)
+                if version is None:
+                    # Session expired
+                    break
+                if version != sent:
+                    # Coalesce: whatever happened, send what changed since the
+                    # last event, or the whole state if we're too far behind
+                    with active_sessions.locked(session_id) as session:
+                        if session is None:
+                            break
+                        payload = state_payload(session, sent)
+                    sent = payload['version']
+                    yield sse_event('delta' if 'changes' in payload else 'state', payload, sent)
+                    last_write = time.monotonic()
+                elif (subscriber.get(wait) is None and not subscriber.closed
+                      and time.monotonic() - last_write >= SSE_HEARTBEAT):
+                    yield ': keep-alive\n\n'
+                    last_write = time.monotonic()
+        finally:
+            event_broker.unsubscribe(session_id, subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
+@app.route('/api/sessions/<session_id>/hit', methods=['POST'])
+def hit(session_id):
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        player_name = data.get('player_name')
+        
+        if not player_name:
+            return jsonify({'error': 'Player name is required'}), 400
+        
+        return idempotent(session, lambda: player_action(session.hit(player_name)))
+
 @app.route('/api/sessions/<session_id>/stand', methods=['POST'])
 def stand(session_id):
-    if session_id not in active_sessions:
-        return jsonify({'error': 'Session not found'}), 404
-    
-    session = active_sessions[session_id]
-    data = request.json
-    player_name = data.get('player_name')
-    
-    if not player_name:
-        return jsonify({'error': 'Player name is required'}), 400
-    
-    current_player = session.get_current_player()
-    if not current_player or current_player.name.lower() != player_name.lower():
-        return jsonify({'error': 'Not your turn'}), 400
-    
-    # Move to next player or dealer's turn
-    should_continue = session.next_turn()
-    
-    # If game is over, determine winners
-    if not should_continue:
-        session.determine_winners()
-    
-    # Get the updated game state
-    game_state = session.get_game_state()
-    
-    if not should_continue:
-        # Game is over, show results
-        return jsonify({
-            'message': f"{player_name} stands. Dealer's turn.",
-            'game_state': game_state
-        })
-    else:
-        # Game continues with next player
-        next_player = session.get_current_player()
-        return jsonify({
-            'message': f"{player_name} stands. {next_player.name}'s turn.",
-            'game_state': game_state
-        })
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        player_name = data.get('player_name')
+        
+        if not player_name:
+            return jsonify({'error': 'Player name is required'}), 400
+        
+        return idempotent(session, lambda: player_action(session.stand(player_name)))
+
+@app.route('/api/sessions/<session_id>/actions', methods=['POST'])
+def batch_actions(session_id):
+    # {"actions": [{"action": "hit", "player_name": "alice"}, "stand", ...]};
+    # plain action names are played by the top-level "player_name"
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        actions = data.get('actions')
+        if not isinstance(actions, list) or not 0 < len(actions) <= MAX_BATCH_ACTIONS:
+            return jsonify({'error': f'Send between 1 and {MAX_BATCH_ACTIONS} actions'}), 400
+        decisions = []
+        for item in actions:
+            if isinstance(item, str):
+                item = {'action': item}
+            if not isinstance(item, dict):
+                return jsonify({'error': 'Actions are names or objects'}), 400
+            action = item.get('action')
+            player_name = item.get('player_name') or data.get('player_name')
+            if action not in GameSession.BATCH_ACTIONS:
+                return jsonify({'error': f'Unknown action: {action}'}), 400
+            if not player_name:
+                return jsonify({'error': 'Player name is required'}), 400
+            if not isinstance(player_name, str):
+                return jsonify({'error': 'Player name must be a string'}), 400
+            decisions.append([action, player_name])
+        
+        def play():
+            messages, rejected = session.play_actions(decisions)
+            body = {
+                'results': [{'action': action, 'player_name': player_name, 'message': message}
+                            for (action, player_name), message in zip(decisions, messages)],
+                'applied': len(messages)
+            }
+            if rejected is None:
+                return body, 200
+            # All or nothing: the decisions before it were undone
+            action, player_name = decisions[rejected]
+            return {**body, 'error': f'Not your turn: {action} by {player_name} (action {rejected})'}, 400
+        
+        return idempotent(session, play)
 
 @app.route('/api/sessions/<session_id>/reset', methods=['POST'])
 def reset_session(session_id):
-    if session_id not in active_sessions:
-        return jsonify({'error': 'Session not found'}), 404
-    
-    session = active_sessions[session_id]
-    
-    # Store player chips before resetting
-    player_chips = {player.name: player.chips for player in session.players}
-    
-    # Reset the session
-    session.__init__(session_id, session.creator, session.max_players)
-    
-    # Re-add all players with their chips
-    for player_name, chips in player_chips.items():
-        session.add_player(player_name, chips)
-    
-    # Start a new game
-    session.start_game()
-    
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        # Start a new round, chips carry over
+        session.reset_round()
+        
+        return jsonify({
+            'message': 'New round started!',
+            'game_state': state_payload(session, request.args.get('since', type=int))
+        })
+
+@app.route('/api/sessions/<session_id>/messages', methods=['GET'])
+def session_messages(session_id):
+    # Newest page by default; ?before=<seq> pages back, ?after=<seq> catches up
+    limit = min(max(request.args.get('limit', MESSAGES_PAGE_SIZE, type=int), 1), MESSAGES_MAX_PAGE_SIZE)
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        records, more = session.messages.page(after=after, before=before, limit=limit)
+    return jsonify({
+        'messages': [record.to_json() for record in records],
+        'has_more': more
+    })
+
+@app.route('/api/leaderboard', methods=['GET'])
+def leaderboard():
+    limit = min(max(request.args.get('limit', LEADERBOARD_SIZE, type=int), 1), LEADERBOARD_MAX_SIZE)
     return jsonify({
-        'message': 'New round started!',
-        'game_state': session.get_game_state()
+        'players': [dict(stats.to_json(), rank=rank) for rank, stats in enumerate(player_registry.top(limit), 1)],
+        'total_players': len(player_registry)
     })
 
+@app.route('/api/players/<player_name>', methods=['GET'])
+def player_stats(player_name):
+    stats = player_registry.get(player_name)
+    if stats is None:
+        return jsonify({'error': 'Player not found'}), 404
+    return jsonify(dict(stats.to_json(), rank=player_registry.rank(player_name)))
+
+# Session hand-over between nodes behind a router (see router.py). Only
+# enabled when BLACKJACK_INTERNAL_TOKEN is set, and the router must send it.
+INTERNAL_TOKEN = os.environ.get('BLACKJACK_INTERNAL_TOKEN')
+
+def internal_request_allowed():
+    return INTERNAL_TOKEN is not None and request.headers.get('X-Internal-Token') == INTERNAL_TOKEN
+
+@app.route('/internal/sessions', methods=['GET'])
+def internal_session_ids():
+    if not internal_request_allowed():
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({'session_ids': [session_id for session_id, _, _ in active_sessions.activity()]})
+
+@app.route('/internal/sessions/<session_id>/evict', methods=['POST'])
+def internal_evict_session(session_id):
+    # Remove the table and return it, for its new node to import
+    if not internal_request_allowed():
+        return jsonify({'error': 'Not found'}), 404
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        active_sessions.remove(session_id)
+        data = session.to_dict()
+    close_expired_session(session_id)
+    return jsonify(data)
+
+@app.route('/internal/sessions', methods=['POST'])
+def internal_import_session():
+    if not internal_request_allowed():
+        return jsonify({'error': 'Not found'}), 404
+    session = GameSession.from_dict(request.json)
+    if not active_sessions.add(session):
+        return jsonify({'error': 'Session ID is taken'}), 409
+    return jsonify({'session_id': session.session_id}), 201
+
+@app.route('/api/sessions/<session_id>/log', methods=['GET'])
+def session_log(session_id):
+    # Seed and action log, replayable with black_jack.src.replay
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        return jsonify(session.replay_log())
+
+@app.route('/api/sessions/<session_id>/hint', methods=['GET'])
+def hint(session_id):
+    # ?exact=1 asks the exact solver instead of the (numpy) Monte Carlo estimate
+    exact = bool(request.args.get('exact', type=int))
+    if not exact and not odds.available():
+        return jsonify({'error': 'Hints are not available on this server'}), 503
+    
+    player_name = request.args.get('player_name')
+    if not player_name:
+        return jsonify({'error': 'Player name is required'}), 400
+    
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        inputs = session.advice_inputs(player_name)
+        if inputs is None:
+            return jsonify({'error': 'Not your turn'}), 400
+    
+    # Work the odds out after releasing the session lock so the table isn't held up
+    upcard = inputs.pop('upcard_value')
+    unseen = inputs.pop('unseen')
+    if exact:
+        result = default_solver().evaluate(inputs['player_total'], inputs['soft'], upcard, composition(unseen))
+    else:
+        trials = min(max(request.args.get('trials', odds.DEFAULT_TRIALS, type=int), 1), odds.MAX_TRIALS)
+        result = odds.estimate(inputs['player_total'], int(inputs['soft']), upcard, unseen, trials=trials)
+    return jsonify({**inputs, **result})
+
 if __name__ == '__main__':
     app.run(debug=True)
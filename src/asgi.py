@@ -0,0 +1,386 @@
+"""Asyncio (ASGI) variant of the game API.
+
+Serves the same JSON routes as app.py from a single event loop, without a
+framework. Actions on a GameSession take microseconds, so they run right on
+the loop; clients long-polling `/status` are parked on a per-session
+asyncio.Event instead of holding a thread each, so one process can keep
+tens of thousands of them waiting.
+
+    uvicorn black_jack.src.asgi:app
+
+Sessions are kept in this process (the memory or journal store): waking
+parked clients relies on seeing every change. With the journal store,
+changes are appended without waiting and a response goes out once the
+journal's writer has made them durable, so fsyncs never block the loop.
+"""
+import asyncio
+import json
+import os
+import re
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from .expiry import SessionSweeper
+from .gameSession import GameSession
+from .journal import JournaledSessionStore
+from .lobby import LobbyCache
+from .sessionManager import SessionManager, generate_session_id
+from .sessionStore import create_store
+
+# Upper bound for how long a long-poll request may be parked, in seconds
+LONG_POLL_MAX_WAIT = 30
+
+# Lobby page size limits
+LOBBY_PAGE_SIZE = 50
+LOBBY_MAX_PAGE_SIZE = 200
+
+class ChangeNotifier:
+    """One asyncio.Event per session with waiters, set (and dropped) on every change."""
+    def __init__(self):
+        # session_id -> (event, number of waiters)
+        self._events: Dict[str, Tuple[asyncio.Event, int]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def subscribe(self, session_id: str) -> asyncio.Event:
+        """The event the next change to `session_id` will set."""
+        event, waiters = self._events.get(session_id, (None, 0))
+        if event is None:
+            event = asyncio.Event()
+        self._events[session_id] = (event, waiters + 1)
+        return event
+
+    def unsubscribe(self, session_id: str, event: asyncio.Event) -> None:
+        current, waiters = self._events.get(session_id, (None, 0))
+        if current is event:
+            if waiters > 1:
+                self._events[session_id] = (event, waiters - 1)
+            else:
+                del self._events[session_id]
+
+    def _fire(self, session_id: str) -> None:
+        event, _ = self._events.pop(session_id, (None, 0))
+        if event is not None:
+            event.set()
+
+    def notify(self, session_id: str) -> None:
+        """Wake everyone waiting on `session_id`; safe to call from any thread."""
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._fire(session_id)
+        else:
+            # e.g. the sweeper thread expiring a session
+            self._loop.call_soon_threadsafe(self._fire, session_id)
+
+    def waiting(self) -> int:
+        """Number of parked requests."""
+        return sum(waiters for _, waiters in self._events.values())
+
+active_sessions = SessionManager(create_store(os.environ.get('BLACKJACK_SESSION_STORE')))
+if active_sessions.shared:
+    raise RuntimeError("The ASGI server keeps sessions in process, use the Flask app with shared stores")
+journal = active_sessions.store.journal if isinstance(active_sessions.store, JournaledSessionStore) else None
+if journal is not None:
+    # Don't fsync on the loop; see durable()
+    active_sessions.store.wait = False
+
+notifier = ChangeNotifier()
+active_sessions.add_listener(lambda session: notifier.notify(session.session_id))
+
+lobby = LobbyCache(active_sessions)
+
+# Drop expired sessions from the lobby and wake their waiting clients
+def close_expired_session(session_id):
+    lobby.session_removed(session_id)
+    notifier.notify(session_id)
+
+session_sweeper = SessionSweeper(
+    active_sessions,
+    idle_ttl=float(os.environ.get('BLACKJACK_IDLE_TTL', 24 * 3600)),
+    finished_ttl=float(os.environ.get('BLACKJACK_FINISHED_TTL', 3600)),
+    on_expire=close_expired_session
+)
+
+class Request:
+    def __init__(self, scope: Dict[str, Any], body: bytes, receive: Callable[[], Awaitable[Dict]]):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query = {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+        self.headers = {key.decode().lower(): value.decode() for key, value in scope.get('headers', [])}
+        self.body = body
+        self.receive = receive
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def arg(self, name: str, type: Callable = str, default: Any = None) -> Any:
+        """Query parameter converted with `type`, `default` if missing or invalid."""
+        try:
+            return type(self.query[name])
+        except (KeyError, ValueError):
+            return default
+
+    def etag_matches(self, etag: str) -> bool:
+        values = self.headers.get('if-none-match', '')
+        return any(value.strip().strip('"') in (etag, '*') for value in values.split(','))
+
+class Response:
+    def __init__(self, body: Any = None, status: int = 200, etag: Optional[str] = None):
+        if isinstance(body, bytes) or body is None:
+            self.body = body or b''
+        else:
+            self.body = json.dumps(body).encode()
+        self.status = status
+        self.etag = etag
+
+    async def send(self, send: Callable[[Dict], Awaitable[None]]) -> None:
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(self.body)).encode())]
+        if self.etag is not None:
+            headers.append((b'etag', f'"{self.etag}"'.encode()))
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': self.body})
+
+def error(message: str, status: int) -> Response:
+    return Response({'error': message}, status)
+
+# Entity tag identifying a particular version of a session's state
+def session_etag(session_id, version):
+    return f"{session_id}-{version}"
+
+# Full game state, or just the changes since the client's version if it has one
+def state_payload(session, since=None):
+    if since is not None:
+        delta = session.get_state_delta(since)
+        if delta is not None:
+            return delta
+    return session.get_game_state()
+
+async def wait_for_change(request: Request, session_id: str, since: int, timeout: float) -> bool:
+    """Park until the session moves past `since`, the timeout expires or the client goes away."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    disconnected = asyncio.ensure_future(request.receive())
+    try:
+        while True:
+            session = active_sessions.get(session_id)
+            if session is None or session.version != since:
+                return True
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            event = notifier.subscribe(session_id)
+            changed = asyncio.ensure_future(event.wait())
+            try:
+                done, _ = await asyncio.wait({changed, disconnected}, timeout=remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                changed.cancel()
+                notifier.unsubscribe(session_id, event)
+            if disconnected in done:
+                return False
+    finally:
+        disconnected.cancel()
+
+async def list_sessions(request: Request) -> Response:
+    # ?status=waiting filters, ?cursor=<next_cursor> continues from the previous page
+    limit = min(max(request.arg('limit', int, LOBBY_PAGE_SIZE), 1), LOBBY_MAX_PAGE_SIZE)
+    try:
+        body = lobby.page(request.arg('status') or None, request.arg('cursor') or None, limit)
+    except ValueError:
+        return error('Invalid cursor', 400)
+    etag = f"lobby-{zlib.crc32(body):08x}"
+    if request.etag_matches(etag):
+        return Response(status=304, etag=etag)
+    return Response(body, etag=etag)
+
+async def create_session(request: Request) -> Response:
+    data = request.json()
+    creator_name = data.get('creator_name')
+    if not creator_name:
+        return error('Creator name is required', 400)
+    try:
+        max_players = int(data.get('max_players', 5))
+        decks = int(data.get('decks', 1))
+        penetration = float(data.get('penetration', 0.75))
+        seed = data.get('seed')
+        seed = None if seed is None else int(seed)
+    except (TypeError, ValueError):
+        return error('max_players, decks, penetration and seed must be numbers', 400)
+
+    session = None
+    while session is None or not active_sessions.add(session):
+        try:
+            session = GameSession(generate_session_id(), creator_name, max_players, decks, penetration, seed)
+        except ValueError as exc:
+            return error(str(exc), 400)
+        session.add_player(creator_name)
+    return Response({
+        'session_id': session.session_id,
+        'message': f'Session created with ID: {session.session_id}'
+    }, 201)
+
+async def join_session(request: Request, session_id: str) -> Response:
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return error('Session not found', 404)
+        player_name = request.json().get('player_name')
+        if not player_name:
+            return error('Player name is required', 400)
+        if session.status != 'waiting':
+            return error('Game has already started', 400)
+        if not session.add_player(player_name):
+            return error('Could not add player (name might be taken or session is full)', 400)
+        return Response({
+            'message': f'Player {player_name} joined session {session_id}',
+            'session_status': session.status,
+            'player_count': len(session.players)
+        })
+
+async def start_session(request: Request, session_id: str) -> Response:
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return error('Session not found', 404)
+        if session.status != 'waiting':
+            return error('Game has already started or finished', 400)
+        if not session.start_game():
+            return error('Not enough players to start the game', 400)
+        return Response({
+            'message': 'Game started!',
+            'game_state': state_payload(session, request.arg('since', int))
+        })
+
+async def session_status(request: Request, session_id: str) -> Response:
+    if session_id not in active_sessions:
+        return error('Session not found', 404)
+
+    # Long-poll: ?since=<version>&wait=<seconds> parks until the state moves on
+    since = request.arg('since', int)
+    if since is not None:
+        wait = min(max(request.arg('wait', float, 0), 0), LONG_POLL_MAX_WAIT)
+        if not await wait_for_change(request, session_id, since, wait):
+            return Response(status=304, etag=session_etag(session_id, since))
+
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return error('Session not found', 404)
+        etag = session_etag(session_id, session.version)
+        if request.etag_matches(etag):
+            return Response(status=304, etag=etag)
+        # ?delta=1 asks for only what changed since the client's version
+        delta = session.get_state_delta(since) if since is not None and request.arg('delta', int) else None
+        if delta is None:
+            return Response(session.encoded_state(), etag=etag)
+        return Response(delta, etag=etag)
+
+def player_action(action: Callable[[GameSession, str], Optional[str]]):
+    """Route handler running `action` for the player named in the body."""
+    async def handler(request: Request, session_id: str) -> Response:
+        with active_sessions.locked(session_id) as session:
+            if session is None:
+                return error('Session not found', 404)
+            player_name = request.json().get('player_name')
+            if not player_name:
+                return error('Player name is required', 400)
+            message = action(session, player_name)
+            if message is None:
+                return error('Not your turn', 400)
+            return Response({
+                'message': message,
+                'game_state': state_payload(session, request.arg('since', int))
+            })
+    return handler
+
+async def reset_session(request: Request, session_id: str) -> Response:
+    with active_sessions.locked(session_id) as session:
+        if session is None:
+            return error('Session not found', 404)
+        # Start a new round, chips carry over
+        session.reset_round()
+        return Response({
+            'message': 'New round started!',
+            'game_state': state_payload(session, request.arg('since', int))
+        })
+
+ROUTES: List[Tuple[str, 're.Pattern', Callable[..., Awaitable[Response]]]] = [
+    ('GET', re.compile(r'/api/sessions'), list_sessions),
+    ('POST', re.compile(r'/api/sessions'), create_session),
+    ('POST', re.compile(r'/api/sessions/([^/]+)/join'), join_session),
+    ('POST', re.compile(r'/api/sessions/([^/]+)/start'), start_session),
+    ('GET', re.compile(r'/api/sessions/([^/]+)/status'), session_status),
+    ('POST', re.compile(r'/api/sessions/([^/]+)/hit'), player_action(GameSession.hit)),
+    ('POST', re.compile(r'/api/sessions/([^/]+)/stand'), player_action(GameSession.stand)),
+    ('POST', re.compile(r'/api/sessions/([^/]+)/reset'), reset_session),
+]
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+async def durable(sequence: int) -> None:
+    """Wait, without blocking the loop, until journal record `sequence` is on disk."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve():
+        if not future.done():
+            future.set_result(None)
+    journal.when_durable(sequence, lambda: loop.call_soon_threadsafe(resolve))
+    await future
+
+async def lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            notifier.bind(asyncio.get_running_loop())
+            session_sweeper.start(track_existing=True)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            session_sweeper.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send) -> None:
+    """The ASGI application."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    # Servers that skip lifespan events still need change notifications
+    notifier.bind(asyncio.get_running_loop())
+
+    path_matched = False
+    for method, pattern, handler in ROUTES:
+        match = pattern.fullmatch(scope['path'])
+        if match is None:
+            continue
+        path_matched = True
+        if method == scope['method']:
+            request = Request(scope, await read_body(receive), receive)
+            appended = journal.appended if journal is not None else 0
+            response = await handler(request, *match.groups())
+            if journal is not None and journal.appended != appended:
+                # Only answer once the changes this request made are durable
+                await durable(journal.appended)
+            break
+    else:
+        response = error('Method not allowed', 405) if path_matched else error('Not found', 404)
+    await response.send(send)
@@ -0,0 +1,80 @@
+"""Static files fingerprinted by content and compressed once, at startup.
+
+Every file in the static directory gets a URL name with a hash of its
+contents in it (`script.js` -> `script.1f2e3d4c5b6a.js`), so it can be
+cached forever: a changed file gets a new URL. Compressed variants are
+made up front, gzip always and brotli when the brotli module is installed,
+and each request gets the best one its Accept-Encoding allows.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Files smaller than this go out as they are
+MIN_COMPRESS_SIZE = 256
+
+# Content encodings in order of preference
+ENCODINGS = ('br', 'gzip')
+
+def fingerprint(data: bytes) -> str:
+    """Short hash of a file's contents."""
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
+def compress(data: bytes) -> Dict[str, bytes]:
+    """The file's variants by content encoding, leaving out those that don't come out smaller."""
+    variants = {'identity': data}
+    if len(data) >= MIN_COMPRESS_SIZE:
+        candidates = {'gzip': gzip.compress(data, 9, mtime=0)}
+        if brotli is not None:
+            candidates['br'] = brotli.compress(data, quality=11)
+        variants.update((encoding, body) for encoding, body in candidates.items() if len(body) < len(data))
+    return variants
+
+class Asset:
+    """One file's contents in every encoding, and its fingerprint."""
+    __slots__ = ('name', 'url_name', 'mimetype', 'etag', 'variants')
+
+    def __init__(self, name: str, data: bytes, mimetype: Optional[str] = None):
+        self.name = name
+        self.etag = fingerprint(data)
+        stem, extension = os.path.splitext(name)
+        self.url_name = f"{stem}.{self.etag}{extension}"
+        self.mimetype = mimetype or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.variants = compress(data)
+
+    def negotiate(self, accept_encodings) -> str:
+        """The encoding to send, given the request's parsed Accept-Encoding."""
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+    def etag_for(self, encoding: str) -> str:
+        # Each encoding is a different representation, so it needs its own tag
+        return self.etag if encoding == 'identity' else f"{self.etag}-{encoding}"
+
+class AssetBundle:
+    """Every file under `directory`, by its name and by its fingerprinted URL name."""
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.by_name: Dict[str, Asset] = {}
+        self.by_url_name: Dict[str, Asset] = {}
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    asset = Asset(name, f.read())
+                self.by_name[name] = asset
+                self.by_url_name[asset.url_name] = asset
+
+    def url_name(self, name: str) -> Optional[str]:
+        asset = self.by_name.get(name)
+        return asset.url_name if asset is not None else None
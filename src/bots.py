@@ -0,0 +1,183 @@
+"""Bot seats: players the server plays itself.
+
+A bot seat is a Player whose `bot` attribute names its strategy: one of the
+simulator's (`basic`, `stand`, `mimic`) or `threshold:<n>`, hitting below n.
+The BotScheduler plays their turns for every table on a small thread pool.
+"""
+import functools
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from . import metrics
+from .cards import CARD_VALUES, parse_card
+from .gameSession import GameSession
+from .sessionStore import ConcurrentModificationError
+from .simulator import STRATEGIES, Strategy
+
+@functools.lru_cache(maxsize=None)
+def resolve_strategy(name: str) -> Strategy:
+    """The strategy function for a bot's strategy name. Raises ValueError if unknown."""
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    kind, _, limit = name.partition(':')
+    if kind == 'threshold' and limit.isdigit() and 2 <= int(limit) <= 21:
+        return lambda total, soft_aces, upcard, limit=int(limit): total < limit
+    raise ValueError(f"Unknown bot strategy: {name}")
+
+def play_bot_turn(session: GameSession) -> Optional[str]:
+    """Make one move for the bot whose turn it is; None if it isn't a bot's turn."""
+    player = session.current_bot()
+    if player is None:
+        return None
+    upcard = CARD_VALUES[parse_card(session.dealer.cards[1])]
+    if not player.blackjack and resolve_strategy(player.bot)(player.total, player.soft_aces, upcard):
+        return session.hit(player.name)
+    return session.stand(player.name)
+
+class BotScheduler:
+    """Plays the bots' turns at every table on a bounded thread pool.
+
+    Listening to session changes, a table is queued whenever its turn lands
+    on a bot, due `think_time` seconds later; so is one loaded with a bot up
+    (see `session_loaded` and `resume`, for tables from before a restart). Each job makes one move, after
+    which the table (if another bot is up) joins the back of the queue again,
+    so tables full of bots take turns with everybody else instead of
+    hogging the workers.
+    """
+    def __init__(self, manager, workers: int = 4, think_time: float = 0.5):
+        self.manager = manager
+        self.workers = workers
+        self.think_time = think_time
+        # (due time, tie breaker, session ID), and the IDs in it
+        self._queue: List[Tuple[float, int, str]] = []
+        self._queued = set()
+        # IDs of the tables a worker is moving right now
+        self._moving = set()
+        self._order = itertools.count()
+        self._changed = threading.Condition()
+        self._free_workers = threading.Semaphore(workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        # Metrics
+        self.actions = 0
+        self.errors = 0
+        self.lag = 0.0  # total seconds moves ran after they were due
+        self.started_at: Optional[float] = None
+        self._stats_lock = threading.Lock()
+        manager.add_listener(self.session_changed)
+        manager.add_load_listener(self.session_loaded)
+
+    def session_changed(self, session: GameSession) -> None:
+        """Queue the table if a bot is up next."""
+        if session.current_bot() is not None:
+            self.schedule(session.session_id)
+
+    def session_loaded(self, session: GameSession) -> None:
+        """Queue a table loaded with a bot up, unless that's a worker loading it to move."""
+        with self._changed:
+            if session.session_id in self._moving:
+                return
+        self.session_changed(session)
+
+    def resume(self) -> None:
+        """Queue the tables already in the store that may have a bot up: after a restart, or left by another worker.
+
+        Works from the lobby summaries, so a journal doesn't replay any
+        table for it; a worker loads only rounds in progress with a bot seat.
+        """
+        for summary in self.manager.summaries():
+            if summary['status'] == 'in_progress' and summary['bot_count']:
+                self.schedule(summary['session_id'])
+
+    def schedule(self, session_id: str, delay: Optional[float] = None) -> None:
+        with self._changed:
+            if session_id in self._queued or self._stopped:
+                return
+            self._queued.add(session_id)
+            due = time.monotonic() + (self.think_time if delay is None else delay)
+            heapq.heappush(self._queue, (due, next(self._order), session_id))
+            self._changed.notify()
+        self.start()
+
+    def start(self) -> None:
+        """Start the dispatcher thread and the worker pool (done on the first bot turn)."""
+        with self._changed:
+            if self._thread is not None or self._stopped:
+                return
+            self.started_at = time.monotonic()
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='bot')
+            self._thread = threading.Thread(target=self._dispatch, name='bot-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._changed:
+            self._stopped = True
+            self._changed.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._pool.shutdown()
+
+    def _next_due(self) -> Optional[Tuple[str, float]]:
+        """Wait for the earliest table to come due; None once stopped."""
+        with self._changed:
+            while not self._stopped:
+                if self._queue:
+                    wait = self._queue[0][0] - time.monotonic()
+                    if wait <= 0:
+                        due, _, session_id = heapq.heappop(self._queue)
+                        self._queued.discard(session_id)
+                        return session_id, due
+                else:
+                    wait = None
+                self._changed.wait(wait)
+            return None
+
+    def _dispatch(self) -> None:
+        while True:
+            # Only take a table off the queue once a worker can run it
+            self._free_workers.acquire()
+            item = self._next_due()
+            if item is None:
+                self._free_workers.release()
+                return
+            self._pool.submit(self._move, *item)
+
+    def _move(self, session_id: str, due: float) -> None:
+        lag = time.monotonic() - due
+        with self._changed:
+            self._moving.add(session_id)
+        try:
+            with self.manager.locked(session_id) as session:
+                if session is None or play_bot_turn(session) is None:
+                    return
+            with self._stats_lock:
+                self.actions += 1
+                self.lag += lag
+            metrics.BOT_ACTIONS.inc()
+            metrics.BOT_LAG_SECONDS.observe(lag)
+        except ConcurrentModificationError:
+            # Another worker moved the table on; look again straight away
+            self.schedule(session_id, delay=0)
+        except Exception:
+            # Keep the worker going for the other tables; the table waits for a human action
+            with self._stats_lock:
+                self.errors += 1
+        finally:
+            with self._changed:
+                self._moving.discard(session_id)
+            self._free_workers.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Moves made, moves per second since the first one, queued tables and mean lag."""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0
+        return {
+            'actions': self.actions,
+            'actions_per_second': self.actions / elapsed if elapsed else 0.0,
+            'queued': len(self._queued),
+            'mean_lag_ms': self.lag / self.actions * 1000 if self.actions else 0.0,
+            'errors': self.errors
+        }
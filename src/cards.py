@@ -0,0 +1,54 @@
+from typing import Iterable, List, Tuple, Union
+
+# A card is a small int, rank * 4 + suit, so a deck fits in a bytearray and
+# hand values come from lookup tables instead of parsing strings. Card names
+# like "10H" are only produced at the JSON boundary.
+
+RANKS = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K')
+SUITS = ('H', 'D', 'C', 'S')  # Hearts, Diamonds, Clubs, Spades
+ACE = 0
+
+# Value of each rank, aces counted as 11
+RANK_VALUES = bytes([11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10])
+
+# Per-card lookup tables, indexed by the card int
+CARD_VALUES = bytes(RANK_VALUES[card // 4] for card in range(52))
+CARD_IS_ACE = bytes(1 if card // 4 == ACE else 0 for card in range(52))
+CARD_NAMES = tuple(f"{RANKS[card // 4]}{SUITS[card % 4]}" for card in range(52))
+CARD_CODES = {name: card for card, name in enumerate(CARD_NAMES)}
+
+FULL_DECK = bytes(range(52))
+
+Card = Union[int, str]
+
+def new_deck() -> bytearray:
+    """A fresh, ordered 52-card deck."""
+    return bytearray(FULL_DECK)
+
+def parse_card(card: Card) -> int:
+    """Card int for a name like "10H" (ints are passed through)."""
+    return card if isinstance(card, int) else CARD_CODES[card]
+
+def card_names(cards: Iterable[Card]) -> List[str]:
+    """Card names for JSON. Hands set up with names (e.g. in tests) pass through."""
+    return [CARD_NAMES[card] if isinstance(card, int) else card for card in cards]
+
+def add_card(total: int, soft_aces: int, card: int) -> Tuple[int, int]:
+    """Add one card to a hand total in O(1).
+
+    `soft_aces` counts aces still valued at 11; one is demoted to 1 for each
+    time the total would otherwise go over 21.
+    """
+    total += CARD_VALUES[card]
+    soft_aces += CARD_IS_ACE[card]
+    while total > 21 and soft_aces:
+        total -= 10
+        soft_aces -= 1
+    return total, soft_aces
+
+def hand_value(cards: Iterable[Card]) -> Tuple[int, int]:
+    """Total and number of soft aces of a whole hand."""
+    total = soft_aces = 0
+    for card in cards:
+        total, soft_aces = add_card(total, soft_aces, parse_card(card))
+    return total, soft_aces
@@ -1,6 +1,8 @@
 from .player import Player
 
 class Dealer(Player):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("Dealer", chips=0)
         
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+# A change is {"op": "set" | "append" | "remove", "path": [...], "value": ...}.
+# Paths are lists of dict keys and list indexes into the game state, e.g.
+# ["players", 1, "cards"] for the second player's cards.
+Change = Dict[str, Any]
+
+# The same change as an (op, path, value) tuple, the form sessions keep in
+# their history: a small tuple instead of a three-key dict and a path list.
+PackedChange = Tuple[str, Tuple[Any, ...], Any]
+
+def diff_state(old: Any, new: Any, path: List[Any] = None) -> List[Change]:
+    """Compute the changes that turn the `old` game state into `new`."""
+    path = path or []
+    changes: List[Change] = []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            if key not in old:
+                changes.append({"op": "set", "path": path + [key], "value": value})
+            elif old[key] != value:
+                changes.extend(diff_state(old[key], value, path + [key]))
+        for key in old:
+            if key not in new:
+                changes.append({"op": "remove", "path": path + [key]})
+    elif isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        # New cards, players or messages are appended to the end
+        changes.append({"op": "append", "path": path, "value": new[len(old):]})
+    elif (isinstance(old, list) and isinstance(new, list) and len(new) == len(old)
+          and all(isinstance(item, dict) for item in new)):
+        # Same players, diff each one individually
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            if old_item != new_item:
+                changes.extend(diff_state(old_item, new_item, path + [i]))
+    elif old != new:
+        changes.append({"op": "set", "path": path, "value": new})
+
+    return changes
+
+def apply_changes(state: Dict[str, Any], changes: List[Change]) -> Dict[str, Any]:
+    """Apply a list of changes to a game state in place and return it."""
+    for change in changes:
+        target = state
+        for key in change["path"][:-1]:
+            target = target[key]
+        key = change["path"][-1]
+
+        if change["op"] == "append":
+            target[key].extend(change["value"])
+        elif change["op"] == "remove":
+            del target[key]
+        else:
+            target[key] = change["value"]
+    return state
+
+def pack_changes(changes: Sequence[Any]) -> Tuple[PackedChange, ...]:
+    """Compact form of a list of changes. Already packed ones (as decoded from JSON) are kept."""
+    return tuple((change["op"], tuple(change["path"]), change.get("value")) if isinstance(change, dict)
+                 else (change[0], tuple(change[1]), change[2]) for change in changes)
+
+def unpack_changes(packed: Sequence[PackedChange]) -> List[Change]:
+    """Changes in the dict form sent to clients."""
+    return [{"op": op, "path": list(path)} if op == "remove" else {"op": op, "path": list(path), "value": value}
+            for op, path, value in packed]
@@ -0,0 +1,83 @@
+"""JSON encoding of game states, cached per session version.
+
+Uses orjson when it's installed and the standard library otherwise; both
+produce the same compact output for game states.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cards import card_names
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, only makes encoding faster
+    orjson = None
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+class StateEncoder:
+    """A session's encoded state, rebuilt only when its version moves on.
+
+    Each player's fragment is cached separately and only re-encoded when that
+    player's hand, chips or turn changed, so a hit re-encodes one player.
+    """
+    __slots__ = ('version', 'body', 'players')
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.body = b''
+        # player name -> (fields the fragment was encoded from, fragment)
+        self.players: Dict[str, Tuple[tuple, bytes]] = {}
+
+    def encode(self, session) -> bytes:
+        """`session.get_game_state()` as JSON bytes."""
+        if session.version == self.version:
+            return self.body
+        in_progress = session.status == "in_progress"
+        fragments: List[bytes] = []
+        players: Dict[str, Tuple[tuple, bytes]] = {}
+        for i, p in enumerate(session.players):
+            fields = (tuple(p.cards), p.total, p.chips, p.busted, p.blackjack, p.bot is not None,
+                      i == session.current_player_index and in_progress)
+            cached = self.players.get(p.name)
+            if cached is None or cached[0] != fields:
+                cards, total, chips, busted, blackjack, bot, is_current = fields
+                cached = (fields, dumps({
+                    "name": p.name,
+                    "cards": card_names(cards),
+                    "total": total,
+                    "chips": chips,
+                    "busted": busted,
+                    "blackjack": blackjack,
+                    "bot": bot,
+                    "is_current": is_current
+                }))
+            players[p.name] = cached
+            fragments.append(cached[1])
+        dealer = session.dealer
+        rest = dumps({
+            "dealer": {
+                "cards": card_names(dealer.cards),
+                "total": dealer.total,
+                "busted": dealer.busted,
+                "blackjack": dealer.blackjack
+            },
+            "current_player": session.players[session.current_player_index].name
+                              if session.players and in_progress else None,
+            "winner": session.winner
+        })
+        head = dumps({
+            "session_id": session.session_id,
+            "version": session.version,
+            "status": session.status,
+            "messages": session.messages.recent()
+        })
+        # Same keys, in the same order, as get_game_state()
+        self.body = b''.join((head[:-1], b',"players":[', b','.join(fragments), b'],', rest[1:]))
+        self.players = players
+        self.version = session.version
+        return self.body
@@ -0,0 +1,85 @@
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+class Subscriber:
+    """A single client's queue of pending events.
+
+    The queue is bounded: when a slow client falls behind, the oldest events
+    are dropped. Events only signal that something changed, so the stream
+    always catches up by sending the latest state.
+    """
+    def __init__(self, maxsize: int = 16):
+        self.events = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._ready = threading.Condition()
+
+    def push(self, event: Any) -> None:
+        """Queue an event for this client, dropping the oldest if full."""
+        with self._ready:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            self._ready.notify()
+
+    def get(self, timeout: float) -> Optional[Any]:
+        """Wait up to `timeout` seconds for the next event. Returns None on timeout or close."""
+        with self._ready:
+            self._ready.wait_for(lambda: self.events or self.closed, timeout)
+            if self.events:
+                return self.events.popleft()
+            return None
+
+    def close(self) -> None:
+        """Wake the client up and tell it to stop listening."""
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+class EventBroker:
+    """Registry of subscribers for each game session."""
+    def __init__(self, max_subscribers_per_session: int = 50):
+        self.max_subscribers_per_session = max_subscribers_per_session
+        self._subscribers: Dict[str, List[Subscriber]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, session_id: str) -> Optional[Subscriber]:
+        """Register a new subscriber. Returns None if the session has too many listeners."""
+        with self._lock:
+            subscribers = self._subscribers.setdefault(session_id, [])
+            if len(subscribers) >= self.max_subscribers_per_session:
+                return None
+            subscriber = Subscriber()
+            subscribers.append(subscriber)
+            return subscriber
+
+    def unsubscribe(self, session_id: str, subscriber: Subscriber) -> None:
+        """Remove a subscriber from a session."""
+        with self._lock:
+            subscribers = self._subscribers.get(session_id, [])
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+            if not subscribers:
+                self._subscribers.pop(session_id, None)
+
+    def publish(self, session_id: str, event: Any) -> None:
+        """Send an event to everyone listening on a session."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(session_id, ()))
+        for subscriber in subscribers:
+            subscriber.push(event)
+
+    def close_session(self, session_id: str) -> None:
+        """Disconnect every subscriber of a session (e.g. when it expires)."""
+        with self._lock:
+            subscribers = self._subscribers.pop(session_id, [])
+        for subscriber in subscribers:
+            subscriber.close()
+
+    def subscriber_count(self, session_id: Optional[str] = None) -> int:
+        """Number of subscribers for one session, or across all sessions."""
+        with self._lock:
+            if session_id is not None:
+                return len(self._subscribers.get(session_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
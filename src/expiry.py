@@ -0,0 +1,154 @@
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from . import metrics
+from .gameSession import GameSession
+
+class ExpiryIndex:
+    """Min-heap of session deadlines.
+
+    Rescheduling a session pushes a new entry instead of searching the heap;
+    outdated entries are skipped when popped and the heap is rebuilt once
+    they outnumber the live ones.
+    """
+    def __init__(self):
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, session_id: str, deadline: float) -> None:
+        """Set (or move) a session's deadline."""
+        with self._lock:
+            self._deadlines[session_id] = deadline
+            heapq.heappush(self._heap, (deadline, session_id))
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(d, s) for s, d in self._deadlines.items()]
+                heapq.heapify(self._heap)
+
+    def discard(self, session_id: str) -> None:
+        """Stop tracking a session."""
+        with self._lock:
+            self._deadlines.pop(session_id, None)
+
+    def pop_expired(self, now: float) -> List[str]:
+        """Remove and return every session whose deadline has passed."""
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, session_id = heapq.heappop(self._heap)
+                if self._deadlines.get(session_id) == deadline:
+                    del self._deadlines[session_id]
+                    expired.append(session_id)
+        return expired
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest live deadline, or None if nothing is tracked."""
+        with self._lock:
+            while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._deadlines)
+
+class SessionSweeper:
+    """Background thread removing sessions that have been inactive too long.
+
+    Tables still being played (or waiting for players) expire `idle_ttl`
+    seconds after their last change, finished tables after `finished_ttl`.
+    Deadlines are kept up to date by listening to session changes, so a
+    sweep only looks at the sessions that are actually due.
+    """
+    def __init__(self, manager, idle_ttl: float = 24 * 3600, finished_ttl: float = 3600,
+                 on_expire: Optional[Callable[[str], None]] = None, max_interval: float = 60):
+        self.manager = manager
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self.on_expire = on_expire
+        self.max_interval = max_interval
+        self.index = ExpiryIndex()
+        # Metrics
+        self.evicted = {'idle': 0, 'finished': 0}
+        self.sweeps = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        manager.add_listener(self.touch)
+
+    def deadline_for(self, session: GameSession) -> float:
+        ttl = self.finished_ttl if session.status == "finished" else self.idle_ttl
+        return session.last_activity + ttl
+
+    def touch(self, session: GameSession) -> None:
+        """Push back a session's deadline after it changed."""
+        deadline = self.deadline_for(session)
+        next_deadline = self.index.next_deadline()
+        self.index.schedule(session.session_id, deadline)
+        if next_deadline is None or deadline < next_deadline:
+            # The sweeper may be sleeping past the new deadline
+            self._wakeup.set()
+
+    def track_existing(self) -> None:
+        """Index sessions that were already in the store (e.g. from other workers or a journal)."""
+        for session_id, last_activity, status in self.manager.activity():
+            if status is None:
+                # Not loaded, so the status isn't known: look at it by the earlier
+                # deadline, and sweep() puts it back if it isn't due yet
+                ttl = min(self.idle_ttl, self.finished_ttl)
+            else:
+                ttl = self.finished_ttl if status == "finished" else self.idle_ttl
+            self.index.schedule(session_id, last_activity + ttl)
+        self._wakeup.set()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Evict every session past its deadline. Returns how many were removed."""
+        now = time.time() if now is None else now
+        removed = 0
+        for session_id in self.index.pop_expired(now):
+            session = self.manager.get(session_id)
+            if session is None:
+                continue
+            deadline = self.deadline_for(session)
+            if deadline > now:
+                # Touched somewhere we didn't hear about (another worker)
+                self.index.schedule(session_id, deadline)
+                continue
+            self.manager.remove(session_id)
+            reason = 'finished' if session.status == "finished" else 'idle'
+            self.evicted[reason] += 1
+            metrics.SESSIONS_EXPIRED.inc(reason)
+            removed += 1
+            if self.on_expire:
+                self.on_expire(session_id)
+        self.sweeps += 1
+        metrics.SWEEPS.inc()
+        return removed
+
+    def start(self, track_existing: bool = False) -> None:
+        """Start sweeping in a daemon thread, first indexing existing sessions if asked to."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(track_existing,),
+                                            name='session-sweeper', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, track_existing: bool = False) -> None:
+        if track_existing:
+            # Off the startup path: loading every session can take a while
+            self.track_existing()
+        while not self._stopped.is_set():
+            self.sweep()
+            next_deadline = self.index.next_deadline()
+            timeout = self.max_interval
+            if next_deadline is not None:
+                timeout = min(timeout, max(next_deadline - time.time(), 0))
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
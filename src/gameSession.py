@@ -1,91 +1,333 @@
 from datetime import datetime, timezone
 import random
-from typing import List, Optional, Dict, Any
-from .player import Player
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Dict, Any, Callable, Tuple
+from .player import Player, normalize_name
 from .dealer import Dealer
+from .encoding import StateEncoder
+from .delta import diff_state, pack_changes, unpack_changes
+from .cards import CARD_VALUES, card_names, hand_value, parse_card
+from .messageLog import MessageLog
+from .shoe import Shoe
+from . import metrics, rules
+from .rules import DEALER_STANDS_ON, PAYOUTS, settle
+from .solver import LRUCache, StrategySolver, composition, default_solver
 
 class GameSession:
-    def __init__(self, session_id: str, creator_name: str, max_players: int = 5):
+    # Number of versions kept for clients asking for incremental updates
+    DELTA_HISTORY = 32
+    # Number of idempotency keys whose replies are kept for retried requests
+    IDEMPOTENCY_KEYS = 32
+    # Player decisions that can be sent together (see play_actions)
+    BATCH_ACTIONS = ("hit", "stand")
+    # Length of the action log past which the next round starts it over
+    MAX_LOGGED_ACTIONS = 500
+
+    __slots__ = ('session_id', 'players', 'dealer', 'seed', 'shoe', 'current_turn', 'status', 'max_players',
+                 'creator', 'created_at', 'last_activity', 'current_player_index', 'winner', 'messages',
+                 'actions', 'actions_logged', 'checkpoint', 'version', 'lock', '_changed', '_listeners', 'history', '_last_state',
+                 '_encoder', '_seats', 'results', 'replies', '_deferred')
+
+    def __init__(self, session_id: str, creator_name: str, max_players: int = 5,
+                 decks: int = 1, penetration: float = 0.75, seed: Optional[int] = None,
+                 message_history: int = MessageLog.DEFAULT_LENGTH):
         self.session_id = session_id
         self.players: List[Player] = []
+        # normalize_name(player name) -> seated Player
+        self._seats: Dict[str, Player] = {}
         self.dealer = Dealer()
-        self.deck = self.initialize_deck()
+        # Every shuffle of this table's shoe follows from the seed, so with the
+        # action log the whole session can be replayed exactly
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.shoe = Shoe(decks, penetration, seed=self.seed)
         self.current_turn = 0
         self.status = "waiting"  # waiting, in_progress, finished
         self.max_players = max_players
         self.creator = creator_name
         self.created_at = datetime.now(timezone.utc)
+        self.last_activity = time.time()
         self.current_player_index = 0
         self.winner = None
-        self.messages: List[str] = []
-
-    def initialize_deck(self) -> List[str]:
-        """Initialize a standard deck of 52 cards with suits."""
-        values = ['A', 'K', 'Q', 'J'] + [str(i) for i in range(2, 11)]
-        suits = ['H', 'D', 'C', 'S']  # Hearts, Diamonds, Clubs, Spades
-        deck = []
-        for suit in suits:
-            for value in values:
-                deck.append(f"{value}{suit}")
-        return deck
-
-    def add_player(self, player_name: str, chips: int = 100) -> bool:
-        """Add a player to the session if there's space and name is available."""
+        self.messages = MessageLog(message_history)
+        # (name, outcome, net chips) of each human player's hand in the round
+        # just settled, until a listener takes them (see take_results)
+        self.results: List[Tuple[str, str, float]] = []
+        # Log of successful actions, [action, *arguments], replayed from
+        # `checkpoint` (the to_dict() state it starts from) or from scratch
+        self.actions: List[List[Any]] = []
+        self.checkpoint: Optional[Dict[str, Any]] = None
+        # Actions logged over the session's lifetime, counting those dropped
+        self.actions_logged = 0
+        # Monotonic state version, bumped on every mutation so clients can
+        # tell whether anything changed since their last poll.
+        self.version = 0
+        # Callers hold `lock` around any action on the session; long-polling
+        # clients wait on `_changed`, which shares the same lock and is only
+        # created once somebody waits.
+        self.lock = threading.RLock()
+        self._changed: Optional[threading.Condition] = None
+        self._listeners: List[Callable[['GameSession'], None]] = []
+        # Ring buffer of (version, packed changes) and the state they were diffed against
+        self.history = deque(maxlen=self.DELTA_HISTORY)
+        self._last_state = self.get_game_state()
+        # Encoded state for status requests, created on the first one
+        self._encoder: Optional[StateEncoder] = None
+        # Idempotency key -> reply, created on the first request that sends one
+        self.replies: Optional[LRUCache] = None
+        # Set while play_actions runs, when changes are announced once at the end
+        self._deferred = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact, JSON-friendly form of the session used by shared session stores.
+
+        The action log is left out; a restored session's log starts from it.
+        """
+        return {
+            "id": self.session_id,
+            "creator": self.creator,
+            "max": self.max_players,
+            "created": self.created_at.timestamp(),
+            "active": self.last_activity,
+            "status": self.status,
+            "turn": self.current_player_index,
+            "winner": self.winner,
+            "version": self.version,
+            "shoe": self.shoe.to_dict(),
+            "messages": self.messages.to_dict(),
+            "players": [[p.name, list(p.cards), p.total, p.soft_aces, p.busted, p.blackjack, p.chips, p.bet, p.bot]
+                        for p in self.players],
+            "dealer": [list(self.dealer.cards), self.dealer.total, self.dealer.soft_aces,
+                       self.dealer.busted, self.dealer.blackjack],
+            "history": list(self.history),
+            "replies": self.replies.items() if self.replies is not None else [],
+            "seed": self.seed
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GameSession':
+        """Rebuild a session from `to_dict()` output."""
+        session = cls(data["id"], data["creator"], data["max"], seed=data.get("seed"))
+        session.created_at = datetime.fromtimestamp(data["created"], timezone.utc)
+        session.last_activity = data["active"]
+        session.status = data["status"]
+        session.current_player_index = data["turn"]
+        session.winner = data["winner"]
+        session.version = data["version"]
+        session.shoe = Shoe.from_dict(data["shoe"])
+        session.messages = MessageLog.from_dict(data["messages"])
+        for name, cards, total, soft_aces, busted, blackjack, chips, bet, *bot in data["players"]:
+            player = Player(name, chips, bot[0] if bot else None)
+            player.cards, player.total, player.soft_aces = list(cards), total, soft_aces
+            player.busted, player.blackjack, player.bet = busted, blackjack, bet
+            session.players.append(player)
+            session._seats[normalize_name(name)] = player
+        dealer = session.dealer
+        dealer.cards, dealer.total, dealer.soft_aces, dealer.busted, dealer.blackjack = data["dealer"]
+        # Hands are dealt into; `data` stays the session's replay checkpoint
+        dealer.cards = list(dealer.cards)
+        session.history.extend((version, pack_changes(changes)) for version, changes in data["history"])
+        session.checkpoint = data
+        for key, reply in data.get("replies", []):
+            session.remember_reply(key, reply)
+        session._last_state = session.get_game_state()
+        return session
+
+    def add_listener(self, listener: Callable[['GameSession'], None]) -> bool:
+        """Register a callback invoked with the session after every change. False if it already was."""
+        if listener in self._listeners:
+            return False
+        self._listeners.append(listener)
+        return True
+
+    def remove_listener(self, listener: Callable[['GameSession'], None]) -> None:
+        """Unregister a change callback."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def mark_changed(self) -> int:
+        """Bump the state version and wake up any clients waiting on it."""
+        if self._deferred:
+            return self.version
+        with self.lock:
+            self.version += 1
+            self.last_activity = time.time()
+            state = self.get_game_state()
+            self.history.append((self.version, pack_changes(diff_state(self._last_state, state))))
+            self._last_state = state
+            if self._changed is not None:
+                self._changed.notify_all()
+        for listener in list(self._listeners):
+            listener(self)
+        return self.version
+
+    def get_state_delta(self, since: int) -> Optional[Dict[str, Any]]:
+        """Changes between version `since` and now, or None if that's too far back."""
+        with self.lock:
+            if since > self.version or (since < self.version and
+                                        (not self.history or since < self.history[0][0] - 1)):
+                return None
+            return {
+                "session_id": self.session_id,
+                "version": self.version,
+                "since": since,
+                "changes": unpack_changes([change for version, changes in self.history
+                                           if version > since for change in changes])
+            }
+
+    def reply_for(self, key: str) -> Any:
+        """The reply remembered for an idempotency key, or None."""
+        return self.replies.get(key) if self.replies is not None else None
+
+    def remember_reply(self, key: str, reply: Any) -> None:
+        """Keep the reply to a request, for its retries; only the latest IDEMPOTENCY_KEYS are kept."""
+        if self.replies is None:
+            self.replies = LRUCache(self.IDEMPOTENCY_KEYS)
+        self.replies.put(key, reply)
+
+    def wait_for_change(self, since: int, timeout: float) -> bool:
+        """Block until the version differs from `since` or the timeout expires."""
+        with self.lock:
+            if self._changed is None:
+                self._changed = threading.Condition(self.lock)
+            return self._changed.wait_for(lambda: self.version != since, timeout)
+
+    def add_player(self, player_name: str, chips: int = 100, bot: Optional[str] = None) -> bool:
+        """Add a player to the session if there's space and name is available.
+
+        `bot` names the strategy of a seat the server plays (see bots.py).
+        """
         if len(self.players) >= self.max_players:
             return False
         
-        if any(p.name.lower() == player_name.lower() for p in self.players):
+        key = normalize_name(player_name)
+        if key in self._seats:
             return False
             
-        self.players.append(Player(player_name, chips))
+        player = Player(player_name, chips, bot)
+        self.players.append(player)
+        self._seats[key] = player
+        if bot is None:
+            self.log_action("join", player_name, chips)
+        else:
+            self.log_action("join", player_name, chips, bot)
+        self.mark_changed()
         return True
 
     def remove_player(self, player_name: str) -> bool:
         """Remove a player from the session."""
-        for i, player in enumerate(self.players):
-            if player.name.lower() == player_name.lower():
-                self.players.pop(i)
-                if self.current_player_index >= len(self.players):
-                    self.current_player_index = 0
-                return True
-        return False
+        player = self._seats.pop(normalize_name(player_name), None)
+        if player is None:
+            return False
+        self.players.remove(player)
+        if self.current_player_index >= len(self.players):
+            self.current_player_index = 0
+        self.log_action("leave", player_name)
+        self.mark_changed()
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        """What the lobby shows about this table."""
+        return {
+            'session_id': self.session_id,
+            'creator': self.creator,
+            'player_count': len(self.players),
+            'bot_count': sum(player.bot is not None for player in self.players),
+            'max_players': self.max_players,
+            'decks': self.shoe.decks,
+            'status': self.status,
+            'created_at': self.created_at.isoformat()
+        }
+
+    def get_player(self, player_name: str) -> Optional[Player]:
+        """The seated player called `player_name` (in any case), if any."""
+        return self._seats.get(normalize_name(player_name))
+
+    def log_action(self, action: str, *args: Any) -> None:
+        """Record a successful action for replay."""
+        self.actions.append([action, *args])
+        self.actions_logged += 1
+
+    def actions_since(self, count: int) -> Optional[List[List[Any]]]:
+        """Actions logged after the first `count`, or None if the log has been started over since."""
+        new = self.actions_logged - count
+        if new > len(self.actions):
+            return None
+        return self.actions[len(self.actions) - new:]
+
+    def _checkpoint(self) -> None:
+        """Between rounds, start a long action log over from the current state."""
+        if len(self.actions) >= self.MAX_LOGGED_ACTIONS:
+            self.checkpoint = self.to_dict()
+            self.actions = []
+
+    def replay_log(self) -> Dict[str, Any]:
+        """Everything needed to rebuild this session by replaying its actions."""
+        return {
+            "session": {
+                "session_id": self.session_id,
+                "creator_name": self.creator,
+                "max_players": self.max_players,
+                "decks": self.shoe.decks,
+                "penetration": self.shoe.penetration,
+                "seed": self.seed
+            },
+            "checkpoint": self.checkpoint,
+            "actions": list(self.actions),
+            "version": self.version
+        }
 
     def start_game(self) -> bool:
         """Start the game if there are enough players."""
+        self._checkpoint()
+        if not self._deal_round():
+            return False
+        self.log_action("start")
+        self.mark_changed()
+        return True
+
+    def _deal_round(self) -> bool:
         if len(self.players) < 1:
             return False
             
         self.status = "in_progress"
         self.current_player_index = 0
-        self.deck = self.initialize_deck()
-        random.shuffle(self.deck)
+        self.shoe.start_round()
+        self.messages.new_round()
+        self.results = []
+        metrics.ROUNDS.inc()
         
-        # Reset player hands but keep their chips
+        # Reset player hands in place but keep their chips
         for player in self.players:
-            player.cards = []
-            player.total = 0
-            player.busted = False
-            player.blackjack = False
+            player.reset_hand()
             player.bet = 10  # Default bet for each round
             player.chips -= player.bet  # Deduct bet from chips
         
         # Reset dealer
-        self.dealer = Dealer()
+        self.dealer.reset_hand()
         
         # Deal initial cards
         self.deal_initial_cards()
         return True
 
+    def reset_round(self) -> bool:
+        """Start a new round with the same players, keeping their chips."""
+        self._checkpoint()
+        self.winner = None
+        if not self._deal_round():
+            return False
+        self.log_action("reset")
+        self.mark_changed()
+        return True
+
     def deal_initial_cards(self) -> None:
         """Deal initial cards to all players and the dealer."""
-        self.deck = self.initialize_deck()
-        random.shuffle(self.deck)
-        
         # Deal two cards to each player
         for _ in range(2):
             for player in self.players:
-                player.hit(self.deck.pop())
-            self.dealer.hit(self.deck.pop())
+                player.hit(self.shoe.deal())
+            self.dealer.hit(self.shoe.deal())
 
     def get_current_player(self) -> Optional[Player]:
         """Get the player whose turn it is."""
@@ -93,6 +335,130 @@ class GameSession:
             return None
         return self.players[self.current_player_index]
 
+    def current_bot(self) -> Optional[Player]:
+        """The current player if it's a bot's turn in a round being played."""
+        player = self.get_current_player() if self.status == "in_progress" else None
+        return player if player is not None and player.bot is not None else None
+
+    def is_players_turn(self, player_name: str) -> bool:
+        """Check whether it's `player_name`'s turn in a running round."""
+        current_player = self.get_current_player()
+        return (self.status == "in_progress" and current_player is not None
+                and self._seats.get(normalize_name(player_name)) is current_player)
+
+    def advice_inputs(self, player_name: str) -> Optional[Dict[str, Any]]:
+        """The current player's hand and the values of every card they can't see, or None if it isn't their turn."""
+        if not self.is_players_turn(player_name):
+            return None
+        player = self.get_current_player()
+        hole_card, upcard = self.dealer.cards[:2]
+        total, soft_aces = hand_value(player.cards)
+        unseen = [CARD_VALUES[card] for card in self.shoe.cards[self.shoe.position:]]
+        unseen.append(CARD_VALUES[parse_card(hole_card)])
+        return {
+            "player_cards": card_names(player.cards),
+            "player_total": total,
+            "soft": bool(soft_aces),
+            "dealer_upcard": card_names([upcard])[0],
+            "upcard_value": CARD_VALUES[parse_card(upcard)],
+            "unseen": unseen
+        }
+
+    def optimal_play(self, player_name: str, solver: Optional[StrategySolver] = None) -> Optional[Dict[str, Any]]:
+        """Exact hit/stand EVs for the current player. Returns None if it's not their turn."""
+        inputs = self.advice_inputs(player_name)
+        if inputs is None:
+            return None
+        return (solver or default_solver()).evaluate(
+            inputs["player_total"], inputs["soft"], inputs["upcard_value"], composition(inputs["unseen"]))
+
+    def hit(self, player_name: str) -> Optional[str]:
+        """Deal a card to the current player. Returns None if it's not their turn."""
+        if not self.is_players_turn(player_name):
+            return None
+
+        current_player = self.get_current_player()
+        # A player already on 21 can't take more cards, don't burn one from the shoe
+        if not current_player.blackjack:
+            current_player.hit(self.shoe.deal())
+            metrics.HITS.inc()
+        self.log_action("hit", player_name)
+
+        if current_player.blackjack:
+            message = f"{player_name} has Blackjack with {current_player.total}!"
+            self.next_turn()
+        elif current_player.busted:
+            metrics.BUSTS.inc()
+            message = f"{player_name} busted with {current_player.total}!"
+            self.next_turn()
+        else:
+            message = f"{player_name} hits and has {current_player.total}"
+
+        self.mark_changed()
+        return message
+
+    def stand(self, player_name: str) -> Optional[str]:
+        """End the current player's turn. Returns None if it's not their turn."""
+        if not self.is_players_turn(player_name):
+            return None
+
+        self.log_action("stand", player_name)
+        metrics.STANDS.inc()
+        if self.next_turn():
+            message = f"{player_name} stands. {self.get_current_player().name}'s turn."
+        else:
+            message = f"{player_name} stands. Dealer's turn."
+
+        self.mark_changed()
+        return message
+
+    def play_actions(self, actions: List[List[str]]) -> Tuple[List[str], Optional[int]]:
+        """Apply [action, player name] decisions in order as a single change, all or nothing.
+
+        The batch counts as one version and is logged as one "batch" action.
+        If a decision is rejected, the ones before it are undone. Returns the
+        messages of the decisions and None, or [] and the index of the
+        rejected one.
+        """
+        messages: List[str] = []
+        rejected = None
+        with self.lock:
+            snapshot, results = self.to_dict(), list(self.results)
+            logged = len(self.actions)
+            self._deferred = True
+            try:
+                # Game counters only move once the batch stands
+                with metrics.held_back() as held:
+                    for index, (action, player_name) in enumerate(actions):
+                        message = getattr(self, action)(player_name) if action in self.BATCH_ACTIONS else None
+                        if message is None:
+                            rejected = index
+                            break
+                        messages.append(message)
+            finally:
+                self._deferred = False
+                applied = self.actions[logged:]
+                del self.actions[logged:]
+                self.actions_logged -= len(applied)
+                if rejected is not None or len(messages) < len(actions):
+                    # Rejected, or an exception: put the table back as it was
+                    if applied:
+                        self._restore(snapshot, results)
+                    messages = []
+                elif applied:
+                    metrics.count_held(held)
+                    self.log_action("batch", applied)
+                    self.mark_changed()
+        return messages, rejected
+
+    def _restore(self, data: Dict[str, Any], results: List[Tuple[str, str, float]]) -> None:
+        """Put the table back the way to_dict() found it, keeping this object (and its lock and listeners)."""
+        restored = GameSession.from_dict(data)
+        for name in ('players', '_seats', 'dealer', 'shoe', 'current_player_index', 'status', 'winner',
+                     'messages', 'last_activity'):
+            setattr(self, name, getattr(restored, name))
+        self.results = results
+
     def next_turn(self) -> bool:
         """Move to the next player's turn. Returns True if game should continue."""
         self.current_player_index += 1
@@ -106,58 +472,60 @@ class GameSession:
             
         return True
 
+    @metrics.SECTION_SECONDS.time('dealer_turn')
     def dealer_turn(self) -> None:
         """Handle dealer's turn according to blackjack rules."""
-        while self.dealer.total < 17:
-            self.dealer.hit(self.deck.pop())
+        while self.dealer.total < DEALER_STANDS_ON and not (self.dealer.busted or self.dealer.blackjack):
+            self.dealer.hit(self.shoe.deal())
 
+    @metrics.SECTION_SECONDS.time('determine_winners')
     def determine_winners(self) -> None:
         """Determine the winners of the game and update chips."""
         dealer_total = self.dealer.total
         dealer_busted = self.dealer.busted
         dealer_blackjack = self.dealer.blackjack
         
-        # Clear previous messages to avoid duplicates
-        self.messages = []
-        
         # Add dealer's hand to messages
-        self.add_game_message(f"Dealer's hand: {', '.join(self.dealer.cards)} (Total: {dealer_total})")
+        self.add_game_message(f"Dealer's hand: {', '.join(card_names(self.dealer.cards))} (Total: {dealer_total})")
         
         for player in self.players:
             # Add player's hand to messages
-            self.add_game_message(f"{player.name}'s hand: {', '.join(player.cards)} (Total: {player.total})")
+            self.add_game_message(f"{player.name}'s hand: {', '.join(card_names(player.cards))} (Total: {player.total})")
             
             # Skip if player has no bet
             if player.bet <= 0:
                 continue
                 
-            if player.busted:
+            outcome = settle(player.total, player.busted, player.blackjack,
+                             dealer_total, dealer_busted, dealer_blackjack)
+            net = player.bet * PAYOUTS[outcome]
+            
+            if outcome == rules.BUST:
                 # Player busted, they lose their bet
                 player.lose_bet()
                 self.add_game_message(f"{player.name} busted and lost their bet!")
-            elif dealer_busted:
+            elif outcome == rules.DEALER_BUST:
                 # Dealer busted, all remaining players win 1:1
-                winnings = player.win_bet(1)  # 1:1 payout
+                winnings = player.win_bet(PAYOUTS[outcome])
                 self.add_game_message(f"Dealer busted! {player.name} wins {winnings} chips!")
-            elif player.blackjack:
-                if dealer_blackjack:
-                    # Both have blackjack, push
-                    player.chips += player.bet
-                    player.bet = 0
-                    self.add_game_message(f"Both have blackjack! {player.name} pushes.")
-                else:
-                    # Player has blackjack, dealer doesn't - 3:2 payout
-                    winnings = player.win_bet(1.5)  # 3:2 payout
-                    self.add_game_message(f"Blackjack! {player.name} wins {winnings} chips!")
-            elif dealer_blackjack:
+            elif outcome == rules.BLACKJACK_PUSH:
+                # Both have blackjack, push
+                player.chips += player.bet
+                player.bet = 0
+                self.add_game_message(f"Both have blackjack! {player.name} pushes.")
+            elif outcome == rules.BLACKJACK:
+                # Player has blackjack, dealer doesn't - 3:2 payout
+                winnings = player.win_bet(PAYOUTS[outcome])
+                self.add_game_message(f"Blackjack! {player.name} wins {winnings} chips!")
+            elif outcome == rules.DEALER_BLACKJACK:
                 # Dealer has blackjack, player doesn't
                 player.lose_bet()
                 self.add_game_message(f"Dealer has blackjack! {player.name} loses their bet!")
-            elif player.total > dealer_total:
+            elif outcome == rules.WIN:
                 # Player beats dealer - 1:1 payout
-                winnings = player.win_bet(1)
+                winnings = player.win_bet(PAYOUTS[outcome])
                 self.add_game_message(f"{player.name} wins {winnings} chips!")
-            elif player.total == dealer_total:
+            elif outcome == rules.PUSH:
                 # Push - return bet
                 player.chips += player.bet
                 player.bet = 0
@@ -166,6 +534,9 @@ class GameSession:
                 # Player loses to dealer
                 player.lose_bet()
                 self.add_game_message(f"{player.name} loses their bet!")
+            
+            if player.bot is None:
+                self.results.append((player.name, outcome, net))
         
         # Reset bets for the next round
         for player in self.players:
@@ -173,44 +544,46 @@ class GameSession:
             
         self.status = "finished"
 
+    def take_results(self) -> List[Tuple[str, str, float]]:
+        """Hand over the settled round's results, once: later calls return []."""
+        results, self.results = self.results, []
+        return results
+
     def add_game_message(self, message: str) -> None:
-        """Add a message to the game log, avoiding duplicates."""
-        # Clean the message for comparison (remove timestamp if present)
-        clean_message = message.split('] ')[-1] if '] ' in message else message
-        
-        # Skip if the same message was just added
-        if self.messages and any(clean_message in msg for msg in self.messages):
-            return
-            
-        # Add timestamp and message
-        timestamped = f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] {message}"
-        self.messages.append(timestamped)
-        
-        # Keep only the last 10 messages
-        if len(self.messages) > 10:
-            self.messages = self.messages[-10:]
+        """Add a message to the game log, once per round."""
+        self.messages.add(message)
 
+    @metrics.SECTION_SECONDS.time('get_game_state')
     def get_game_state(self) -> Dict[str, Any]:
         """Return the current game state."""
         return {
             "session_id": self.session_id,
+            "version": self.version,
             "status": self.status,
-            "messages": self.messages,
+            "messages": self.messages.recent(),
             "players": [{
                 "name": p.name,
-                "cards": p.cards,
+                "cards": card_names(p.cards),
                 "total": p.total,
                 "chips": p.chips,
                 "busted": p.busted,
                 "blackjack": p.blackjack,
+                "bot": p.bot is not None,
                 "is_current": (i == self.current_player_index and self.status == "in_progress")
             } for i, p in enumerate(self.players)],
             "dealer": {
-                "cards": self.dealer.cards,
+                "cards": card_names(self.dealer.cards),
                 "total": self.dealer.total,
                 "busted": self.dealer.busted,
                 "blackjack": self.dealer.blackjack
             },
             "current_player": self.players[self.current_player_index].name if self.players and self.status == "in_progress" else None,
             "winner": self.winner
-        }
\ No newline at end of file
+        }
+
+    @metrics.SECTION_SECONDS.time('encoded_state')
+    def encoded_state(self) -> bytes:
+        """`get_game_state()` as JSON bytes, re-encoded only when the version changed."""
+        if self._encoder is None:
+            self._encoder = StateEncoder()
+        return self._encoder.encode(self)
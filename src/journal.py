@@ -0,0 +1,370 @@
+"""Write-ahead journal that makes in-memory sessions survive a restart.
+
+Every change to a session is appended to a single journal file, either as
+the actions it took (see GameSession.actions) or, every so often, as a
+full snapshot. Appends from all threads are batched by a writer thread and
+made durable with one fsync per batch (group commit). On startup the file
+is memory-mapped and only its record headers are scanned; each session is
+rebuilt from its latest snapshot plus the actions after it the first time
+it's asked for.
+
+Record layout: length (u32), crc32 (u32), kind (u8), id length (u8), then
+the session ID and the payload. A torn or corrupt record ends the journal.
+"""
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from . import metrics
+from .gameSession import GameSession
+from .replay import ACTIONS
+from .sessionStore import InMemorySessionStore, decode_session, encode_session
+
+HEADER = struct.Struct('<IIBB')
+
+# Record kinds
+SNAPSHOT = 1  # payload: encode_session()
+EVENTS = 2    # payload: {"v": version, "t": last activity, "a": [actions]}
+REMOVE = 3    # no payload
+
+def frame(kind: int, session_id: str, payload: bytes = b'') -> bytes:
+    """Encode one journal record."""
+    key = session_id.encode()
+    body = bytes((kind, len(key))) + key + payload
+    # The checksum covers everything after itself
+    return struct.pack('<II', len(payload), zlib.crc32(body)) + body
+
+class Journal:
+    """Append-only record file with group commit.
+
+    Once the file grows past `compact_at` bytes, the writer rewrites it
+    with only the records still needed for recovery (each live session's
+    latest snapshot and what came after it).
+    """
+    def __init__(self, path: str, fsync: bool = True, compact_at: Optional[int] = 64 * 1024 * 1024):
+        self.path = path
+        self.fsync = fsync
+        self.compact_at = compact_at
+        self._file = open(path, 'ab')
+        self.size = self._file.tell()
+        self._lock = threading.Lock()
+        # Held while touching the file; taken before `_lock` when both are needed
+        self._io_lock = threading.Lock()
+        self._durable_cond = threading.Condition(self._lock)
+        self._pending: List[bytes] = []
+        self._appended = 0  # sequence number of the last appended record
+        self._durable = 0   # ... and of the last one on disk
+        # (sequence number, tie breaker, callback) to run once it's on disk
+        self._callbacks: List[Tuple[int, int, Callable[[], None]]] = []
+        self._closed = False
+        # Metrics
+        self.commits = 0
+        self.records = 0
+        self.compactions = 0
+        self._writer = threading.Thread(target=self._run, name='journal-writer', daemon=True)
+        self._writer.start()
+
+    def append(self, record: bytes, wait: bool = True) -> int:
+        """Queue a framed record; with `wait`, return once it's on disk. Returns its sequence number."""
+        with self._lock:
+            if self._closed:
+                raise ValueError("Journal is closed")
+            self._pending.append(record)
+            self._appended += 1
+            sequence = self._appended
+            self._durable_cond.notify_all()
+            if wait:
+                self._durable_cond.wait_for(lambda: self._durable >= sequence or self._closed)
+        return sequence
+
+    @property
+    def appended(self) -> int:
+        """Sequence number of the last appended record."""
+        return self._appended
+
+    def when_durable(self, sequence: int, callback: Callable[[], None]) -> None:
+        """Call `callback()` once record `sequence` is on disk: right away if it is, else from the writer."""
+        with self._lock:
+            if self._durable < sequence and not self._closed:
+                heapq.heappush(self._callbacks, (sequence, id(callback), callback))
+                return
+        callback()
+
+    def _run_callbacks(self, everything: bool = False) -> None:
+        with self._lock:
+            due = []
+            while self._callbacks and (everything or self._callbacks[0][0] <= self._durable):
+                due.append(heapq.heappop(self._callbacks)[2])
+        for callback in due:
+            callback()
+
+    def flush(self) -> None:
+        """Wait until everything appended so far is on disk."""
+        with self._lock:
+            sequence = self._appended
+            self._durable_cond.wait_for(lambda: self._durable >= sequence or self._closed)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                self._durable_cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending and self._closed:
+                    return
+                # Everything queued while the previous batch was being synced
+                # goes out in this one
+                batch, self._pending = self._pending, []
+                sequence = self._appended
+            with self._io_lock:
+                self._write(b''.join(batch))
+            with self._lock:
+                self.records += len(batch)
+                self.commits += 1
+                self._durable = sequence
+                self._durable_cond.notify_all()
+            self._run_callbacks()
+            if self.compact_at and self.size > self.compact_at:
+                self.compact()
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.size += len(data)
+
+    def compact(self) -> int:
+        """Rewrite the file keeping only the records recovery needs. Returns the new size."""
+        # Records still queued are written to the new file afterwards
+        with self._io_lock:
+            mapping, index, _ = scan(self.path)
+            tmp_path = f"{self.path}.compact"
+            with open(tmp_path, 'wb') as f:
+                for session_id, records in index.items():
+                    for kind, offset, length in records:
+                        f.write(frame(kind, session_id, mapping[offset:offset + length]))
+                f.flush()
+                os.fsync(f.fileno())
+            if mapping is not None:
+                mapping.close()
+            os.replace(tmp_path, self.path)
+            self._file.close()
+            self._file = open(self.path, 'ab')
+            self.size = self._file.tell()
+            self.compactions += 1
+            if self.compact_at:
+                # Don't keep rewriting a journal that is mostly live data
+                self.compact_at = max(self.compact_at, 2 * self.size)
+            return self.size
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._durable_cond.notify_all()
+        self._writer.join()
+        self._file.close()
+        # Nothing else will be written; don't leave anybody waiting
+        self._run_callbacks(everything=True)
+
+def scan(path: str) -> Tuple[Optional[mmap.mmap], Dict[str, List[Tuple[int, int, int]]], int]:
+    """Index a journal file without decoding any payload.
+
+    Returns the mapping, each live session's records from its latest
+    snapshot on as (kind, payload offset, payload length), and the length
+    of the valid prefix of the file.
+    """
+    index: Dict[str, List[Tuple[int, int, int]]] = {}
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return None, index, 0
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    size = len(data)
+    position = 0
+    while position + HEADER.size <= size:
+        length, crc, kind, key_length = HEADER.unpack_from(data, position)
+        start = position + HEADER.size
+        end = start + key_length + length
+        if end > size or zlib.crc32(data[position + 8:end]) != crc:
+            break  # torn write at the tail
+        session_id = data[start:start + key_length].decode()
+        payload = start + key_length
+        if kind == SNAPSHOT:
+            index[session_id] = [(kind, payload, length)]
+        elif kind == EVENTS and session_id in index:
+            index[session_id].append((kind, payload, length))
+        elif kind == REMOVE:
+            index.pop(session_id, None)
+        position = end
+    return data, index, position
+
+class JournaledSessionStore(InMemorySessionStore):
+    """In-memory sessions, journaled to disk and recovered lazily on restart.
+
+    Changes are picked up through a session listener, so whatever mutates a
+    session is journaled without going through `save`. A session's actions
+    are journaled as they happen; after `snapshot_every` such records (or
+    a change that isn't a logged action) a full snapshot is written instead.
+    """
+    def __init__(self, path: str, snapshot_every: int = 50, fsync: bool = True,
+                 compact_at: Optional[int] = 64 * 1024 * 1024, wait: bool = True):
+        super().__init__()
+        self.path = path
+        self.snapshot_every = snapshot_every
+        # Whether changes return only once they're on disk. Event loops turn
+        # this off and wait with journal.when_durable instead.
+        self.wait = wait
+        self._mapping, self._recoverable, valid = scan(path)
+        self._opened_at = time.time()
+        if os.path.exists(path) and os.path.getsize(path) > valid:
+            # Drop a torn record so new appends follow the last good one
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+        self.journal = Journal(path, fsync, compact_at)
+        # session_id -> (actions journaled, records since the last snapshot)
+        self._journaled: Dict[str, Tuple[int, int]] = {}
+        self._recover_lock = threading.Lock()
+        # Lobby summaries of tables not recovered yet, made on first request
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+
+    def _recover(self, session_id: str) -> Optional[GameSession]:
+        """Rebuild a session from its journal records (first access after a restart)."""
+        with self._recover_lock:
+            records = self._recoverable.get(session_id)
+            if records is None:
+                return super().get(session_id)
+            _, offset, length = records[0]
+            session = decode_session(self._mapping[offset:offset + length])
+            with metrics.replaying():
+                for _, offset, length in records[1:]:
+                    event = json.loads(self._mapping[offset:offset + length])
+                    for action, *args in event["a"]:
+                        ACTIONS[action](session, *args)
+                    # Message timestamps aside, replay is exact; pin what it can't redo
+                    session.version = event["v"]
+                    session.last_activity = event["t"]
+            session._last_state = session.get_game_state()
+            self._journaled[session_id] = (session.actions_logged, len(records) - 1)
+            session.add_listener(self._record)
+            with self._lock:
+                self._sessions[session_id] = session
+            # Only now, so a concurrent get() finds the session in one place or the other
+            del self._recoverable[session_id]
+            self._summaries.pop(session_id, None)
+            return session
+
+    def _record(self, session: GameSession) -> None:
+        """Session listener: journal whatever changed."""
+        session_id = session.session_id
+        logged, since_snapshot = self._journaled.get(session_id, (0, 0))
+        actions = session.actions_since(logged)
+        if actions and since_snapshot < self.snapshot_every:
+            # Status and seat counts too, to list the table without replaying it
+            payload = json.dumps({"v": session.version, "t": session.last_activity, "s": session.status,
+                                  "n": len(session.players), "b": sum(p.bot is not None for p in session.players),
+                                  "a": actions}, separators=(',', ':')).encode()
+            record = frame(EVENTS, session_id, payload)
+            since_snapshot += 1
+        else:
+            record = frame(SNAPSHOT, session_id, encode_session(session))
+            since_snapshot = 0
+        self._journaled[session_id] = (session.actions_logged, since_snapshot)
+        self.journal.append(record, wait=self.wait)
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        session = super().get(session_id)
+        if session is None:
+            if session_id in self._recoverable:
+                session = self._recover(session_id)
+            else:
+                # It may have been recovered since the first look
+                session = super().get(session_id)
+        return session
+
+    def add(self, session: GameSession) -> bool:
+        if session.session_id in self._recoverable or not super().add(session):
+            return False
+        session.add_listener(self._record)
+        self._journaled[session.session_id] = (session.actions_logged, 0)
+        self.journal.append(frame(SNAPSHOT, session.session_id, encode_session(session)), wait=self.wait)
+        return True
+
+    def remove(self, session_id: str) -> Optional[GameSession]:
+        session = self.get(session_id)
+        if session is None:
+            return None
+        super().remove(session_id)
+        session.remove_listener(self._record)
+        self._journaled.pop(session_id, None)
+        self.journal.append(frame(REMOVE, session_id), wait=self.wait)
+        return session
+
+    def version(self, session_id: str) -> Optional[int]:
+        session = self.get(session_id)
+        return session.version if session else None
+
+    def activity(self) -> List[Tuple[str, float, Optional[str]]]:
+        # Tables not recovered yet: the time of their last journaled actions,
+        # or of opening the journal if there are none after the snapshot
+        unloaded = []
+        for session_id, records in list(self._recoverable.items()):
+            last_activity, status = self._opened_at, None
+            kind, offset, length = records[-1]
+            if kind == EVENTS:
+                event = json.loads(self._mapping[offset:offset + length])
+                last_activity, status = event["t"], event.get("s")
+            unloaded.append((session_id, last_activity, status))
+        # ... and the ones in memory, listed without recovering the rest
+        return unloaded + [(session_id, session.last_activity, session.status)
+                           for session_id, session in super().items()]
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        # Tables not recovered yet: their latest snapshot, decoded but not
+        # replayed, updated from their last actions record
+        summaries = {}
+        for session_id, records in list(self._recoverable.items()):
+            summary = self._summaries.get(session_id)
+            if summary is None:
+                summary = self._summarize(session_id, records)
+            if summary is not None:
+                summaries[session_id] = summary
+        # ... and the ones in memory, which win if one was recovered meanwhile
+        for session_id, session in super().items():
+            summaries[session_id] = session.summary()
+        return list(summaries.values())
+
+    def _summarize(self, session_id: str, records: List[Tuple[int, int, int]]) -> Optional[Dict[str, Any]]:
+        _, offset, length = records[0]
+        summary = decode_session(self._mapping[offset:offset + length]).summary()
+        kind, offset, length = records[-1]
+        if kind == EVENTS:
+            event = json.loads(self._mapping[offset:offset + length])
+            if "s" not in event:
+                # Written before records carried it; only a replay can tell
+                session = self.get(session_id)
+                return session.summary() if session is not None else None
+            summary.update(status=event["s"], player_count=event["n"], bot_count=event.get("b", summary["bot_count"]))
+        self._summaries[session_id] = summary
+        return summary
+
+    def count(self) -> int:
+        # Unrecovered tables first: a recovery adds to memory before it drops the record
+        unloaded = set(list(self._recoverable))
+        return len(unloaded.union(session_id for session_id, _ in super().items()))
+
+    def items(self) -> List[Tuple[str, GameSession]]:
+        # Listing every table means rebuilding the ones not touched yet
+        for session_id in list(self._recoverable):
+            self._recover(session_id)
+        return super().items()
+
+    def clear(self) -> None:
+        for session_id, _ in self.items():
+            self.remove(session_id)
+
+    def close(self) -> None:
+        self.journal.close()
@@ -0,0 +1,100 @@
+import bisect
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from .gameSession import GameSession
+
+class LobbyCache:
+    """Cached, sorted snapshot of the lobby listing.
+
+    The snapshot is rebuilt only after a change the lobby can see (a table
+    created, joined, started, finished or expired); in between, pages are
+    sliced out of it with a binary search on the cursor and their encoded
+    JSON is reused. With a shared store, other workers' changes aren't
+    heard about, so the snapshot is also refreshed every `max_age` seconds.
+    """
+    def __init__(self, manager, max_age: Optional[float] = None):
+        self.manager = manager
+        self.max_age = max_age
+        # Bumped on every invalidation
+        self.generation = 0
+        self._fingerprints: Dict[str, Tuple[int, str]] = {}
+        # status (None for all) -> (sorted keys, summaries)
+        self._snapshot: Optional[Dict[Optional[str], Tuple[List[Tuple[float, str]], List[Dict[str, Any]]]]] = None
+        self._built_at = 0.0
+        self._pages: Dict[Tuple[Optional[str], Optional[str], int], bytes] = {}
+        self._lock = threading.Lock()
+        manager.add_listener(self.session_changed)
+
+    def session_changed(self, session: GameSession) -> None:
+        """Invalidate the snapshot if the change shows up in the lobby."""
+        fingerprint = (len(session.players), session.status)
+        with self._lock:
+            if self._fingerprints.get(session.session_id) != fingerprint:
+                self._fingerprints[session.session_id] = fingerprint
+                self._invalidate()
+
+    def session_removed(self, session_id: str) -> None:
+        with self._lock:
+            self._fingerprints.pop(session_id, None)
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        self.generation += 1
+        self._snapshot = None
+        self._pages.clear()
+
+    def _build(self) -> None:
+        # Summaries, not sessions: stores that load lazily needn't load every table
+        entries = sorted(
+            ((datetime.fromisoformat(summary['created_at']).timestamp(), summary['session_id']), summary)
+            for summary in self.manager.summaries()
+        )
+        # One sorted list of keys and summaries for the whole lobby, and one per status
+        snapshot = {None: ([], [])}
+        for key, summary in entries:
+            for status in (None, summary['status']):
+                keys, summaries = snapshot.setdefault(status, ([], []))
+                keys.append(key)
+                summaries.append(summary)
+        self._snapshot = snapshot
+        self._built_at = time.monotonic()
+
+    # Upper bound on distinct pages kept encoded between invalidations
+    MAX_CACHED_PAGES = 256
+
+    def page(self, status: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50) -> bytes:
+        """Encoded JSON for one page of the lobby, oldest tables first."""
+        with self._lock:
+            if self.max_age is not None and time.monotonic() - self._built_at > self.max_age:
+                self._invalidate()
+            if self._snapshot is None:
+                self._build()
+
+            cache_key = (status, cursor, limit)
+            encoded = self._pages.get(cache_key)
+            if encoded is None:
+                keys, summaries = self._snapshot.get(status, ([], []))
+                start = bisect.bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+                items = summaries[start:start + limit]
+                next_cursor = None
+                if start + limit < len(summaries):
+                    next_cursor = encode_cursor(keys[start + limit - 1])
+                encoded = json.dumps({
+                    'sessions': items,
+                    'next_cursor': next_cursor,
+                    'total': len(summaries)
+                }).encode()
+                if len(self._pages) < self.MAX_CACHED_PAGES:
+                    self._pages[cache_key] = encoded
+            return encoded
+
+def encode_cursor(key: Tuple[float, str]) -> str:
+    """Opaque pagination cursor: the sort key of the last table on the page."""
+    return f"{key[0]!r}:{key[1]}"
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    created, _, session_id = cursor.partition(':')
+    return float(created), session_id
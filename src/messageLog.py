@@ -0,0 +1,108 @@
+import time
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+class Message(NamedTuple):
+    seq: int    # position in the session's log, for paging
+    round: int  # round the message belongs to
+    time: int   # Unix time in seconds
+    text: str
+
+    def format(self) -> str:
+        """Text as shown at the table, e.g. "[12:34:56] alice wins 10 chips!"."""
+        return f"[{time.strftime('%H:%M:%S', time.gmtime(self.time))}] {self.text}"
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "round": self.round, "time": self.time, "text": self.text}
+
+class MessageLog:
+    """A table's most recent messages, oldest first.
+
+    Records are kept raw and only formatted when the state is serialized.
+    The same text is logged once per round; later rounds may repeat it.
+    """
+    DEFAULT_LENGTH = 50
+    # Messages of the current round shown in the game state
+    RECENT = 10
+
+    __slots__ = ('records', 'round', 'next_seq', '_seen')
+
+    def __init__(self, maxlen: int = DEFAULT_LENGTH):
+        self.records: deque = deque(maxlen=max(maxlen, self.RECENT))
+        self.round = 0
+        self.next_seq = 1
+        # (round, text) of every record still in the log
+        self._seen: Set[Tuple[int, str]] = set()
+
+    @property
+    def maxlen(self) -> int:
+        return self.records.maxlen
+
+    def add(self, text: str, timestamp: Optional[float] = None) -> bool:
+        """Log a message; returns False if it was already logged this round."""
+        key = (self.round, text)
+        if key in self._seen:
+            return False
+        if len(self.records) == self.records.maxlen:
+            evicted = self.records[0]
+            self._seen.discard((evicted.round, evicted.text))
+        self.records.append(Message(self.next_seq, self.round, int(timestamp or time.time()), text))
+        self._seen.add(key)
+        self.next_seq += 1
+        return True
+
+    def new_round(self) -> None:
+        """Start a new round; the game state only shows messages from the current one."""
+        self.round += 1
+
+    def recent(self) -> List[str]:
+        """Formatted messages of the current round, at most RECENT of them."""
+        messages = []
+        for record in reversed(self.records):
+            if record.round != self.round or len(messages) == self.RECENT:
+                break
+            messages.append(record.format())
+        messages.reverse()
+        return messages
+
+    def page(self, after: Optional[int] = None, before: Optional[int] = None,
+             limit: int = 20) -> Tuple[List[Message], bool]:
+        """Up to `limit` records, oldest first, and whether there are more.
+
+        With `after`, the records following that seq (for catching up);
+        otherwise the newest records, or those preceding `before`.
+        """
+        if after is not None:
+            selected = [record for record in self.records if record.seq > after]
+            return selected[:limit], len(selected) > limit
+        selected = [record for record in self.records if before is None or record.seq < before]
+        return selected[-limit:] if limit else [], len(selected) > limit
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max": self.maxlen,
+            "round": self.round,
+            "seq": self.next_seq,
+            "items": [list(record) for record in self.records]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'MessageLog':
+        """Rebuild a log from `to_dict()` output, or from a plain list of formatted messages."""
+        if isinstance(data, list):
+            # Older sessions kept the formatted strings of the current round
+            log = cls()
+            for message in data:
+                log.add(message.split('] ', 1)[-1])
+            return log
+        log = cls(data["max"])
+        log.round = data["round"]
+        log.next_seq = data["seq"]
+        for item in data["items"]:
+            record = Message(*item)
+            log.records.append(record)
+            log._seen.add((record.round, record.text))
+        return log
@@ -0,0 +1,254 @@
+"""In-process metrics in the Prometheus text format, and a slow-request profiler.
+
+Metrics are off unless BLACKJACK_METRICS=1. While off, every counter and
+timer returns after a single attribute check and /metrics answers 404.
+Game event counters are `live`: they skip actions re-executed inside
+`replaying()` (journal recovery, replay.py), which already happened once,
+and hold back those made inside `held_back()` (tentative batches) until
+`count_held()` says they stand.
+"""
+import bisect
+import cProfile
+import contextlib
+import functools
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Request and section durations, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Set while logged actions are re-executed, per thread
+_replay = threading.local()
+
+@contextlib.contextmanager
+def replaying() -> Iterator[None]:
+    """Keep live counters still while re-executing actions that were already counted."""
+    previous = getattr(_replay, 'active', False)
+    _replay.active = True
+    try:
+        yield
+    finally:
+        _replay.active = previous
+
+@contextlib.contextmanager
+def held_back() -> Iterator[List[Tuple['Counter', Tuple, float]]]:
+    """Collect live counter increments instead of counting them; pass the list to count_held() to keep them."""
+    previous = getattr(_replay, 'held', None)
+    held = _replay.held = []
+    try:
+        yield held
+    finally:
+        _replay.held = previous
+
+def count_held(held: List[Tuple['Counter', Tuple, float]]) -> None:
+    """Count the increments collected by held_back()."""
+    for counter, labels, amount in held:
+        counter.inc(*labels, amount=amount)
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, registry: 'Registry', name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, live: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.live = live
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        if not self.registry.enabled:
+            return
+        if self.live and getattr(_replay, 'active', False):
+            return
+        held = getattr(_replay, 'held', None)
+        if self.live and held is not None:
+            held.append((self, labels, amount))
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in values]
+
+class Gauge(Metric):
+    """Value read from a callback when scraped."""
+    kind = 'gauge'
+
+    def __init__(self, registry: 'Registry', name: str, help: str, callback: Callable[[], float]):
+        super().__init__(registry, name, help)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {self.callback()}"]
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (the last one is +Inf), sum]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, *labels: str) -> Callable:
+        """Decorator recording how long each call takes."""
+        def decorate(func):
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                if not self.registry.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *labels)
+            return timed
+        return decorate
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        lines = []
+        names = self.label_names + ('le',)
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), live: bool = False) -> Counter:
+        return self._register(Counter(self, name, help, labels, live=live))
+
+    def gauge(self, name: str, help: str, callback: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(self, name, help, callback))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help, labels, buckets=buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry(enabled=os.environ.get('BLACKJACK_METRICS') == '1')
+
+# Game events, not counted again when replayed
+HITS = REGISTRY.counter('blackjack_hits_total', 'Cards taken by players', live=True)
+STANDS = REGISTRY.counter('blackjack_stands_total', 'Players standing', live=True)
+BUSTS = REGISTRY.counter('blackjack_busts_total', 'Players going over 21', live=True)
+ROUNDS = REGISTRY.counter('blackjack_rounds_total', 'Rounds dealt', live=True)
+
+# Session expiry (see expiry.py)
+SESSIONS_EXPIRED = REGISTRY.counter('blackjack_sessions_expired_total', 'Tables removed by the sweeper',
+                                    labels=('reason',))
+SWEEPS = REGISTRY.counter('blackjack_sweeps_total', 'Passes of the session sweeper')
+
+# Bot seats (see bots.py)
+BOT_ACTIONS = REGISTRY.counter('blackjack_bot_actions_total', 'Moves made by bot seats')
+BOT_LAG_SECONDS = REGISTRY.histogram('blackjack_bot_lag_seconds', 'How late bot moves ran after their think time')
+
+# Time spent in the game's hot paths
+SECTION_SECONDS = REGISTRY.histogram('blackjack_section_seconds', 'Time spent in GameSession sections',
+                                     labels=('section',))
+
+# HTTP requests, labelled with the route pattern rather than the URL
+REQUEST_SECONDS = REGISTRY.histogram('blackjack_request_seconds', 'Request handling time',
+                                     labels=('route', 'method', 'status'))
+
+class SlowRequestProfiler:
+    """Profile a sample of requests and keep cProfile stats for the slow ones.
+
+    A `sample_rate` share of requests runs under cProfile; those that take
+    longer than `threshold` seconds have their stats dumped to `directory`
+    as <timestamp>-<route>.prof, for `python -m pstats` or snakeviz.
+    """
+    def __init__(self, directory: str, threshold: float = 0.25, sample_rate: float = 0.01):
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.dumped = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self) -> Optional[cProfile.Profile]:
+        if random.random() >= self.sample_rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already running (one per process on newer Pythons)
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, elapsed: float, name: str) -> Optional[str]:
+        """Stop profiling; returns the dump's path if the request was slow."""
+        profile.disable()
+        if elapsed < self.threshold:
+            return None
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')
+        path = os.path.join(self.directory, f"{time.time():.3f}-{safe_name}.prof")
+        profile.dump_stats(path)
+        self.dumped += 1
+        return path
@@ -0,0 +1,167 @@
+"""Vectorized Monte Carlo odds for the hint feature and analytics.
+
+Thousands of possible orderings of the unseen cards are laid out as one
+NumPy matrix of card values (a row per trial), and every trial's dealer
+hand and player decisions advance together, one column draw at a time.
+Only as many cards are drawn per trial as its hands can possibly use.
+NumPy is optional: without it `available()` is False and the hint
+endpoint answers 503.
+"""
+from typing import Any, Dict, Iterable, Optional
+from .rules import (
+    BLACKJACK, BLACKJACK_PUSH, BUST, DEALER_BLACKJACK, DEALER_BUST, DEALER_STANDS_ON,
+    LOSE, PAYOUTS, PUSH, WIN
+)
+from .simulator import basic_strategy
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only needed for hints
+    np = None
+
+DEFAULT_TRIALS = 20000
+MAX_TRIALS = 200000
+
+def available() -> bool:
+    """Whether NumPy is installed."""
+    return np is not None
+
+def _hit_table():
+    """basic_strategy as a lookup: [soft][total][upcard] -> hit?"""
+    table = np.zeros((2, 32, 12), dtype=bool)
+    for soft in (0, 1):
+        for total in range(32):
+            for upcard in range(2, 12):
+                table[soft, total, upcard] = total < 21 and basic_strategy(total, soft, upcard)
+    return table
+
+_HIT_TABLE = None
+
+def _add(total, soft, card, mask):
+    """Add `card` to the hands selected by `mask` (array counterpart of cards.add_card).
+
+    A hand is at most 20 before a hit, so one ace demotion always suffices.
+    """
+    card = np.where(mask, card, 0)
+    total = total + card
+    soft = soft + (card == 11)
+    demote = (total > 21) & (soft > 0)
+    return total - 10 * demote, soft - demote
+
+def deal_matrix(values: Iterable[int], trials: int, rng=None, cards: Optional[int] = None):
+    """The first `cards` (default: all) of `trials` independent shuffles of the unseen card values, one per row.
+
+    Cards are drawn without replacement from per-row counts of each value,
+    so nothing the size of the whole shoe is made per trial.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    row = np.asarray(list(values), dtype=np.int8)
+    if not len(row):
+        raise ValueError("No unseen cards to draw from")
+    cards = len(row) if cards is None else min(cards, len(row))
+    faces, counts = np.unique(row, return_counts=True)
+    left = np.tile(counts.astype(np.int16), (trials, 1))
+    rows = np.arange(trials)
+    deck = np.empty((trials, cards), dtype=np.int8)
+    for column in range(cards):
+        # A uniform pick among the len(row) - column cards each row has left
+        pick = rng.integers(0, len(row) - column, size=trials)
+        face = (left.cumsum(axis=1) <= pick[:, None]).sum(axis=1)
+        deck[:, column] = faces[face]
+        left[rows, face] -= 1
+    return deck
+
+def cards_needed(player_total: int, soft_aces: int, upcard: int) -> int:
+    """Most cards one trial can draw: every card adds at least 1 to a hard total."""
+    # The player hits below 21 and the dealer below 17, each at least once
+    player = max(1, 21 - (player_total - 10 * soft_aces)) if player_total < 21 else 0
+    dealer = max(1, DEALER_STANDS_ON - (1 if upcard == 11 else upcard))
+    return player + dealer
+
+def _draw(deck, rows, position):
+    # Stacked trials can run a short shoe dry; keep redrawing the last card
+    return deck[rows, np.minimum(position, deck.shape[1] - 1)].astype(np.int16)
+
+def play_dealer(deck, upcard: int, position):
+    """Play out every row's dealer hand: hole card, then hit below 17.
+
+    `position` is each row's next unused column. Returns the dealer totals.
+    """
+    trials = deck.shape[0]
+    rows = np.arange(trials)
+    total = np.full(trials, upcard, dtype=np.int16)
+    soft = np.full(trials, int(upcard == 11), dtype=np.int16)
+    position = position.copy()
+    hitting = np.ones(trials, dtype=bool)
+    while hitting.any():
+        total, soft = _add(total, soft, _draw(deck, rows, position), hitting)
+        position += hitting
+        hitting = total < DEALER_STANDS_ON
+    return total
+
+def play_player(deck, total: int, soft_aces: int, upcard: int):
+    """Take one card, then keep following basic strategy.
+
+    Returns the player totals and each row's next unused column.
+    """
+    global _HIT_TABLE
+    if _HIT_TABLE is None:
+        _HIT_TABLE = _hit_table()
+    trials = deck.shape[0]
+    rows = np.arange(trials)
+    totals = np.full(trials, total, dtype=np.int16)
+    soft = np.full(trials, soft_aces, dtype=np.int16)
+    position = np.zeros(trials, dtype=np.int64)
+    hitting = np.ones(trials, dtype=bool)
+    while hitting.any():
+        totals, soft = _add(totals, soft, _draw(deck, rows, position), hitting)
+        position += hitting
+        hitting = _HIT_TABLE[np.minimum(soft, 1), np.minimum(totals, 31), upcard]
+    return totals, position
+
+def settle_many(player, dealer):
+    """Net payout per trial, in bets (array counterpart of rules.settle)."""
+    player_21 = player == 21
+    dealer_21 = dealer == 21
+    return np.select(
+        [player > 21, dealer > 21, player_21 & dealer_21, player_21, dealer_21,
+         player > dealer, player == dealer],
+        [PAYOUTS[BUST], PAYOUTS[DEALER_BUST], PAYOUTS[BLACKJACK_PUSH], PAYOUTS[BLACKJACK],
+         PAYOUTS[DEALER_BLACKJACK], PAYOUTS[WIN], PAYOUTS[PUSH]],
+        PAYOUTS[LOSE]
+    )
+
+def dealer_distribution(dealer) -> Dict[str, float]:
+    """Share of trials ending on each dealer total from 17 to 21, and busted."""
+    counts = np.bincount(np.minimum(dealer, 22), minlength=23)
+    trials = len(dealer)
+    distribution = {str(total): float(counts[total]) / trials for total in range(DEALER_STANDS_ON, 22)}
+    distribution['bust'] = float(counts[22]) / trials
+    return distribution
+
+def estimate(player_total: int, soft_aces: int, upcard: int, unseen: Iterable[int],
+             trials: int = DEFAULT_TRIALS, rng=None) -> Dict[str, Any]:
+    """Dealer outcome odds and the EV of standing vs. hitting.
+
+    `upcard` is the dealer's visible card value (2-11) and `unseen` the values
+    of every card the player can't see, the dealer's hole card included. Both
+    choices are scored on the same shuffles so their difference is less noisy.
+    """
+    deck = deal_matrix(unseen, trials, rng, cards_needed(player_total, soft_aces, upcard))
+    start = np.zeros(trials, dtype=np.int64)
+
+    dealer_if_stand = play_dealer(deck, upcard, start)
+    stand = settle_many(np.full(trials, player_total, dtype=np.int16), dealer_if_stand)
+
+    hit = None
+    if player_total < 21:
+        player, position = play_player(deck, player_total, soft_aces, upcard)
+        hit = float(settle_many(player, play_dealer(deck, upcard, position)).mean())
+
+    stand_ev = float(stand.mean())
+    return {
+        'trials': trials,
+        'dealer_totals': dealer_distribution(dealer_if_stand),
+        'ev': {'stand': stand_ev, 'hit': hit},
+        'advice': 'hit' if hit is not None and hit > stand_ev else 'stand'
+    }
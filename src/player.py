@@ -1,45 +1,40 @@
 import random
+from .cards import add_card, hand_value, parse_card
 
-def draw():
-    """Draw a random card from a standard deck."""
-    values = ['A', 'K', 'Q', 'J'] + [str(i) for i in range(2, 11)]
-    suits = ['H', 'D', 'C', 'S']  # Hearts, Diamonds, Clubs, Spades
-    return f"{random.choice(values)}{random.choice(suits)}"
+def draw(rng=None):
+    """Draw a random card from a standard deck, from `rng` if given."""
+    return (rng or random).randrange(52)
 
 def calculate(cards):
     """Calculate the total value of a hand of cards."""
-    value = 0
-    aces = 0
-    
-    for card in cards:
-        # Extract the value part (remove suit)
-        val = card[:-1] if len(card) > 1 else card
-        
-        if val in ['K', 'Q', 'J']:
-            value += 10
-        elif val == 'A':
-            value += 11
-            aces += 1
-        else:
-            value += int(val)
-    
-    # Handle aces
-    while value > 21 and aces > 0:
-        value -= 10
-        aces -= 1
-    
-    return value
+    return hand_value(cards)[0]
+
+def normalize_name(name):
+    """The key players are looked up by: names are unique regardless of case."""
+    return name.casefold()
 
 class Player:
-    def __init__(self, name, chips = 100):
+    __slots__ = ('name', 'cards', 'total', 'soft_aces', 'busted', 'blackjack', 'chips', 'bet', 'bot')
+
+    def __init__(self, name, chips = 100, bot = None):
         self.name = name
         self.cards = []
         self.total = 0
+        self.soft_aces = 0  # aces in the hand still counted as 11
         self.busted = False
         self.blackjack = False
         self.chips = chips
         self.bet = 0
+        self.bot = bot  # strategy name for seats played by the server (see bots.py)
     
+    def reset_hand(self):
+        """Clear the hand for a new round, reusing the card list."""
+        self.cards.clear()
+        self.total = 0
+        self.soft_aces = 0
+        self.busted = False
+        self.blackjack = False
+
     def place_bet(self, amount):
         """Place a bet, deducting the amount from chips."""
         if amount > self.chips:
@@ -73,9 +68,10 @@ class Player:
         
         if card is None:
             card = draw()
+        card = parse_card(card)
             
         self.cards.append(card)
-        self.total = calculate(self.cards)
+        self.total, self.soft_aces = add_card(self.total, self.soft_aces, card)
         
         if self.total > 21:
             self.busted = True
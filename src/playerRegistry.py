@@ -0,0 +1,280 @@
+"""Player accounts: chip balances and statistics that outlive a table.
+
+Records are kept in memory, indexed by normalized name, with the
+leaderboard as a list of sort keys kept in order with bisect, so a settled
+hand moves one entry and top-N and rank queries never sort. With a
+database path, records are loaded from SQLite on start-up and changes are
+written back by a background thread in batches, as increments (balances
+too), so several workers can share one database. Every write stamps its
+rows with the next sequence number, and the same thread reads back the rows
+changed since the last one it saw (other workers' as well as its own), so
+each worker's records and leaderboard follow every worker's hands within
+about a refresh interval; a balance is read from the database when its
+player sits down.
+"""
+import bisect
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from . import rules
+from .player import normalize_name
+
+# Outcomes counted as wins and pushes; everything else loses
+WINS = (rules.WIN, rules.DEALER_BUST, rules.BLACKJACK)
+PUSHES = (rules.PUSH, rules.BLACKJACK_PUSH)
+BLACKJACKS = (rules.BLACKJACK, rules.BLACKJACK_PUSH)
+
+# Counters, in the order of the table's columns; the balance is kept as a
+# running total of its changes too
+COUNTERS = ('hands', 'wins', 'pushes', 'losses', 'blackjacks', 'net', 'chips')
+
+class PlayerStats:
+    """One player's balance and totals over every hand they finished."""
+    __slots__ = ('name', 'hands', 'wins', 'pushes', 'losses', 'blackjacks', 'net', 'chips')
+
+    def __init__(self, name: str, chips: float = 0, hands: int = 0, wins: int = 0, pushes: int = 0,
+                 losses: int = 0, blackjacks: int = 0, net: float = 0):
+        self.name = name
+        self.chips = chips
+        self.hands = hands
+        self.wins = wins
+        self.pushes = pushes
+        self.losses = losses
+        self.blackjacks = blackjacks
+        self.net = net  # chips won minus chips lost
+
+    def rank_key(self) -> Tuple[float, str]:
+        """Leaderboard order: most chips won first, ties by name."""
+        return (-self.net, normalize_name(self.name))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'chips': self.chips,
+            'hands': self.hands,
+            'wins': self.wins,
+            'pushes': self.pushes,
+            'losses': self.losses,
+            'blackjacks': self.blackjacks,
+            'net': self.net
+        }
+
+class PlayerRegistry:
+    """Player records by name, with an incrementally sorted leaderboard.
+
+    Register `session_saved` as a save listener (SessionManager.add_save_listener)
+    to record every round once it's settled and stored. Without `path`
+    nothing is persisted.
+    """
+    def __init__(self, path: Optional[str] = None, starting_chips: float = 100,
+                 flush_interval: float = 1.0, refresh_interval: float = 1.0):
+        self.path = path
+        self.starting_chips = starting_chips
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self._players: Dict[str, PlayerStats] = {}
+        # Sorted rank keys of every player in `_players`
+        self._ranking: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        # normalized name -> [name, *counter increments], not yet written
+        self._pending: Dict[str, List[Any]] = {}
+        self._pending_cond = threading.Condition(self._lock)
+        # Held while using the connection; a batch is taken off `_pending` and
+        # committed under it, so balance reads never see it in neither place
+        self._io_lock = threading.Lock()
+        self._closing = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._closed = False
+        # Highest row sequence number read from the database
+        self._seq = 0
+        # Metrics
+        self.batches = 0
+        self.rows_written = 0
+        if path is not None:
+            self._open()
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS players ("
+                "name_key TEXT PRIMARY KEY, name TEXT NOT NULL, hands INTEGER NOT NULL, "
+                "wins INTEGER NOT NULL, pushes INTEGER NOT NULL, losses INTEGER NOT NULL, "
+                "blackjacks INTEGER NOT NULL, net REAL NOT NULL, chips REAL NOT NULL, "
+                "updated_at REAL NOT NULL, seq INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS players_seq ON players (seq)")
+        rows = self._conn.execute(
+            "SELECT seq, name_key, name, hands, wins, pushes, losses, blackjacks, net, chips FROM players"
+        ).fetchall()
+        for seq, key, name, hands, wins, pushes, losses, blackjacks, net, chips in rows:
+            self._players[key] = PlayerStats(name, chips, hands, wins, pushes, losses, blackjacks, net)
+            self._seq = max(self._seq, seq)
+        # The only full sort; from here on the ranking is kept in order
+        self._ranking = sorted(stats.rank_key() for stats in self._players.values() if stats.hands)
+        self._thread = threading.Thread(target=self._run, name='player-registry-writer', daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        """Players on the leaderboard: those who finished a hand."""
+        return len(self._ranking)
+
+    def get(self, name: str) -> Optional[PlayerStats]:
+        return self._players.get(normalize_name(name))
+
+    def balance(self, name: str) -> Optional[float]:
+        """`name`'s chips, as of the database when there is one; None for a new player."""
+        key = normalize_name(name)
+        if self._conn is None:
+            stats = self._players.get(key)
+            return stats.chips if stats is not None else None
+        with self._io_lock:
+            row = self._conn.execute("SELECT chips FROM players WHERE name_key = ?", (key,)).fetchone()
+            with self._lock:
+                pending = self._pending.get(key)
+                if row is None and pending is None:
+                    return None
+                return (row[0] if row else 0) + (pending[-1] if pending else 0)
+
+    def stack(self, balance: Optional[float]) -> float:
+        """Chips a player with `balance` sits down with: it, or the starting stack if they're new or broke."""
+        return balance if balance is not None and balance > 0 else self.starting_chips
+
+    def buy_in(self, name: str, balance: Optional[float]) -> float:
+        """Record `name` taking a seat with `stack(balance)`, topping a new or broke player up.
+
+        Call it once the seat is taken, with the balance read before, so a
+        refused join records nothing.
+        """
+        chips = self.stack(balance)
+        if chips != balance:
+            self._add(name, (0, 0, 0, 0, 0, 0, chips - (balance or 0)))
+        return chips
+
+    def record(self, name: str, outcome: str, net: float) -> PlayerStats:
+        """Count one settled hand: its outcome and the chips won (or lost, negative)."""
+        won, pushed = outcome in WINS, outcome in PUSHES
+        return self._add(name, (1, int(won), int(pushed), int(not won and not pushed),
+                                int(outcome in BLACKJACKS), net, net))
+
+    def _add(self, name: str, increments: Tuple[float, ...]) -> PlayerStats:
+        """Apply increments of COUNTERS to `name`'s record, keep the ranking in order and queue the write."""
+        key = normalize_name(name)
+        with self._lock:
+            stats = self._players.get(key) or PlayerStats(name)
+            stats = self._set(key, name, [getattr(stats, counter) + increment
+                                          for counter, increment in zip(COUNTERS, increments)])
+            if self._conn is not None and not self._closed:
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._pending[key] = [name, *increments]
+                else:
+                    pending[0] = name
+                    for i, increment in enumerate(increments, 1):
+                        pending[i] += increment
+                self._pending_cond.notify()
+        return stats
+
+    def _set(self, key: str, name: str, values) -> PlayerStats:
+        """Give `key`'s record `name` and the COUNTERS `values`, moving its leaderboard entry. Holds `_lock`."""
+        stats = self._players.get(key)
+        if stats is None:
+            stats = self._players[key] = PlayerStats(name)
+        elif stats.hands:
+            del self._ranking[bisect.bisect_left(self._ranking, stats.rank_key())]
+        stats.name = name
+        for counter, value in zip(COUNTERS, values):
+            setattr(stats, counter, value)
+        if stats.hands:
+            bisect.insort(self._ranking, stats.rank_key())
+        return stats
+
+    def session_saved(self, session) -> None:
+        """Record the round a session just settled, once the session store has it."""
+        for name, outcome, net in session.take_results():
+            self.record(name, outcome, net)
+
+    def top(self, limit: int = 10) -> List[PlayerStats]:
+        """The `limit` players who won the most chips."""
+        with self._lock:
+            return [self._players[key] for _, key in self._ranking[:limit]]
+
+    def rank(self, name: str) -> Optional[int]:
+        """`name`'s place on the leaderboard, from 1, or None if they haven't played."""
+        with self._lock:
+            stats = self._players.get(normalize_name(name))
+            if stats is None or not stats.hands:
+                return None
+            return bisect.bisect_left(self._ranking, stats.rank_key()) + 1
+
+    def refresh(self) -> None:
+        """Read back the rows written since the last refresh, by any worker sharing the database."""
+        if self._conn is None or self._closed:
+            return
+        with self._io_lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """Set records changed in the database to their stored totals plus what's still pending. Holds `_io_lock`."""
+        rows = self._conn.execute(
+            "SELECT seq, name_key, name, hands, wins, pushes, losses, blackjacks, net, chips "
+            "FROM players WHERE seq > ? ORDER BY seq", (self._seq,)
+        ).fetchall()
+        with self._lock:
+            for seq, key, name, *values in rows:
+                pending = self._pending.get(key)
+                if pending is not None:
+                    name = pending[0]
+                    values = [value + increment for value, increment in zip(values, pending[1:])]
+                self._set(key, name, values)
+                self._seq = seq
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                pending = self._pending_cond.wait_for(lambda: self._pending or self._closed,
+                                                      self.refresh_interval)
+            if pending:
+                # Let a batch build up, unless we're closing
+                self._closing.wait(self.flush_interval)
+            with self._io_lock:
+                with self._lock:
+                    batch, self._pending = self._pending, {}
+                    closed = self._closed
+                if batch:
+                    self._write(batch)
+                if not closed:
+                    self._refresh()
+            if closed:
+                return
+
+    def _write(self, batch: Dict[str, List[Any]]) -> None:
+        now = time.time()
+        with self._conn:
+            # Writers take turns, so sequence numbers rise in commit order
+            self._conn.executemany(
+                "INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                "(SELECT COALESCE(MAX(seq), 0) + 1 FROM players)) "
+                "ON CONFLICT(name_key) DO UPDATE SET name = excluded.name, "
+                + ", ".join(f"{column} = {column} + excluded.{column}" for column in COUNTERS)
+                + ", updated_at = excluded.updated_at, seq = excluded.seq",
+                [(key, *row, now) for key, row in batch.items()]
+            )
+        self.batches += 1
+        self.rows_written += len(batch)
+
+    def close(self) -> None:
+        """Write out everything recorded so far and stop the writer."""
+        if self._thread is None:
+            return
+        with self._lock:
+            self._closed = True
+            self._pending_cond.notify_all()
+        self._closing.set()
+        self._thread.join()
+        self._thread = None
+        self._conn.close()
@@ -0,0 +1,117 @@
+"""Replay recorded session action logs.
+
+A log (`GameSession.replay_log()`, or GET /api/sessions/<id>/log) holds the
+session's settings, including its shoe seed, the state it starts from if
+it doesn't start at the beginning, and every action that succeeded since,
+so replaying it rebuilds the exact same game. Used to turn bug
+reports into regression tests, and to mass-produce realistic traffic:
+
+    python -m black_jack.src.replay session-log.json --repeat 100
+    python -m black_jack.src.replay --generate 50 --rounds 20 --out logs.jsonl
+"""
+import argparse
+import json
+import random
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from . import metrics
+from .gameSession import GameSession
+from .simulator import STRATEGIES, play_session_round
+
+# How to re-execute each logged action
+ACTIONS = {
+    "join": GameSession.add_player,
+    "leave": GameSession.remove_player,
+    "start": GameSession.start_game,
+    "reset": GameSession.reset_round,
+    "hit": GameSession.hit,
+    "stand": GameSession.stand,
+    # Decisions sent together: every one of them succeeded when logged
+    "batch": lambda session, actions: session.play_actions(actions)[1] is None
+}
+
+class ReplayError(Exception):
+    """Raised when a log doesn't replay the way it was recorded."""
+
+def replay(log: Dict[str, Any]) -> GameSession:
+    """Rebuild a session from its log."""
+    if log.get("checkpoint"):
+        session = GameSession.from_dict(log["checkpoint"])
+    else:
+        session = GameSession(**log["session"])
+    with metrics.replaying():
+        for number, (action, *args) in enumerate(log["actions"]):
+            if action not in ACTIONS:
+                raise ReplayError(f"Unknown action {action!r} at step {number}")
+            result = ACTIONS[action](session, *args)
+            # Only successful actions are logged, so each must succeed again
+            if result is None or result is False:
+                raise ReplayError(f"Step {number} ({action} {args}) failed on replay")
+    if "version" in log and session.version != log["version"]:
+        raise ReplayError(f"Replay ended on version {session.version}, log says {log['version']}")
+    return session
+
+# Messages are timestamped with the wall clock, which a replay can't reproduce
+_TIMESTAMP = re.compile(r'^\[\d\d:\d\d:\d\d\] ')
+
+def comparable_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Game state with message timestamps removed."""
+    return {**state, "messages": [_TIMESTAMP.sub('', message) for message in state["messages"]]}
+
+def generate(players: int = 3, rounds: int = 10, seed: Optional[int] = None,
+             strategy: str = 'basic', decks: int = 1) -> Dict[str, Any]:
+    """Record a synthetic session: `players` join and play `rounds` rounds with a simulator strategy."""
+    session = GameSession("replay", "p0", max_players=max(players, 1), decks=decks, seed=seed)
+    for seat in range(players):
+        session.add_player(f"p{seat}")
+    strategies = [STRATEGIES[strategy]] * players
+    for _ in range(rounds):
+        play_session_round(session, strategies)
+    return session.replay_log()
+
+def read_logs(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Load logs from .json files (one log) or .jsonl files (one log per line)."""
+    logs = []
+    for path in paths:
+        with open(path) as f:
+            if path.endswith('.jsonl'):
+                logs.extend(json.loads(line) for line in f if line.strip())
+            else:
+                logs.append(json.load(f))
+    return logs
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Replay session action logs, or generate new ones.")
+    parser.add_argument('logs', nargs='*', help='.json or .jsonl log files to replay')
+    parser.add_argument('--repeat', type=int, default=1, help='replay every log this many times')
+    parser.add_argument('--generate', type=int, metavar='N', help='record N synthetic sessions instead')
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--out', help='where to write generated logs (.jsonl)')
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        seeds = random.Random(args.seed)
+        logs = [generate(args.players, args.rounds, seeds.getrandbits(64)) for _ in range(args.generate)]
+        lines = '\n'.join(json.dumps(log, separators=(',', ':')) for log in logs) + '\n'
+        if args.out:
+            with open(args.out, 'w') as f:
+                f.write(lines)
+        else:
+            print(lines, end='')
+        return
+
+    logs = read_logs(args.logs)
+    actions = sum(len(log["actions"]) for log in logs) * args.repeat
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for log in logs:
+            replay(log)
+    elapsed = time.perf_counter() - started
+    print(f"Replayed {len(logs) * args.repeat} sessions, {actions:,} actions in {elapsed:.2f}s "
+          f"({actions / elapsed if elapsed else 0:,.0f} actions/s)")
+
+if __name__ == '__main__':
+    main()
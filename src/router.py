@@ -0,0 +1,477 @@
+"""Front router spreading tables over several game server nodes.
+
+Session IDs map to nodes on a consistent-hash ring. The router picks the ID
+of every new table (with the servers' own scheme) so that it knows where the
+table lives, forwards every /api/sessions/<id>/... request to that node, and
+builds the lobby by merging all nodes' listings. Adding or removing a node
+only moves the tables whose ring segment changed hands; they are handed
+over through the nodes' /internal routes, enabled by giving router and
+nodes the same BLACKJACK_INTERNAL_TOKEN. Player records are only right if
+the nodes share one BLACKJACK_PLAYER_DB (spawned nodes are given one), so
+any node can answer for them; /metrics merges every node's, labelled by node.
+
+    python -m black_jack.src.router --spawn 4 --port 5000
+    python -m black_jack.src.router --nodes http://10.0.0.1:5000,http://10.0.0.2:5000
+"""
+import argparse
+import bisect
+import hashlib
+import heapq
+import http.client
+import json
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+from flask import Flask, Response, jsonify, request
+from .lobby import encode_cursor
+from .player import normalize_name
+from .sessionManager import generate_session_id
+
+class HashRing:
+    """Consistent hashing of session IDs onto nodes.
+
+    Each node owns `replicas` points on the ring; a key belongs to the first
+    point at or after its hash. Adding or removing a node only moves the
+    keys on the segments its points cover, about 1/n of them.
+    """
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 128):
+        self.replicas = replicas
+        self.nodes: List[str] = []
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+    def add(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("No nodes on the ring")
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[index]
+
+class NodeClient:
+    """HTTP client for one node, keeping a connection open per thread."""
+    # Methods that can be sent again when the connection drops before the answer
+    RETRYABLE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, base_url: str, token: Optional[str] = None, timeout: float = 60):
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.token = token
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, fresh: bool = False) -> http.client.HTTPConnection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or fresh:
+            if connection is not None:
+                connection.close()
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port,
+                                                                             timeout=self.timeout)
+        return connection
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        headers = dict(headers or {})
+        if self.token and path.startswith('/internal/'):
+            headers['X-Internal-Token'] = self.token
+        # Anything else may have been acted on by the time the connection drops,
+        # so it goes out once, on a new connection the node can't have closed
+        retryable = method in self.RETRYABLE_METHODS or 'Idempotency-Key' in headers
+        for attempt in (0, 1):
+            connection = self._connection(fresh=attempt > 0 or not retryable)
+            sent = False
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                sent = True
+                response = connection.getresponse()
+                return response.status, dict(response.getheaders()), response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # The node closed an idle keep-alive connection; retry once on a new one
+                if attempt or (sent and not retryable):
+                    raise
+        raise AssertionError("unreachable")
+
+    def stream(self, path: str, headers: Dict[str, str]) -> http.client.HTTPResponse:
+        """Open a streaming request (server-sent events) on its own connection."""
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=None)
+        connection.request('GET', path, headers=headers)
+        return connection.getresponse()
+
+    def json(self, method: str, path: str, data: Any = None) -> Tuple[int, Any]:
+        body = json.dumps(data).encode() if data is not None else None
+        status, _, content = self.request(method, path, body, {'Content-Type': 'application/json'})
+        return status, json.loads(content) if content else None
+
+# Request headers passed on to the nodes, and response headers passed back
+FORWARDED_REQUEST_HEADERS = ('Content-Type', 'If-None-Match', 'Last-Event-ID', 'Accept', 'Accept-Encoding',
+                             'Idempotency-Key')
+FORWARDED_RESPONSE_HEADERS = ('Content-Type', 'Content-Encoding', 'Vary', 'ETag', 'Cache-Control',
+                              'X-Accel-Buffering', 'Idempotent-Replayed')
+
+class Router:
+    def __init__(self, nodes: Iterable[str], token: Optional[str] = None, replicas: int = 128,
+                 fan_out_workers: int = 16):
+        self.token = token
+        self.replicas = replicas
+        self.ring = HashRing(nodes, replicas)
+        self.clients: Dict[str, NodeClient] = {}
+        self._fan_out = ThreadPoolExecutor(fan_out_workers, thread_name_prefix='router-lobby')
+        # Sessions being handed over to another node during a rebalance
+        self._moving: set = set()
+        self._moved = threading.Condition()
+        # Tables a rebalance couldn't move, left on their old node until the next one
+        self._pinned: Dict[str, str] = {}
+        # Tables that could be neither moved nor put back, as exported
+        self.stranded: Dict[str, Any] = {}
+        self._rebalance_lock = threading.Lock()
+
+    def client(self, node: str) -> NodeClient:
+        client = self.clients.get(node)
+        if client is None:
+            client = self.clients[node] = NodeClient(node, self.token)
+        return client
+
+    def node_for(self, session_id: str) -> str:
+        return self._pinned.get(session_id) or self.ring.node_for(session_id)
+
+    def forward(self, session_id: str, method: str, path: str, body: Optional[bytes],
+                headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request to the session's node, following it if it's being moved."""
+        node = self.node_for(session_id)
+        status, response_headers, content = self.client(node).request(method, path, body, headers)
+        if status == 404 and (session_id in self._moving or self.node_for(session_id) != node):
+            self.wait_for_move(session_id)
+            node = self.node_for(session_id)
+            status, response_headers, content = self.client(node).request(method, path, body, headers)
+        return status, response_headers, content
+
+    def wait_for_move(self, session_id: str, timeout: float = 10) -> None:
+        with self._moved:
+            self._moved.wait_for(lambda: session_id not in self._moving, timeout)
+
+    def create(self, data: Dict[str, Any]) -> Tuple[int, Any]:
+        """Create a table on the node owning a freshly generated ID."""
+        while True:
+            session_id = generate_session_id()
+            status, result = self.client(self.node_for(session_id)).json(
+                'POST', '/api/sessions', {**data, 'session_id': session_id})
+            if status != 409:
+                return status, result
+
+    def lobby(self, status: Optional[str], cursor: Optional[str], limit: int) -> bytes:
+        """One lobby page over all nodes, in the same order and format as a single node's."""
+        query = urlencode({key: value for key, value in
+                           (('status', status), ('cursor', cursor), ('limit', limit)) if value is not None})
+        pages = list(self._fan_out.map(
+            lambda node: self.client(node).json('GET', f'/api/sessions?{query}'), self.ring.nodes))
+        for page_status, page in pages:
+            if page_status != 200:
+                raise ValueError((page or {}).get('error', 'Lobby unavailable'))
+
+        def sort_key(summary):
+            return datetime.fromisoformat(summary['created_at']).timestamp(), summary['session_id']
+
+        merged = heapq.merge(*(page['sessions'] for _, page in pages), key=sort_key)
+        sessions = [summary for summary, _ in zip(merged, range(limit + 1))]
+        more = len(sessions) > limit or any(page['next_cursor'] for _, page in pages)
+        sessions = sessions[:limit]
+        return json.dumps({
+            'sessions': sessions,
+            'next_cursor': encode_cursor(sort_key(sessions[-1])) if more and sessions else None,
+            'total': sum(page['total'] for _, page in pages)
+        }).encode()
+
+    def metrics(self) -> Optional[bytes]:
+        """Every node's /metrics as one exposition, each sample labelled with its node.
+
+        Returns None if every node answered without metrics (turned off).
+        """
+        def scrape(node):
+            try:
+                return self.client(node).request('GET', '/metrics')
+            except OSError:
+                return None, {}, b''
+
+        nodes = list(self.ring.nodes)
+        results = list(self._fan_out.map(scrape, nodes))
+        if all(status not in (200, None) for status, _, _ in results):
+            return None
+        # Family name -> its HELP and TYPE lines, then every node's samples
+        families: Dict[str, List[str]] = {}
+        samples: Dict[str, List[str]] = {}
+        up = []
+        for node, (status, _, content) in zip(nodes, results):
+            up.append(f'blackjack_node_up{{node="{node}"}} {int(status == 200)}')
+            if status != 200:
+                continue
+            family = None
+            for line in content.decode().splitlines():
+                if line.startswith('# '):
+                    family = line.split()[2]
+                    headers = families.setdefault(family, [])
+                    if line not in headers:
+                        headers.append(line)
+                    samples.setdefault(family, [])
+                elif line and family is not None:
+                    name, brace, rest = line.partition('{')
+                    if brace:
+                        samples[family].append(f'{name}{{node="{node}",{rest}')
+                    else:
+                        name, _, value = line.partition(' ')
+                        samples[family].append(f'{name}{{node="{node}"}} {value}')
+        lines = []
+        for family, headers in families.items():
+            lines += headers + samples[family]
+        lines += ['# HELP blackjack_node_up Whether the router could scrape the node',
+                  '# TYPE blackjack_node_up gauge'] + up
+        return ('\n'.join(lines) + '\n').encode()
+
+    def add_node(self, node: str) -> int:
+        """Put a node on the ring and move its tables over. Returns how many moved."""
+        return self._rebalance(self.ring.nodes + [node])
+
+    def remove_node(self, node: str) -> int:
+        """Move a node's tables to the others and take it off the ring."""
+        return self._rebalance([n for n in self.ring.nodes if n != node])
+
+    def _rebalance(self, nodes: List[str]) -> int:
+        with self._rebalance_lock:
+            old_ring, new_ring = self.ring, HashRing(nodes, self.replicas)
+            moves = []
+            for node in old_ring.nodes:
+                try:
+                    status, result = self.client(node).json('GET', '/internal/sessions')
+                except OSError:
+                    if node in nodes:
+                        raise
+                    continue  # a node being taken off that is down has nothing to hand over
+                if status != 200:
+                    raise RuntimeError(f"Can't list {node}'s sessions, is BLACKJACK_INTERNAL_TOKEN set?")
+                moves.extend((session_id, node, new_ring.node_for(session_id))
+                             for session_id in result['session_ids']
+                             if new_ring.node_for(session_id) != node)
+
+            # New requests go to the new owners, which wait for the table to arrive.
+            # Pinned tables are listed on the node they're on, so they're in `moves`
+            # if they have somewhere else to go now.
+            with self._moved:
+                self._moving.update(session_id for session_id, _, _ in moves)
+                self._pinned = {}
+                self.ring = new_ring
+            moved = 0
+            try:
+                for session_id, source, target in moves:
+                    moved += self._move(session_id, source, target)
+                    with self._moved:
+                        self._moving.discard(session_id)
+                        self._moved.notify_all()
+            finally:
+                with self._moved:
+                    self._moving.difference_update(session_id for session_id, _, _ in moves)
+                    self._moved.notify_all()
+            return moved
+
+    def _move(self, session_id: str, source: str, target: str) -> bool:
+        """Hand one table over; if the target won't take it, put it back on the source and keep it there."""
+        try:
+            status, data = self.client(source).json('POST', f'/internal/sessions/{session_id}/evict')
+        except OSError:
+            status = None
+        if status != 200:
+            # Gone in the meantime (expired), or the source is down and still has it
+            if status is None:
+                self._pinned[session_id] = source
+            return False
+        try:
+            status, _ = self.client(target).json('POST', '/internal/sessions', data)
+        except OSError:
+            status = None
+        if status == 201:
+            return True
+        try:
+            status, _ = self.client(source).json('POST', '/internal/sessions', data)
+        except OSError:
+            status = None
+        if status == 201:
+            self._pinned[session_id] = source
+        else:
+            self.stranded[session_id] = data
+        return False
+
+def create_app(router: Router) -> Flask:
+    app = Flask(__name__)
+    app.config['router'] = router
+
+    def target_path():
+        return request.full_path if request.query_string else request.path
+
+    def forwarded_headers():
+        return {name: request.headers[name] for name in FORWARDED_REQUEST_HEADERS if name in request.headers}
+
+    def respond(status, headers, content):
+        response = Response(content, status=status)
+        for name in FORWARDED_RESPONSE_HEADERS:
+            if name in headers:
+                response.headers[name] = headers[name]
+        return response
+
+    @app.route('/api/sessions', methods=['GET'])
+    def list_sessions():
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        try:
+            body = router.lobby(request.args.get('status') or None, request.args.get('cursor') or None, limit)
+        except ValueError as error:
+            return jsonify({'error': str(error)}), 400
+        etag = f"lobby-{zlib.crc32(body):08x}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
+
+    @app.route('/api/sessions', methods=['POST'])
+    def create_session():
+        status, result = router.create(request.get_json(silent=True) or {})
+        return jsonify(result), status
+
+    @app.route('/api/sessions/<session_id>/events', methods=['GET'])
+    def session_events(session_id):
+        # Server-sent events are streamed through as they come
+        upstream = router.client(router.node_for(session_id)).stream(target_path(), forwarded_headers())
+
+        def relay():
+            try:
+                while True:
+                    chunk = upstream.read1(65536)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                upstream.close()
+
+        headers = {name: upstream.getheader(name) for name in FORWARDED_RESPONSE_HEADERS
+                   if upstream.getheader(name) is not None}
+        return Response(relay(), status=upstream.status, headers=headers)
+
+    @app.route('/api/sessions/<session_id>/<path:action>', methods=['GET', 'POST'])
+    def session_route(session_id, action):
+        return respond(*router.forward(session_id, request.method, target_path(), request.get_data() or None,
+                                       forwarded_headers()))
+
+    @app.route('/api/leaderboard', methods=['GET'])
+    @app.route('/api/players/<player_name>', methods=['GET'])
+    def players_route(player_name=None):
+        # Every node reads the shared player database, so any can answer;
+        # spread the names over them
+        node = router.ring.node_for(normalize_name(player_name) if player_name else '')
+        return respond(*router.client(node).request('GET', target_path(), headers=forwarded_headers()))
+
+    @app.route('/metrics')
+    def metrics_route():
+        body = router.metrics()
+        if body is None:
+            return jsonify({'error': 'Metrics are disabled on the nodes, set BLACKJACK_METRICS=1'}), 404
+        return Response(body, mimetype='text/plain; version=0.0.4')
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def page(path):
+        # The page and static files are the same on every node. Other API
+        # routes have no single node to answer them; the hand-over routes stay private.
+        if path.split('/')[0] in ('api', 'internal'):
+            return jsonify({'error': 'Not found'}), 404
+        client = router.client(router.ring.nodes[0])
+        return respond(*client.request('GET', target_path(), headers=forwarded_headers()))
+
+    return app
+
+def spawn_nodes(ports: Iterable[int], token: str, host: str = '127.0.0.1',
+                env: Optional[Dict[str, str]] = None) -> List[subprocess.Popen]:
+    """Start a game server on each port, as child processes, with `env` added to their environment."""
+    package_parent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {**os.environ, **(env or {}), 'BLACKJACK_INTERNAL_TOKEN': token,
+           'PYTHONPATH': os.pathsep.join(filter(None, [package_parent, os.environ.get('PYTHONPATH')]))}
+    return [subprocess.Popen(
+        [sys.executable, '-c',
+         f"from black_jack.src.app import app; app.run(host={host!r}, port={port}, threaded=True)"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    ) for port in ports]
+
+def wait_until_ready(nodes: Iterable[str], timeout: float = 30) -> None:
+    """Block until every node answers the lobby route."""
+    deadline = time.monotonic() + timeout
+    for node in nodes:
+        client = NodeClient(node, timeout=1)
+        while True:
+            try:
+                if client.request('GET', '/api/sessions?limit=1')[0] == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{node} didn't start")
+            time.sleep(0.1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', help='comma-separated node base URLs')
+    parser.add_argument('--spawn', type=int, default=0, help='start this many local nodes')
+    parser.add_argument('--node-port', type=int, default=5101, help='first port of spawned nodes')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+
+    token = os.environ.get('BLACKJACK_INTERNAL_TOKEN') or secrets.token_hex(16)
+    nodes = args.nodes.split(',') if args.nodes else []
+    children = []
+    if args.spawn:
+        ports = range(args.node_port, args.node_port + args.spawn)
+        # The nodes must share player records: in a temporary file unless BLACKJACK_PLAYER_DB names one
+        player_db = os.environ.get('BLACKJACK_PLAYER_DB') or os.path.join(tempfile.mkdtemp(), 'players.db')
+        children = spawn_nodes(ports, token, env={'BLACKJACK_PLAYER_DB': player_db})
+        nodes += [f"http://127.0.0.1:{port}" for port in ports]
+    if not nodes:
+        parser.error('give --nodes or --spawn')
+    try:
+        wait_until_ready(nodes)
+        create_app(Router(nodes, token)).run(host=args.host, port=args.port, threaded=True)
+    finally:
+        for child in children:
+            child.terminate()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# House rules shared by GameSession and the headless simulator.
+
+# The dealer draws until reaching this total (hits on 16, stands on 17)
+DEALER_STANDS_ON = 17
+
+# Outcomes of a hand against the dealer
+BUST = 'bust'
+DEALER_BUST = 'dealer_bust'
+BLACKJACK_PUSH = 'blackjack_push'
+BLACKJACK = 'blackjack'
+DEALER_BLACKJACK = 'dealer_blackjack'
+WIN = 'win'
+PUSH = 'push'
+LOSE = 'lose'
+
+# Net payout of each outcome as a multiple of the bet
+PAYOUTS = {
+    BUST: -1,
+    DEALER_BUST: 1,
+    BLACKJACK_PUSH: 0,
+    BLACKJACK: 1.5,  # 3:2
+    DEALER_BLACKJACK: -1,
+    WIN: 1,
+    PUSH: 0,
+    LOSE: -1
+}
+
+def settle(player_total, player_busted, player_blackjack, dealer_total, dealer_busted, dealer_blackjack):
+    """Outcome of a player's hand against the dealer's.
+
+    A hand of 21 counts as blackjack here, however many cards it took, and a
+    busted dealer pays every standing hand 1:1 before blackjacks are checked.
+    """
+    if player_busted:
+        return BUST
+    if dealer_busted:
+        return DEALER_BUST
+    if player_blackjack:
+        return BLACKJACK_PUSH if dealer_blackjack else BLACKJACK
+    if dealer_blackjack:
+        return DEALER_BLACKJACK
+    if player_total > dealer_total:
+        return WIN
+    if player_total == dealer_total:
+        return PUSH
+    return LOSE
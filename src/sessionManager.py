@@ -0,0 +1,145 @@
+import random
+import re
+import string
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .gameSession import GameSession
+from .sessionStore import InMemorySessionStore, SessionStore
+
+# Session IDs handed out by the servers, and the ones accepted from a router
+SESSION_ID_LENGTH = 8
+SESSION_ID_PATTERN = re.compile(r'[A-Za-z0-9]{1,64}')
+
+def generate_session_id() -> str:
+    """Random session ID."""
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=SESSION_ID_LENGTH))
+
+class SessionManager:
+    """Thread-safe access to the active game sessions.
+
+    Each session carries its own lock, so actions on different tables run
+    in parallel while actions on the same table are serialized. With a
+    shared store the lock only covers this process; writes from other
+    workers are caught by the store's version check instead.
+    """
+    # How often to re-check a shared store's version while waiting, in seconds
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.store = store or InMemorySessionStore()
+        self._listeners: List[Callable[[GameSession], None]] = []
+        # Called once a change is stored, so never for one a shared store rejected
+        self._save_listeners: List[Callable[[GameSession], None]] = []
+        self._load_listeners: List[Callable[[GameSession], None]] = []
+
+    @property
+    def shared(self) -> bool:
+        return self.store.shared
+
+    def add_listener(self, listener: Callable[[GameSession], None]) -> None:
+        """Register a change callback on every session handed out by the manager."""
+        self._listeners.append(listener)
+
+    def add_save_listener(self, listener: Callable[[GameSession], None]) -> None:
+        """Register a callback invoked with a session once a change to it has been stored."""
+        self._save_listeners.append(listener)
+
+    def add_load_listener(self, listener: Callable[[GameSession], None]) -> None:
+        """Register a callback invoked with a session the store loaded (or recovered) before it's handed out."""
+        self._load_listeners.append(listener)
+
+    def _saved(self, session: GameSession) -> None:
+        for listener in self._save_listeners:
+            listener(session)
+
+    def _attach(self, session: GameSession) -> bool:
+        """Add the change listeners; True if this session object didn't have them yet."""
+        attached = False
+        for listener in self._listeners:
+            attached = session.add_listener(listener) or attached
+        return attached
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        """Look up a session by ID."""
+        session = self.store.get(session_id)
+        if session is not None and self._attach(session):
+            # Handed out for the first time: loaded from a shared store or recovered
+            for listener in self._load_listeners:
+                listener(session)
+        return session
+
+    def add(self, session: GameSession) -> bool:
+        """Register a new session. Returns False if the ID is already taken."""
+        self._attach(session)
+        if not self.store.add(session):
+            return False
+        # A new table is a change too, as far as listeners are concerned
+        for listener in self._listeners:
+            listener(session)
+        self._saved(session)
+        return True
+
+    def remove(self, session_id: str) -> Optional[GameSession]:
+        """Unregister a session and return it."""
+        return self.store.remove(session_id)
+
+    def version(self, session_id: str) -> Optional[int]:
+        """Current version of a session, None if it doesn't exist."""
+        return self.store.version(session_id)
+
+    def items(self) -> List[Tuple[str, GameSession]]:
+        """Snapshot of (session_id, session) pairs, safe to iterate while others mutate."""
+        return self.store.items()
+
+    def activity(self) -> List[Tuple[str, float, Optional[str]]]:
+        """(session ID, last activity, status) of every session, without loading any (see SessionStore.activity)."""
+        return self.store.activity()
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Lobby summary of every session, without loading any where the store can (see SessionStore.summaries)."""
+        return self.store.summaries()
+
+    def clear(self) -> None:
+        """Drop every session."""
+        self.store.clear()
+
+    @contextmanager
+    def locked(self, session_id: str) -> Iterator[Optional[GameSession]]:
+        """Hold a session's lock for the duration of the block. Yields None if it doesn't exist.
+
+        Changes made in the block are written back to shared stores on exit,
+        raising ConcurrentModificationError if another worker got there first;
+        save listeners only hear about changes that were written.
+        """
+        session = self.get(session_id)
+        if session is None:
+            yield None
+            return
+        with session.lock:
+            loaded_version = session.version
+            yield session
+            if session.version != loaded_version:
+                self.store.save(session, loaded_version)
+                self._saved(session)
+
+    def wait_for_change(self, session_id: str, since: int, timeout: float) -> bool:
+        """Block until the session's version differs from `since` (or it's gone) or the timeout expires."""
+        if not self.shared:
+            session = self.get(session_id)
+            return session is None or session.wait_for_change(since, timeout)
+
+        # Other workers can't wake us up, poll the store's version column
+        deadline = time.monotonic() + timeout
+        while self.store.version(session_id) == since:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.POLL_INTERVAL, remaining))
+        return True
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.store.version(session_id) is not None
+
+    def __len__(self) -> int:
+        return self.store.count()
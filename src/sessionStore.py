@@ -0,0 +1,275 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from .gameSession import GameSession
+
+try:
+    from redis.exceptions import WatchError
+except ImportError:  # redis is optional, only needed for RedisSessionStore
+    class WatchError(Exception):
+        """Raised by a Redis pipeline when a watched key changed before EXEC."""
+
+class ConcurrentModificationError(Exception):
+    """Raised when a session was saved by someone else since it was loaded."""
+
+def encode_session(session: GameSession) -> bytes:
+    """Serialize a session to compressed compact JSON."""
+    return zlib.compress(json.dumps(session.to_dict(), separators=(',', ':')).encode())
+
+def decode_session(data: bytes) -> GameSession:
+    """Inverse of `encode_session`."""
+    return GameSession.from_dict(json.loads(zlib.decompress(data)))
+
+class SessionStore:
+    """Where game sessions live.
+
+    `shared` stores are visible to several worker processes: every `get`
+    returns a fresh copy, and changes must be written back with `save`,
+    which fails with ConcurrentModificationError if another worker saved a
+    newer version in between (optimistic concurrency on `version`).
+    """
+    shared = False
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        raise NotImplementedError
+
+    def add(self, session: GameSession) -> bool:
+        """Store a new session. Returns False if the ID is already taken."""
+        raise NotImplementedError
+
+    def save(self, session: GameSession, expected_version: int) -> None:
+        """Write back a modified session that was loaded at `expected_version`."""
+        raise NotImplementedError
+
+    def remove(self, session_id: str) -> Optional[GameSession]:
+        raise NotImplementedError
+
+    def version(self, session_id: str) -> Optional[int]:
+        """Current version of a session without loading it, None if missing."""
+        raise NotImplementedError
+
+    def items(self) -> List[Tuple[str, GameSession]]:
+        raise NotImplementedError
+
+    def activity(self) -> List[Tuple[str, float, Optional[str]]]:
+        """(session ID, last activity, status) of every session.
+
+        Stores that load sessions lazily list the ones not loaded yet with
+        status None and a last activity that may be later than the real one.
+        """
+        return [(session_id, session.last_activity, session.status) for session_id, session in self.items()]
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Lobby summary (GameSession.summary()) of every session."""
+        return [session.summary() for _, session in self.items()]
+
+    def count(self) -> int:
+        """Number of sessions."""
+        return len(self.items())
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+class InMemorySessionStore(SessionStore):
+    """Sessions kept as live objects in this process."""
+    def __init__(self):
+        self._sessions: Dict[str, GameSession] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def add(self, session: GameSession) -> bool:
+        with self._lock:
+            if session.session_id in self._sessions:
+                return False
+            self._sessions[session.session_id] = session
+            return True
+
+    def save(self, session: GameSession, expected_version: int) -> None:
+        # Sessions are mutated in place, nothing to write back
+        pass
+
+    def remove(self, session_id: str) -> Optional[GameSession]:
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def version(self, session_id: str) -> Optional[int]:
+        session = self.get(session_id)
+        return session.version if session else None
+
+    def items(self) -> List[Tuple[str, GameSession]]:
+        with self._lock:
+            return list(self._sessions.items())
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite database in WAL mode, shared by processes on one host."""
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, version INTEGER NOT NULL, "
+                "data BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads, keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return decode_session(row[0]) if row else None
+
+    def add(self, session: GameSession) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?)",
+                (session.session_id, session.version, encode_session(session), time.time())
+            )
+            return cursor.rowcount == 1
+
+    def save(self, session: GameSession, expected_version: int) -> None:
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE sessions SET version = ?, data = ?, updated_at = ? "
+                "WHERE session_id = ? AND version = ?",
+                (session.version, encode_session(session), time.time(),
+                 session.session_id, expected_version)
+            )
+            if cursor.rowcount != 1:
+                raise ConcurrentModificationError(session.session_id)
+
+    def remove(self, session_id: str) -> Optional[GameSession]:
+        session = self.get(session_id)
+        with self._connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return session
+
+    def version(self, session_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def items(self) -> List[Tuple[str, GameSession]]:
+        rows = self._connection().execute("SELECT session_id, data FROM sessions").fetchall()
+        return [(session_id, decode_session(data)) for session_id, data in rows]
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM sessions")
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis (or anything speaking its protocol), shared across hosts.
+
+    Each session is a hash with `version` and `data` fields; the set of
+    session IDs is kept alongside so listing doesn't need KEYS.
+    """
+    shared = True
+
+    def __init__(self, client, prefix: str = 'blackjack:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisSessionStore':
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}session:{session_id}"
+
+    @property
+    def _index_key(self) -> str:
+        return f"{self.prefix}sessions"
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        data = self.client.hget(self._key(session_id), 'data')
+        return decode_session(data) if data is not None else None
+
+    def add(self, session: GameSession) -> bool:
+        return self._write(session, None)
+
+    def save(self, session: GameSession, expected_version: int) -> None:
+        if not self._write(session, expected_version):
+            raise ConcurrentModificationError(session.session_id)
+
+    def _write(self, session: GameSession, expected_version: Optional[int]) -> bool:
+        """Compare-and-set the session hash. A None expected version means it must not exist yet."""
+        key = self._key(session.session_id)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.hget(key, 'version')
+                if (current is None) != (expected_version is None):
+                    return False
+                if current is not None and int(current) != expected_version:
+                    return False
+                pipe.multi()
+                pipe.hset(key, mapping={'version': session.version, 'data': encode_session(session)})
+                pipe.sadd(self._index_key, session.session_id)
+                pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    def remove(self, session_id: str) -> Optional[GameSession]:
+        session = self.get(session_id)
+        self.client.delete(self._key(session_id))
+        self.client.srem(self._index_key, session_id)
+        return session
+
+    def version(self, session_id: str) -> Optional[int]:
+        version = self.client.hget(self._key(session_id), 'version')
+        return int(version) if version is not None else None
+
+    def items(self) -> List[Tuple[str, GameSession]]:
+        items = []
+        for session_id in self.client.smembers(self._index_key):
+            session_id = session_id.decode() if isinstance(session_id, bytes) else session_id
+            session = self.get(session_id)
+            if session is not None:
+                items.append((session_id, session))
+        return items
+
+    def clear(self) -> None:
+        for session_id, _ in self.items():
+            self.remove(session_id)
+
+def create_store(url: Optional[str]) -> SessionStore:
+    """Build a store from a URL: memory (default), journal:///path/to/file,
+    sqlite:///path/to.db or redis://host:port/db."""
+    if not url or url == 'memory':
+        return InMemorySessionStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisSessionStore.from_url(url)
+    if url.startswith('journal:///'):
+        from .journal import JournaledSessionStore
+        return JournaledSessionStore(url[len('journal:///'):])
+    raise ValueError(f"Unsupported session store: {url}")
@@ -0,0 +1,112 @@
+import random
+from typing import Any, Dict, Optional
+from .cards import FULL_DECK
+
+class Shoe:
+    """One or more decks dealt in order through an index pointer.
+
+    The shoe is only reshuffled between rounds, once the cut card (placed at
+    `penetration` of the way through) has been reached. If a long round runs
+    the shoe dry, the discards from earlier rounds are shuffled back in
+    behind the cards still on the table.
+    """
+    MAX_DECKS = 8
+
+    __slots__ = ('decks', 'penetration', 'seed', 'rng', 'cards', 'cut', 'position', 'round_start', 'shuffles')
+
+    def __init__(self, decks: int = 1, penetration: float = 0.75, rng: Optional[random.Random] = None,
+                 seed: Optional[int] = None):
+        if not 1 <= decks <= self.MAX_DECKS:
+            raise ValueError(f"A shoe holds 1 to {self.MAX_DECKS} decks")
+        if not 0 < penetration <= 1:
+            raise ValueError("Penetration must be between 0 and 1")
+        self.decks = decks
+        self.penetration = penetration
+        self.seed = seed
+        self.rng = rng
+        self.cards = bytearray(FULL_DECK * decks)
+        self.cut = int(len(self.cards) * penetration)
+        self.position = 0  # next card to deal
+        self.round_start = 0  # first card dealt in the current round
+        self.shuffles = 0
+        self.shuffle()
+
+    def shuffle(self) -> None:
+        """Shuffle the whole shoe and start dealing from the top."""
+        self._shuffle(self.cards)
+        self.position = 0
+        self.round_start = 0
+        self.shuffles += 1
+
+    def _shuffle(self, cards: bytearray) -> None:
+        if self.seed is not None:
+            if self.rng is None:
+                # Made on demand (it's ~2.5KB), so shoes restored from a
+                # snapshot don't carry one until they shuffle again
+                self.rng = random.Random()
+            self.rng.seed(f"{self.seed}:{self.shuffles}")
+        (self.rng or random).shuffle(cards)
+
+    @property
+    def needs_shuffle(self) -> bool:
+        """Whether the cut card has come out."""
+        return self.position >= self.cut
+
+    def start_round(self) -> None:
+        """Reshuffle if the cut card was reached, and mark the start of a round."""
+        if self.needs_shuffle:
+            self.shuffle()
+        self.round_start = self.position
+
+    def deal(self) -> int:
+        """Deal the next card."""
+        if self.position >= len(self.cards):
+            self._reshuffle_discards()
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+    def _reshuffle_discards(self) -> None:
+        in_play = self.cards[self.round_start:self.position]
+        discards = self.cards[:self.round_start]
+        if not discards:
+            # A single round used up the whole shoe; start over
+            self.shuffle()
+            return
+        self._shuffle(discards)
+        self.cards = in_play + discards
+        self.round_start = 0
+        self.position = len(in_play)
+        self.shuffles += 1
+
+    @property
+    def remaining(self) -> int:
+        return len(self.cards) - self.position
+
+    def __len__(self) -> int:
+        return self.remaining
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "decks": self.decks,
+            "pen": self.penetration,
+            "cards": self.cards.hex(),
+            "pos": self.position,
+            "start": self.round_start,
+            "shuffles": self.shuffles,
+            "seed": self.seed
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], rng: Optional[random.Random] = None) -> 'Shoe':
+        shoe = cls.__new__(cls)
+        shoe.decks = data["decks"]
+        shoe.penetration = data["pen"]
+        shoe.seed = data.get("seed")
+        shoe.rng = rng
+        shoe.cards = bytearray.fromhex(data["cards"])
+        shoe.cut = int(len(shoe.cards) * shoe.penetration)
+        shoe.position = data["pos"]
+        shoe.round_start = data["start"]
+        shoe.shuffles = data["shuffles"]
+        return shoe
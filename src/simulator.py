@@ -0,0 +1,220 @@
+"""Headless blackjack simulator for house edge and bankroll analysis.
+
+Plays rounds with this table's rules (see rules.py) straight off a Shoe,
+without GameSession bookkeeping, and shards the work over a process pool.
+
+    python -m black_jack.src.simulator --rounds 1000000 --strategy basic --workers 4
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+from .cards import CARD_VALUES, add_card
+from .gameSession import GameSession
+from .rules import DEALER_STANDS_ON, PAYOUTS, settle
+from .shoe import Shoe
+
+# A strategy decides whether to hit from (total, soft_aces, dealer upcard value)
+Strategy = Callable[[int, int, int], bool]
+
+def always_stand(total: int, soft_aces: int, upcard: int) -> bool:
+    return False
+
+def dealer_mimic(total: int, soft_aces: int, upcard: int) -> bool:
+    """Play like the dealer: hit below 17."""
+    return total < DEALER_STANDS_ON
+
+def basic_strategy(total: int, soft_aces: int, upcard: int) -> bool:
+    """Textbook hit/stand basic strategy (no doubling or splitting at this table)."""
+    if soft_aces:
+        if total <= 17:
+            return True
+        return total == 18 and upcard >= 9
+    if total <= 11:
+        return True
+    if total == 12:
+        return not 4 <= upcard <= 6
+    if total <= 16:
+        return upcard >= 7
+    return False
+
+STRATEGIES: Dict[str, Strategy] = {
+    'basic': basic_strategy,
+    'stand': always_stand,
+    'mimic': dealer_mimic
+}
+
+class Stats:
+    """Running totals of net payouts, in bets, without keeping every hand."""
+    def __init__(self):
+        self.rounds = 0
+        self.hands = 0
+        self.net = 0.0
+        self.net_squared = 0.0
+        self.outcomes = Counter()
+
+    def add(self, outcome: str) -> None:
+        payout = PAYOUTS[outcome]
+        self.hands += 1
+        self.net += payout
+        self.net_squared += payout * payout
+        self.outcomes[outcome] += 1
+
+    def merge(self, other: 'Stats') -> 'Stats':
+        self.rounds += other.rounds
+        self.hands += other.hands
+        self.net += other.net
+        self.net_squared += other.net_squared
+        self.outcomes.update(other.outcomes)
+        return self
+
+    @property
+    def ev(self) -> float:
+        """Expected net payout per hand, as a fraction of the bet."""
+        return self.net / self.hands if self.hands else 0.0
+
+    @property
+    def variance(self) -> float:
+        if not self.hands:
+            return 0.0
+        return self.net_squared / self.hands - self.ev ** 2
+
+def play_round(shoe: Shoe, strategies: List[Strategy]) -> List[str]:
+    """Play one round for each seat and return their outcomes.
+
+    Mirrors GameSession card for card: two passes of one card per seat then
+    one to the dealer, seats act in order (21 ends a turn), then the dealer
+    draws to 17 even if everyone busted.
+    """
+    shoe.start_round()
+    deal = shoe.deal
+    seats = len(strategies)
+    totals = [0] * seats
+    softs = [0] * seats
+    dealer_total = dealer_soft = 0
+    upcard = 0
+
+    for _ in range(2):
+        for seat in range(seats):
+            totals[seat], softs[seat] = add_card(totals[seat], softs[seat], deal())
+        card = deal()
+        upcard = CARD_VALUES[card]  # the dealer's second card is the one shown
+        dealer_total, dealer_soft = add_card(dealer_total, dealer_soft, card)
+
+    for seat, strategy in enumerate(strategies):
+        total, soft = totals[seat], softs[seat]
+        while total < 21 and strategy(total, soft, upcard):
+            total, soft = add_card(total, soft, deal())
+        totals[seat] = total
+
+    while dealer_total < DEALER_STANDS_ON:
+        dealer_total, dealer_soft = add_card(dealer_total, dealer_soft, deal())
+
+    return [settle(total, total > 21, total == 21, dealer_total, dealer_total > 21, dealer_total == 21)
+            for total in totals]
+
+def play_session_round(session: GameSession, strategies: List[Strategy]) -> List[str]:
+    """Play one round through a real GameSession (slow, used to check `play_round`)."""
+    session.reset_round()
+    upcard = CARD_VALUES[session.dealer.cards[1]]
+    for player, strategy in zip(session.players, strategies):
+        while session.is_players_turn(player.name):
+            if player.total < 21 and strategy(player.total, player.soft_aces, upcard):
+                session.hit(player.name)
+            else:
+                session.stand(player.name)
+    dealer = session.dealer
+    return [settle(p.total, p.busted, p.blackjack, dealer.total, dealer.busted, dealer.blackjack)
+            for p in session.players]
+
+def run_batch(rounds: int, strategy: str = 'basic', seats: int = 1, decks: int = 6,
+              penetration: float = 0.75, seed: Optional[int] = None) -> Stats:
+    """Play `rounds` rounds on one shoe with its own seeded RNG."""
+    shoe = Shoe(decks, penetration, random.Random(seed))
+    strategies = [STRATEGIES[strategy]] * seats
+    stats = Stats()
+    add = stats.add
+    for _ in range(rounds):
+        for outcome in play_round(shoe, strategies):
+            add(outcome)
+    stats.rounds = rounds
+    return stats
+
+def _run_shard(kwargs: Dict) -> Stats:
+    return run_batch(**kwargs)
+
+def simulate(rounds: int, strategy: str = 'basic', seats: int = 1, decks: int = 6,
+             penetration: float = 0.75, workers: int = 1, seed: Optional[int] = None,
+             shards_per_worker: int = 4) -> Stats:
+    """Play `rounds` rounds split across `workers` processes.
+
+    Every shard gets its own shoe and an RNG seeded from `seed`, so a run is
+    reproducible for a given seed, worker and shard count.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    shards = max(1, min(rounds, workers * shards_per_worker))
+    seeds = random.Random(seed)
+    jobs = [
+        dict(rounds=rounds // shards + (1 if i < rounds % shards else 0), strategy=strategy,
+             seats=seats, decks=decks, penetration=penetration, seed=seeds.getrandbits(64))
+        for i in range(shards)
+    ]
+    if workers <= 1:
+        results = map(_run_shard, jobs)
+        return sum_stats(results)
+    with multiprocessing.Pool(workers) as pool:
+        return sum_stats(pool.imap_unordered(_run_shard, jobs))
+
+def sum_stats(results) -> Stats:
+    total = Stats()
+    for stats in results:
+        total.merge(stats)
+    return total
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate blackjack rounds and report EV and variance.")
+    parser.add_argument('--rounds', type=int, default=1000000)
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='basic')
+    parser.add_argument('--seats', type=int, default=1, help='players at the table')
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--penetration', type=float, default=0.75)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    stats = simulate(args.rounds, args.strategy, args.seats, args.decks, args.penetration,
+                     args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'rounds': stats.rounds,
+        'hands': stats.hands,
+        'ev': stats.ev,
+        'variance': stats.variance,
+        'std_error': math.sqrt(stats.variance / stats.hands) if stats.hands else 0.0,
+        'outcomes': {outcome: count / stats.hands for outcome, count in stats.outcomes.most_common()},
+        'seconds': elapsed,
+        'rounds_per_second': stats.rounds / elapsed if elapsed else 0.0
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['rounds']:,} rounds, {report['hands']:,} hands ({args.strategy}, "
+          f"{args.decks} decks, {args.workers} workers)")
+    print(f"EV per hand: {report['ev'] * 100:+.3f}% of the bet "
+          f"(+/- {1.96 * report['std_error'] * 100:.3f}% at 95%)")
+    print(f"Variance:    {report['variance']:.4f} bets^2 (std dev {math.sqrt(report['variance']):.4f})")
+    for outcome, share in report['outcomes'].items():
+        print(f"  {outcome:<17} {share * 100:6.2f}%")
+    print(f"Speed:       {report['rounds_per_second']:,.0f} rounds/s in {elapsed:.2f}s")
+
+if __name__ == '__main__':
+    main()
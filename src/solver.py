@@ -0,0 +1,277 @@
+"""Exact hit/stand EVs for a given shoe composition.
+
+A memoized recursion over (player total, soft, dealer upcard, remaining card
+counts) works out the dealer's final-total probabilities and the EV of
+standing or hitting (and then playing on optimally) under this table's
+rules. Results sit in LRU caches, and can be written to a compact binary
+table that is read back lazily the first time the solver is asked.
+
+    python -m black_jack.src.solver --decks 6 --out strategy.bin
+"""
+import argparse
+import math
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+from .rules import BUST, DEALER_STANDS_ON, PAYOUTS, settle
+
+# A composition is a tuple of card counts by value: index 0 is 2s ... index 9 aces (11)
+VALUES = tuple(range(2, 12))
+
+# Dealer outcome slots: final totals 17 to 21, then bust
+OUTCOMES = ('17', '18', '19', '20', '21', 'bust')
+
+def composition(values: Iterable[int]) -> Tuple[int, ...]:
+    """Card counts by value for an iterable of card values (2-11)."""
+    counts = [0] * len(VALUES)
+    for value in values:
+        counts[value - 2] += 1
+    return tuple(counts)
+
+def full_shoe(decks: int) -> Tuple[int, ...]:
+    """Composition of `decks` fresh decks."""
+    return tuple(4 * decks * (4 if value == 10 else 1) for value in VALUES)
+
+def _add(total: int, soft: int, value: int) -> Tuple[int, int]:
+    """Add a card value to a hand; soft is 1 while an ace still counts 11."""
+    total += value
+    if value == 11:
+        soft += 1
+    if total > 21 and soft:
+        total -= 10
+        soft -= 1
+    return total, soft
+
+class LRUCache:
+    """Dict with a size bound that evicts the least recently used entry."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def items(self):
+        return list(self._data.items())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+# On-disk table: magic, then fixed-size records of
+# total, soft, upcard, the 10 counts, stand EV, hit EV (NaN if no hit) and the
+# six dealer outcome probabilities
+MAGIC = b'BJEV1\n'
+RECORD = struct.Struct('<3B10H8f')
+
+class StrategySolver:
+    """Exact, composition-dependent hit/stand advice with memoized results.
+
+    The dealer draws to 17 and a player's 21 settles as blackjack, the same
+    as GameSession. If a tiny pool runs out mid-hand the dealer stands where
+    it is and the hand is counted as a 17.
+    """
+    def __init__(self, path: Optional[str] = None, maxsize: int = 200000, dealer_maxsize: int = 500000):
+        self.path = path
+        # (total, soft, upcard, counts) -> (stand EV, hit EV or None, dealer outcome probabilities)
+        self._decisions = LRUCache(maxsize)
+        # (total, soft, counts) -> dealer outcome probabilities from that point
+        self._dealer = LRUCache(dealer_maxsize)
+        # Loaded from `path` on first use; never evicted
+        self._table: Optional[Dict[Tuple, Tuple]] = None
+        self._lock = threading.RLock()
+
+    def _load(self) -> None:
+        self._table = {}
+        if self.path and os.path.exists(self.path):
+            self._table.update(read_table(self.path))
+
+    def evaluate(self, total: int, soft: int, upcard: int, counts: Tuple[int, ...]) -> Dict[str, Any]:
+        """Dealer odds and EVs for a hand of `total` against `upcard`.
+
+        `counts` is the composition of every card the player can't see, the
+        dealer's hole card included.
+        """
+        stand, hit, dealer = self._solve(total, 1 if soft else 0, upcard, tuple(counts))
+        return {
+            'dealer_totals': dict(zip(OUTCOMES, dealer)),
+            'ev': {'stand': stand, 'hit': hit},
+            'advice': 'hit' if hit is not None and hit > stand else 'stand'
+        }
+
+    def _solve(self, total: int, soft: int, upcard: int, counts: Tuple[int, ...]) -> Tuple:
+        key = (total, soft, upcard, counts)
+        with self._lock:
+            if self._table is None:
+                self._load()
+            result = self._table.get(key) or self._decisions.get(key)
+            if result is None:
+                result = self._compute(total, soft, upcard, counts)
+                self._decisions.put(key, result)
+            return result
+
+    def _best(self, total: int, soft: int, upcard: int, counts: Tuple[int, ...]) -> float:
+        stand, hit, _ = self._solve(total, soft, upcard, counts)
+        return stand if hit is None else max(stand, hit)
+
+    def _compute(self, total: int, soft: int, upcard: int, counts: Tuple[int, ...]) -> Tuple:
+        dealer = self.dealer_odds(upcard, counts)
+        stand = self._stand_ev(total, dealer)
+        hit = None
+        remaining = sum(counts)
+        if total < 21 and remaining:
+            hit = 0.0
+            for index, count in enumerate(counts):
+                if not count:
+                    continue
+                new_total, new_soft = _add(total, soft, VALUES[index])
+                if new_total > 21:
+                    ev = PAYOUTS[BUST]
+                else:
+                    rest = counts[:index] + (count - 1,) + counts[index + 1:]
+                    # 21 ends the turn
+                    ev = (self._stand_ev(21, self.dealer_odds(upcard, rest)) if new_total == 21
+                          else self._best(new_total, new_soft, upcard, rest))
+                hit += count / remaining * ev
+        return stand, hit, dealer
+
+    @staticmethod
+    def _stand_ev(total: int, dealer: Tuple[float, ...]) -> float:
+        ev = 0.0
+        for slot, probability in enumerate(dealer):
+            if probability:
+                dealer_total = 22 if slot == 5 else DEALER_STANDS_ON + slot
+                outcome = settle(total, total > 21, total == 21,
+                                 dealer_total, dealer_total > 21, dealer_total == 21)
+                ev += probability * PAYOUTS[outcome]
+        return ev
+
+    def dealer_odds(self, upcard: int, counts: Tuple[int, ...]) -> Tuple[float, ...]:
+        """Probabilities of the dealer finishing on 17-21 or busting, hole card drawn from `counts`."""
+        with self._lock:
+            return self._dealer_from(upcard, 1 if upcard == 11 else 0, counts)
+
+    def _dealer_from(self, total: int, soft: int, counts: Tuple[int, ...]) -> Tuple[float, ...]:
+        remaining = sum(counts)
+        if total >= DEALER_STANDS_ON or not remaining:
+            slot = 5 if total > 21 else max(total, DEALER_STANDS_ON) - DEALER_STANDS_ON
+            return tuple(1.0 if i == slot else 0.0 for i in range(6))
+
+        key = (total, soft, counts)
+        cached = self._dealer.get(key)
+        if cached is not None:
+            return cached
+
+        odds = [0.0] * 6
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            new_total, new_soft = _add(total, soft, VALUES[index])
+            rest = counts[:index] + (count - 1,) + counts[index + 1:]
+            weight = count / remaining
+            for slot, probability in enumerate(self._dealer_from(new_total, new_soft, rest)):
+                odds[slot] += weight * probability
+        result = tuple(odds)
+        self._dealer.put(key, result)
+        return result
+
+    def save(self, path: Optional[str] = None) -> int:
+        """Write every known result to the binary table. Returns the record count."""
+        with self._lock:
+            if self._table is None:
+                self._load()
+            records = dict(self._table)
+            records.update(self._decisions.items())
+        write_table(path or self.path, records)
+        return len(records)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'decisions': len(self._decisions),
+            'table': len(self._table or ()),
+            'dealer_states': len(self._dealer),
+            'hits': self._decisions.hits,
+            'misses': self._decisions.misses
+        }
+
+def write_table(path: str, records: Dict[Tuple, Tuple]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        for (total, soft, upcard, counts), (stand, hit, dealer) in records.items():
+            f.write(RECORD.pack(total, soft, upcard, *counts, stand,
+                                math.nan if hit is None else hit, *dealer))
+    os.replace(tmp_path, path)
+
+def read_table(path: str) -> Dict[Tuple, Tuple]:
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a strategy table")
+    records = {}
+    for fields in RECORD.iter_unpack(memoryview(data)[len(MAGIC):]):
+        total, soft, upcard = fields[:3]
+        counts = fields[3:13]
+        stand, hit = fields[13:15]
+        records[(total, soft, upcard, counts)] = (stand, None if math.isnan(hit) else hit, fields[15:])
+    return records
+
+_default_solver = None
+
+def default_solver() -> StrategySolver:
+    """Process-wide solver, backed by the table at $BLACKJACK_STRATEGY_TABLE if set."""
+    global _default_solver
+    if _default_solver is None:
+        _default_solver = StrategySolver(os.environ.get('BLACKJACK_STRATEGY_TABLE'))
+    return _default_solver
+
+def precompute(solver: StrategySolver, decks: int) -> int:
+    """Solve every two-card starting hand against every upcard off a fresh shoe."""
+    shoe = full_shoe(decks)
+    solved = 0
+    for upcard in VALUES:
+        for first in VALUES:
+            for second in VALUES[first - 2:]:
+                counts = list(shoe)
+                for value in (upcard, first, second):
+                    counts[value - 2] -= 1
+                total, soft = _add(*_add(0, 0, first), second)
+                solver.evaluate(total, soft, upcard, tuple(counts))
+                solved += 1
+    return solved
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute the exact strategy table for a fresh shoe.")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--out', required=True, help='binary table to write')
+    args = parser.parse_args(argv)
+
+    solver = StrategySolver(args.out, maxsize=10 ** 7)
+    started = time.perf_counter()
+    hands = precompute(solver, args.decks)
+    records = solver.save()
+    print(f"{hands} starting hands, {records:,} records in {time.perf_counter() - started:.1f}s "
+          f"-> {args.out} ({os.path.getsize(args.out):,} bytes)")
+
+if __name__ == '__main__':
+    main()
@@ -9,9 +9,20 @@ let currentGame = {
         cards: [],
         total: 0
     },
-    status: 'waiting' // waiting, in_progress, finished
+    status: 'waiting', // waiting, in_progress, finished
+    version: null, // state version of the last rendered update
+    etag: null,
+    state: null // last full game state, deltas are applied on top of it
 };
 
+// Long-poll settings (seconds / milliseconds)
+const LONG_POLL_WAIT = 30;
+const POLL_RETRY_DELAY = 2000;
+let watchingGameState = false;
+let eventSource = null;
+let resyncingGameState = false;
+let lobbyEtag = null;
+
 // DOM Elements
 const lobbySection = document.getElementById('lobby');
 const gameSection = document.getElementById('game');
@@ -47,9 +58,6 @@ document.addEventListener('DOMContentLoaded', () => {
     if (gameId) {
         gameIdInput.value = gameId;
     }
-    
-    // Poll for game updates
-    setInterval(pollGameState, 2000);
 });
 
 // API Functions
@@ -81,8 +89,8 @@ async function createGame() {
             // Show game section
             showGameSection();
             
-            // Start polling for game updates
-            pollGameState();
+            // Start listening for game updates
+            watchGameState();
         } else {
             showMessage(data.error || 'Failed to create game');
         }
@@ -126,8 +134,8 @@ async function joinGame() {
             // Show game section
             showGameSection();
             
-            // Start polling for game updates
-            pollGameState();
+            // Start listening for game updates
+            watchGameState();
         } else {
             showMessage(data.error || 'Failed to join game');
         }
@@ -156,7 +164,7 @@ async function startGame() {
 
 async function hit() {
     try {
-        const response = await fetch(`/api/sessions/${currentGame.id}/hit`, {
+        const response = await fetch(`/api/sessions/${currentGame.id}/hit${sinceQuery()}`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ player_name: currentGame.playerName })
@@ -164,7 +172,7 @@ async function hit() {
         
         if (response.ok) {
             const data = await response.json();
-            updateGameUI(data.game_state);
+            applyStateUpdate(data.game_state);
             
             // Show message from server if available
             if (data.message) {
@@ -172,7 +180,7 @@ async function hit() {
             }
             
             // Check if the game is over
-            if (data.game_state.status === 'finished') {
+            if (currentGame.status === 'finished') {
                 showMessage('Round over!', 3000);
             }
         } else {
@@ -187,7 +195,7 @@ async function hit() {
 
 async function stand() {
     try {
-        const response = await fetch(`/api/sessions/${currentGame.id}/stand`, {
+        const response = await fetch(`/api/sessions/${currentGame.id}/stand${sinceQuery()}`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ player_name: currentGame.playerName })
@@ -195,7 +203,7 @@ async function stand() {
         
         if (response.ok) {
             const data = await response.json();
-            updateGameUI(data.game_state);
+            applyStateUpdate(data.game_state);
             
             // Show appropriate message
             if (data.message) {
@@ -488,26 +496,145 @@ function getCardValue(card) {
 }
 
 // Polling Functions
+function applyGameState(gameState) {
+    currentGame.state = gameState;
+    currentGame.status = gameState.status;
+    currentGame.version = gameState.version;
+    updateGameUI(gameState);
+}
+
+// Handle either a full state or a delta ({since, version, changes}) from the server
+function applyStateUpdate(update) {
+    if (!update.changes) {
+        applyGameState(update);
+    } else if (currentGame.state && update.since === currentGame.version) {
+        applyGameState(applyChanges(currentGame.state, update.changes));
+    } else if (currentGame.version === null || update.version > currentGame.version) {
+        // The delta is against a version we don't have (the event stream diffs
+        // against what it last sent, which an action reply may have overtaken)
+        resyncGameState();
+    }
+    // Otherwise it's a change we already have
+}
+
+// Drop our version and ETag and fetch the full state
+async function resyncGameState() {
+    if (resyncingGameState) return;
+    resyncingGameState = true;
+    currentGame.version = null;
+    currentGame.etag = null;
+    try {
+        await pollGameState();
+    } finally {
+        resyncingGameState = false;
+    }
+}
+
+function applyChanges(state, changes) {
+    changes.forEach(change => {
+        let target = state;
+        change.path.slice(0, -1).forEach(key => { target = target[key]; });
+        const key = change.path[change.path.length - 1];
+        
+        if (change.op === 'append') {
+            target[key].push(...change.value);
+        } else if (change.op === 'remove') {
+            delete target[key];
+        } else {
+            target[key] = change.value;
+        }
+    });
+    return state;
+}
+
+// Query string asking action endpoints to reply with a delta
+function sinceQuery() {
+    return currentGame.version === null ? '' : `?since=${currentGame.version}`;
+}
+
+// Fetch the game state once. After the first snapshot this is a long-poll:
+// the server holds the request until the state version moves past ours.
 async function pollGameState() {
-    if (!currentGame.id) return;
+    if (!currentGame.id) return false;
     
     try {
-        const response = await fetch(`/api/sessions/${currentGame.id}/status`);
+        let url = `/api/sessions/${currentGame.id}/status`;
+        const headers = {};
+        if (currentGame.version !== null) {
+            url += `?since=${currentGame.version}&wait=${LONG_POLL_WAIT}&delta=1`;
+        }
+        if (currentGame.etag) {
+            headers['If-None-Match'] = currentGame.etag;
+        }
+        
+        const response = await fetch(url, { headers, cache: 'no-store' });
         
+        if (response.status === 304) {
+            return true;
+        }
         if (response.ok) {
-            const gameState = await response.json();
-            currentGame.status = gameState.status;
-            updateGameUI(gameState);
+            currentGame.etag = response.headers.get('ETag');
+            applyStateUpdate(await response.json());
+            return true;
         }
     } catch (error) {
         console.error('Error polling game state:', error);
     }
+    return false;
+}
+
+async function longPollGameState() {
+    if (watchingGameState) return;
+    watchingGameState = true;
+    
+    while (currentGame.id) {
+        if (!await pollGameState()) {
+            // Back off before retrying after an error
+            await new Promise(resolve => setTimeout(resolve, POLL_RETRY_DELAY));
+        }
+    }
+    
+    watchingGameState = false;
+}
+
+// Prefer the server-sent event stream; fall back to long-polling when the
+// browser doesn't support it or the server refuses the connection.
+function watchGameState() {
+    if (!window.EventSource) {
+        longPollGameState();
+        return;
+    }
+    if (eventSource) return;
+    
+    eventSource = new EventSource(`/api/sessions/${currentGame.id}/events`);
+    eventSource.addEventListener('state', (event) => {
+        applyGameState(JSON.parse(event.data));
+    });
+    eventSource.addEventListener('delta', (event) => {
+        applyStateUpdate(JSON.parse(event.data));
+    });
+    eventSource.onerror = () => {
+        // EventSource reconnects on its own unless the server turned us away
+        if (eventSource.readyState === EventSource.CLOSED) {
+            eventSource = null;
+            longPollGameState();
+        }
+    };
 }
 
 // Initialize available games list
 async function updateAvailableGames() {
+    // The lobby is hidden while in a game, no need to refresh it
+    if (currentGame.id) return;
+    
     try {
-        const response = await fetch('/api/sessions');
+        const headers = lobbyEtag ? { 'If-None-Match': lobbyEtag } : {};
+        const response = await fetch('/api/sessions?status=waiting&limit=20', { headers, cache: 'no-store' });
+        
+        // Nothing changed since the last refresh
+        if (response.status === 304) return;
+        
+        lobbyEtag = response.headers.get('ETag');
         const data = await response.json();
         
         const availableGames = document.getElementById('availableGames');
@@ -0,0 +1,360 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import app as app_module
+from black_jack.src.app import app
+from black_jack.src.events import Subscriber
+from black_jack.src.delta import apply_changes
+from black_jack.src.sessionManager import SessionManager
+from black_jack.src.sessionStore import SQLiteSessionStore
+
+class TestSessionApi(unittest.TestCase):
+    def setUp(self):
+        """Create a session with two players through the API"""
+        app_module.active_sessions.clear()
+        self.client = app.test_client()
+        response = self.client.post('/api/sessions', json={'creator_name': 'alice'})
+        self.session_id = response.get_json()['session_id']
+        self.client.post(f'/api/sessions/{self.session_id}/join', json={'player_name': 'bob'})
+
+    def status(self, query='', headers=None):
+        return self.client.get(f'/api/sessions/{self.session_id}/status{query}', headers=headers)
+
+    def test_invalid_session_settings(self):
+        """Test that malformed shoe settings are rejected with 400"""
+        for settings in ({'decks': 'six'}, {'penetration': 'deep'}, {'max_players': None},
+                         {'seed': [1]}, {'decks': 9}):
+            response = self.client.post('/api/sessions', json={'creator_name': 'carol', **settings})
+            self.assertEqual(response.status_code, 400, settings)
+        for body in (['carol'], 'carol', 5):
+            self.assertEqual(self.client.post('/api/sessions', json=body).status_code, 400, body)
+        self.assertEqual(self.client.post(f'/api/sessions/{self.session_id}/join', json=['carol']).status_code, 400)
+        response = self.client.post('/api/sessions', json={'creator_name': 'carol', 'decks': '2', 'seed': '5'})
+        self.assertEqual(response.status_code, 201)
+
+    def test_refused_join_records_nothing(self):
+        """Test that a join the table refuses doesn't buy the player in"""
+        response = self.client.post('/api/sessions', json={'creator_name': 'carol', 'max_players': 1})
+        session_id = response.get_json()['session_id']
+        response = self.client.post(f'/api/sessions/{session_id}/join', json={'player_name': 'latecomer'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(app_module.player_registry.get('latecomer'))
+
+    def test_version_bumps_on_mutation(self):
+        """Test that every action moves the state version forward"""
+        version = self.status().get_json()['version']
+        self.client.post(f'/api/sessions/{self.session_id}/start')
+        started = self.status().get_json()['version']
+        self.assertGreater(started, version)
+
+        self.client.post(f'/api/sessions/{self.session_id}/stand', json={'player_name': 'alice'})
+        self.assertGreater(self.status().get_json()['version'], started)
+
+    def test_etag_not_modified(self):
+        """Test that an unchanged state answers If-None-Match with 304"""
+        response = self.status()
+        etag = response.headers['ETag']
+
+        self.assertEqual(self.status(headers={'If-None-Match': etag}).status_code, 304)
+
+        self.client.post(f'/api/sessions/{self.session_id}/start')
+        self.assertEqual(self.status(headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_long_poll_times_out(self):
+        """Test that a long-poll with no changes returns 304 after waiting"""
+        version = self.status().get_json()['version']
+        response = self.status(f'?since={version}&wait=0.05')
+        self.assertEqual(response.status_code, 304)
+
+    def test_long_poll_wakes_on_change(self):
+        """Test that a parked long-poll returns as soon as the state changes"""
+        version = self.status().get_json()['version']
+
+        def start_later():
+            time.sleep(0.1)
+            app_module.active_sessions.get(self.session_id).start_game()
+
+        threading.Thread(target=start_later).start()
+        began = time.monotonic()
+        response = self.status(f'?since={version}&wait=5')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.monotonic() - began, 5)
+        self.assertEqual(response.get_json()['status'], 'in_progress')
+
+    def test_hit_out_of_turn(self):
+        """Test that only the current player can act"""
+        self.client.post(f'/api/sessions/{self.session_id}/start')
+        response = self.client.post(f'/api/sessions/{self.session_id}/hit', json={'player_name': 'bob'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_delta_matches_full_state(self):
+        """Test that applying a delta to an old state gives the new state"""
+        before = self.status().get_json()
+        self.client.post(f'/api/sessions/{self.session_id}/start')
+        self.client.post(f'/api/sessions/{self.session_id}/hit', json={'player_name': 'alice'})
+
+        delta = self.status(f"?since={before['version']}&delta=1").get_json()
+        self.assertEqual(delta['since'], before['version'])
+        self.assertEqual(apply_changes(before, delta['changes']), self.status().get_json())
+
+    def test_action_returns_delta(self):
+        """Test that actions reply with only the changes when given ?since"""
+        self.client.post(f'/api/sessions/{self.session_id}/start')
+        version = self.status().get_json()['version']
+        response = self.client.post(f'/api/sessions/{self.session_id}/stand?since={version}',
+                                    json={'player_name': 'alice'})
+        changes = response.get_json()['game_state']['changes']
+        self.assertIn({'op': 'set', 'path': ['current_player'], 'value': 'bob'}, changes)
+
+    def test_delta_falls_back_to_full_state(self):
+        """Test that a client too far behind gets a full snapshot"""
+        session = app_module.active_sessions.get(self.session_id)
+        for _ in range(session.DELTA_HISTORY + 1):
+            session.reset_round()
+
+        state = self.status('?since=0&delta=1').get_json()
+        self.assertNotIn('changes', state)
+        self.assertEqual(state['version'], session.version)
+
+    def test_messages_pagination(self):
+        """Test paging back through earlier rounds' messages"""
+        session = app_module.active_sessions.get(self.session_id)
+        for _ in range(3):
+            session.reset_round()
+            session.determine_winners()
+        self.assertEqual(len(self.status().get_json()['messages']), 5)
+
+        url = f'/api/sessions/{self.session_id}/messages'
+        page = self.client.get(f'{url}?limit=6').get_json()
+        self.assertEqual([m['seq'] for m in page['messages']], list(range(10, 16)))
+        self.assertTrue(page['has_more'])
+        page = self.client.get(f"{url}?limit=10&before={page['messages'][0]['seq']}").get_json()
+        self.assertEqual([m['seq'] for m in page['messages']], list(range(1, 10)))
+        self.assertFalse(page['has_more'])
+        page = self.client.get(f'{url}?after=13').get_json()
+        self.assertEqual([m['round'] for m in page['messages']], [3, 3])
+
+    def test_leaderboard_records_rounds(self):
+        """Test that a settled round shows up in the player's stats and the leaderboard"""
+        previous = self.client.get('/api/players/Alice').get_json().get('hands', 0)
+        self.client.post(f'/api/sessions/{self.session_id}/start')
+        session = app_module.active_sessions.get(self.session_id)
+        while session.status == 'in_progress':
+            self.client.post(f'/api/sessions/{self.session_id}/stand',
+                             json={'player_name': session.get_current_player().name})
+
+        stats = self.client.get('/api/players/Alice').get_json()
+        self.assertEqual(stats['hands'], previous + 1)
+        self.assertEqual(stats['chips'], session.get_player('alice').chips)
+        board = self.client.get('/api/leaderboard?limit=100').get_json()
+        self.assertIn({**stats}, board['players'])
+        self.assertEqual(self.client.get('/api/players/nobody').status_code, 404)
+
+class RacingStore(SQLiteSessionStore):
+    """A SQLite store where another worker changes the table right before the next save."""
+    race = False
+
+    def save(self, session, expected_version):
+        if self.race:
+            self.race = False
+            rival = SessionManager(SQLiteSessionStore(self.path))
+            with rival.locked(session.session_id) as theirs:
+                theirs.mark_changed()
+        super().save(session, expected_version)
+
+class TestRecordedOnSave(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = RacingStore(os.path.join(self.tmpdir.name, 'sessions.db'))
+        self.memory_store = app_module.active_sessions.store
+        app_module.active_sessions.store = self.store
+        self.client = app.test_client()
+
+    def tearDown(self):
+        app_module.active_sessions.store = self.memory_store
+        self.tmpdir.cleanup()
+
+    def test_rejected_round_is_not_recorded(self):
+        """Test that a round lost to a concurrent write (409) leaves the player's record alone"""
+        session_id = self.client.post('/api/sessions', json={'creator_name': 'racer'}).get_json()['session_id']
+        self.client.post(f'/api/sessions/{session_id}/start')
+        before = app_module.player_registry.get('racer').to_json()
+
+        self.store.race = True
+        response = self.client.post(f'/api/sessions/{session_id}/stand', json={'player_name': 'racer'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(app_module.player_registry.get('racer').to_json(), before)
+
+        # The retry settles the round, which is then counted once
+        response = self.client.post(f'/api/sessions/{session_id}/stand', json={'player_name': 'racer'})
+        self.assertEqual(response.status_code, 200)
+        stats = app_module.player_registry.get('racer')
+        self.assertEqual(stats.hands, before['hands'] + 1)
+        self.assertEqual(stats.chips, app_module.active_sessions.get(session_id).get_player('racer').chips)
+
+class TestBatchActions(unittest.TestCase):
+    def setUp(self):
+        """Start a seeded round where alice (on 8) can safely hit once"""
+        app_module.active_sessions.clear()
+        self.client = app.test_client()
+        response = self.client.post('/api/sessions', json={'creator_name': 'alice', 'seed': 0})
+        self.session_id = response.get_json()['session_id']
+        self.client.post(f'/api/sessions/{self.session_id}/join', json={'player_name': 'bob'})
+        self.client.post(f'/api/sessions/{self.session_id}/start')
+        self.session = app_module.active_sessions.get(self.session_id)
+        self.assertEqual(self.session.players[0].total, 8)
+
+    def post(self, path, body, key=None):
+        headers = {'Idempotency-Key': key} if key else None
+        return self.client.post(f'/api/sessions/{self.session_id}/{path}', json=body, headers=headers)
+
+    def test_batch_is_one_version(self):
+        """Test that a batch plays every decision in order under one version"""
+        version = self.session.version
+        response = self.post('actions', {'player_name': 'alice', 'actions': [
+            'hit', 'stand', {'action': 'stand', 'player_name': 'bob'}]})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['applied'], 3)
+        self.assertEqual([r['action'] for r in body['results']], ['hit', 'stand', 'stand'])
+        self.assertEqual(len(self.session.players[0].cards), 3)
+        self.assertEqual(self.session.status, 'finished')
+        self.assertEqual(self.session.version, version + 1)
+        self.assertEqual(body['game_state']['version'], version + 1)
+        self.assertEqual(self.session.actions[-1][0], 'batch')
+
+    def test_rejected_batch_applies_nothing(self):
+        """Test that a decision out of turn undoes the ones before it in the batch"""
+        before = self.session.get_game_state()
+        version, logged = self.session.version, len(self.session.actions)
+        response = self.post('actions', {'actions': [
+            {'action': 'hit', 'player_name': 'alice'},
+            {'action': 'stand', 'player_name': 'alice'},
+            {'action': 'stand', 'player_name': 'alice'}]})
+        self.assertEqual(response.status_code, 400)
+        body = response.get_json()
+        self.assertEqual(body['applied'], 0)
+        self.assertIn('(action 2)', body['error'])
+        self.assertNotIn('game_state', body)
+        self.assertEqual(self.session.get_game_state(), before)
+        self.assertEqual((self.session.version, len(self.session.actions)), (version, logged))
+
+        # The same cards come out when it's sent right
+        response = self.post('actions', {'player_name': 'alice', 'actions': ['hit', 'stand']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.session.players[0].cards), 3)
+        self.assertEqual(self.session.get_current_player().name, 'bob')
+
+        self.assertEqual(self.post('actions', {'actions': ['fold'], 'player_name': 'bob'}).status_code, 400)
+        self.assertEqual(self.post('actions', {'actions': []}).status_code, 400)
+        self.assertEqual(self.post('actions', ['stand']).status_code, 400)
+        self.assertEqual(self.post('actions', {'actions': ['stand'], 'player_name': 5}).status_code, 400)
+        self.assertEqual(self.post('actions', {'actions': [{'action': 'stand', 'player_name': ['bob']}]}).status_code,
+                         400)
+        self.assertEqual(self.session.get_current_player().name, 'bob')
+
+    def test_retries_replay_the_reply(self):
+        """Test that retrying with the same Idempotency-Key doesn't draw another card"""
+        first = self.post('hit', {'player_name': 'alice'}, key='k1')
+        version = self.session.version
+        retry = self.post('hit', {'player_name': 'alice'}, key='k1')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.get_json()['message'], first.get_json()['message'])
+        self.assertEqual(len(self.session.players[0].cards), 3)
+        self.assertEqual(self.session.version, version)
+
+        batch = {'actions': ['stand'], 'player_name': 'alice'}
+        self.assertEqual(self.post('actions', batch, key='k2').get_json()['applied'], 1)
+        retry = self.post('actions', batch, key='k2')
+        self.assertEqual(retry.get_json()['applied'], 1)
+        self.assertEqual(self.session.get_current_player().name, 'bob')
+        # A new key acts again, and is turned away
+        self.assertEqual(self.post('actions', batch, key='k3').status_code, 400)
+
+class TestLobby(unittest.TestCase):
+    def setUp(self):
+        app_module.active_sessions.clear()
+        self.client = app.test_client()
+        self.session_ids = [
+            self.client.post('/api/sessions', json={'creator_name': f'player{i}'}).get_json()['session_id']
+            for i in range(5)
+        ]
+        self.client.post(f'/api/sessions/{self.session_ids[0]}/start')
+
+    def test_status_filter_and_pagination(self):
+        """Test walking the waiting tables page by page"""
+        seen = []
+        cursor = ''
+        while True:
+            data = self.client.get(f'/api/sessions?status=waiting&limit=2&cursor={cursor}').get_json()
+            self.assertEqual(data['total'], 4)
+            seen.extend(session['session_id'] for session in data['sessions'])
+            if not data['next_cursor']:
+                break
+            cursor = data['next_cursor']
+
+        self.assertEqual(sorted(seen), sorted(self.session_ids[1:]))
+        self.assertEqual(len(seen), 4)
+
+    def test_etag_invalidated_by_lobby_changes_only(self):
+        """Test that the lobby ETag changes on joins but not on in-game actions"""
+        etag = self.client.get('/api/sessions').headers['ETag']
+        self.assertEqual(self.client.get('/api/sessions', headers={'If-None-Match': etag}).status_code, 304)
+
+        self.client.post(f'/api/sessions/{self.session_ids[0]}/hit', json={'player_name': 'player0'})
+        if app_module.active_sessions.get(self.session_ids[0]).status == 'in_progress':
+            self.assertEqual(self.client.get('/api/sessions', headers={'If-None-Match': etag}).status_code, 304)
+
+        self.client.post(f'/api/sessions/{self.session_ids[1]}/join', json={'player_name': 'bob'})
+        response = self.client.get('/api/sessions', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        counts = {s['session_id']: s['player_count'] for s in response.get_json()['sessions']}
+        self.assertEqual(counts[self.session_ids[1]], 2)
+
+class TestEventStream(unittest.TestCase):
+    def setUp(self):
+        app_module.active_sessions.clear()
+        self.client = app.test_client()
+        response = self.client.post('/api/sessions', json={'creator_name': 'alice'})
+        self.session_id = response.get_json()['session_id']
+
+    def test_stream_pushes_changes(self):
+        """Test that the event stream sends the state and then each delta"""
+        response = self.client.get(f'/api/sessions/{self.session_id}/events')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        frames = iter(response.response)
+
+        self.assertTrue(next(frames).startswith(b'retry:'))
+        self.assertIn(b'event: state', next(frames))
+        self.assertEqual(app_module.event_broker.subscriber_count(self.session_id), 1)
+
+        self.client.post(f'/api/sessions/{self.session_id}/start')
+        frame = next(frames)
+        self.assertIn(b'event: delta', frame)
+        self.assertIn(b'"path": ["status"], "value": "in_progress"', frame)
+
+        response.close()
+        self.assertEqual(app_module.event_broker.subscriber_count(self.session_id), 0)
+
+    def test_slow_subscriber_drops_oldest(self):
+        """Test that a full subscriber queue keeps only the newest events"""
+        subscriber = Subscriber(maxsize=2)
+        for version in range(5):
+            subscriber.push(version)
+
+        self.assertEqual(subscriber.dropped, 3)
+        self.assertEqual(subscriber.get(0), 3)
+        self.assertEqual(subscriber.get(0), 4)
+        self.assertIsNone(subscriber.get(0))
+
+if __name__ == '__main__':
+    unittest.main()
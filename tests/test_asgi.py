@@ -0,0 +1,140 @@
+import unittest
+import asyncio
+import json
+import sys
+import os
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import asgi
+from black_jack.src.journal import JournaledSessionStore
+
+async def call(method, path, body=None, query='', headers=()):
+    """Run one request through the ASGI app and return (status, headers, parsed body)."""
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+        'headers': [(name.encode(), value.encode()) for name, value in headers]
+    }
+    incoming = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b''}]
+    disconnect = asyncio.Event()
+    sent = []
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.app(scope, receive, send)
+    start, content = sent
+    data = json.loads(content['body']) if content['body'] else None
+    return start['status'], dict(start['headers']), data
+
+class TestAsgiApp(unittest.TestCase):
+    def setUp(self):
+        asgi.active_sessions.clear()
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_play_a_round(self):
+        """Test the create / join / start / hit / stand flow"""
+        async def scenario():
+            status, _, data = await call('POST', '/api/sessions', {'creator_name': 'alice'})
+            self.assertEqual(status, 201)
+            session_id = data['session_id']
+            status, _, _ = await call('POST', f'/api/sessions/{session_id}/join', {'player_name': 'bob'})
+            self.assertEqual(status, 200)
+            status, _, data = await call('POST', f'/api/sessions/{session_id}/start')
+            self.assertEqual(data['game_state']['status'], 'in_progress')
+            status, _, data = await call('POST', f'/api/sessions/{session_id}/hit', {'player_name': 'bob'})
+            self.assertEqual((status, data), (400, {'error': 'Not your turn'}))
+            for name in ('alice', 'bob'):
+                await call('POST', f'/api/sessions/{session_id}/stand', {'player_name': name})
+            status, headers, data = await call('GET', f'/api/sessions/{session_id}/status')
+            self.assertEqual(data['status'], 'finished')
+            status, _, _ = await call('GET', f'/api/sessions/{session_id}/status',
+                                      headers=[('if-none-match', headers[b'etag'].decode())])
+            self.assertEqual(status, 304)
+            status, _, data = await call('GET', '/api/sessions')
+            self.assertEqual(data['total'], 1)
+        self.run_async(scenario())
+
+    def test_journal_store_answers_once_durable(self):
+        """Test that with the journal store a change is on disk before its response goes out"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = JournaledSessionStore(os.path.join(tmpdir, 'sessions.journal'), wait=False)
+            saved = asgi.active_sessions.store, asgi.journal
+            asgi.active_sessions.store, asgi.journal = store, store.journal
+            try:
+                async def scenario():
+                    status, _, data = await call('POST', '/api/sessions', {'creator_name': 'alice'})
+                    self.assertEqual(status, 201)
+                    self.assertGreater(store.journal.appended, 0)
+                    self.assertEqual(store.journal._durable, store.journal.appended)
+                    return data['session_id']
+                session_id = self.run_async(scenario())
+            finally:
+                asgi.active_sessions.store, asgi.journal = saved
+                store.close()
+            recovered = JournaledSessionStore(os.path.join(tmpdir, 'sessions.journal'))
+            self.assertIsNotNone(recovered.get(session_id))
+            recovered.close()
+
+    def test_long_poll_wakes_on_change(self):
+        """Test that a parked long-poll returns as soon as another request changes the table"""
+        async def scenario():
+            _, _, data = await call('POST', '/api/sessions', {'creator_name': 'alice'})
+            session_id = data['session_id']
+            _, _, state = await call('GET', f'/api/sessions/{session_id}/status')
+
+            poll = asyncio.ensure_future(call('GET', f'/api/sessions/{session_id}/status',
+                                              query=f"since={state['version']}&wait=5&delta=1"))
+            await asyncio.sleep(0.05)
+            self.assertFalse(poll.done())
+            self.assertEqual(asgi.notifier.waiting(), 1)
+
+            await call('POST', f'/api/sessions/{session_id}/join', {'player_name': 'bob'})
+            status, _, data = await asyncio.wait_for(poll, 1)
+            self.assertEqual(status, 200)
+            self.assertEqual(data['since'], state['version'])
+        self.run_async(scenario())
+
+    def test_long_poll_times_out(self):
+        async def scenario():
+            _, _, data = await call('POST', '/api/sessions', {'creator_name': 'alice'})
+            session_id = data['session_id']
+            _, _, state = await call('GET', f'/api/sessions/{session_id}/status')
+            status, _, _ = await call('GET', f'/api/sessions/{session_id}/status',
+                                      query=f"since={state['version']}&wait=0.05")
+            self.assertEqual(status, 304)
+        self.run_async(scenario())
+
+    def test_invalid_session_settings(self):
+        """Test that malformed shoe settings are rejected with 400"""
+        async def scenario():
+            for settings in ({'decks': 'six'}, {'penetration': 'deep'}, {'max_players': []},
+                             {'seed': [1]}, {'decks': 9}):
+                status, _, _ = await call('POST', '/api/sessions', {'creator_name': 'carol', **settings})
+                self.assertEqual(status, 400, settings)
+            for body in (['carol'], 'carol', 5):
+                status, _, _ = await call('POST', '/api/sessions', body)
+                self.assertEqual(status, 400, body)
+            status, _, _ = await call('POST', '/api/sessions', {'creator_name': 'carol', 'decks': '2', 'seed': '5'})
+            self.assertEqual(status, 201)
+        self.run_async(scenario())
+
+    def test_unknown_routes(self):
+        async def scenario():
+            self.assertEqual((await call('GET', '/api/nope'))[0], 404)
+            self.assertEqual((await call('GET', '/api/sessions/abc/hit'))[0], 405)
+            self.assertEqual((await call('POST', '/api/sessions/abc/hit', {'player_name': 'x'}))[0], 404)
+        self.run_async(scenario())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import gzip
+import re
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.datastructures import Accept
+from black_jack.src.app import app
+from black_jack.src.assets import Asset
+
+class TestAsset(unittest.TestCase):
+    def test_fingerprint_follows_contents(self):
+        """Test that the URL name changes with the contents and keeps the extension"""
+        first = Asset('script.js', b'let a = 1;')
+        self.assertRegex(first.url_name, r'^script\.[0-9a-f]{12}\.js$')
+        self.assertEqual(first.url_name, Asset('script.js', b'let a = 1;').url_name)
+        self.assertNotEqual(first.url_name, Asset('script.js', b'let a = 2;').url_name)
+        self.assertEqual(first.mimetype, 'text/javascript')
+
+    def test_variants_and_negotiation(self):
+        """Test that compressed variants are only kept when smaller, and picked by Accept-Encoding"""
+        data = b'body { margin: 0; }\n' * 100
+        asset = Asset('style.css', data)
+        self.assertEqual(gzip.decompress(asset.variants['gzip']), data)
+        self.assertEqual(asset.negotiate(Accept([('gzip', 1), ('deflate', 1)])), 'gzip')
+        self.assertEqual(asset.negotiate(Accept([('gzip', 0)])), 'identity')
+        self.assertEqual(asset.negotiate(Accept([('*', 1)])), 'br' if 'br' in asset.variants else 'gzip')
+        self.assertEqual(asset.negotiate(Accept()), 'identity')
+        self.assertNotEqual(asset.etag_for('gzip'), asset.etag_for('identity'))
+        self.assertEqual(list(Asset('tiny.css', b'a{}').variants), ['identity'])
+
+class TestAssetRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_page_links_fingerprinted_assets(self):
+        """Test that the cached page is compressed on request and links immutable assets"""
+        plain = self.client.get('/')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.headers['Cache-Control'], 'no-cache')
+        page = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(page.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(page.data), plain.data)
+        self.assertEqual(self.client.get('/', headers={'If-None-Match': plain.headers['ETag']}).status_code, 304)
+
+        urls = re.findall(r'(?:href|src)="(/assets/[^"]+)"', plain.get_data(as_text=True))
+        self.assertEqual(len(urls), 2)
+        for url in urls:
+            response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', response.headers['Cache-Control'])
+            self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+            filename = re.sub(r'\.[0-9a-f]{12}(\.\w+)$', r'\1', url.rsplit('/', 1)[1])
+            with app.open_resource(os.path.join(app.static_folder, filename)) as f:
+                self.assertEqual(gzip.decompress(response.data), f.read())
+
+    def test_unknown_asset(self):
+        self.assertEqual(self.client.get('/assets/script.000000000000.js').status_code, 404)
+        self.assertEqual(self.client.get('/static/script.js').status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -80,5 +80,17 @@ class TestBlackjack(unittest.TestCase):
         self.session.dealer_turn()
         self.assertEqual(self.session.dealer.total, 17)
 
+    def test_reset_round_in_place(self):
+        """Test that a new round reuses the players and dealer"""
+        players = list(self.session.players)
+        dealer = self.session.dealer
+        chips = [player.chips for player in players]
+        self.session.reset_round()
+        self.assertEqual(self.session.players, players)
+        self.assertIs(self.session.dealer, dealer)
+        self.assertEqual([player.chips for player in players], [c - 10 for c in chips])
+        for player in players + [dealer]:
+            self.assertEqual(len(player.cards), 2)
+
 if __name__ == '__main__':
     unittest.main()
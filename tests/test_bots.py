@@ -0,0 +1,176 @@
+import unittest
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import app as app_module
+from black_jack.src.bots import BotScheduler, play_bot_turn, resolve_strategy
+from black_jack.src.gameSession import GameSession
+from black_jack.src.journal import JournaledSessionStore
+from black_jack.src.replay import comparable_state, replay
+from black_jack.src.sessionManager import SessionManager
+
+def bot_table(session_id, bots, seed):
+    session = GameSession(session_id, "Bot 0", seed=seed)
+    for seat in range(bots):
+        session.add_player(f"Bot {seat}", bot='basic')
+    return session
+
+class TestBotStrategies(unittest.TestCase):
+    def test_resolve_strategy(self):
+        self.assertFalse(resolve_strategy('stand')(5, 0, 10))
+        self.assertTrue(resolve_strategy('threshold:15')(14, 0, 10))
+        self.assertFalse(resolve_strategy('threshold:15')(15, 0, 10))
+        for name in ('nope', 'threshold:', 'threshold:40'):
+            with self.assertRaises(ValueError):
+                resolve_strategy(name)
+
+    def test_play_bot_turn(self):
+        """Test that a bot plays its own turn and leaves humans alone"""
+        session = GameSession("abc", "alice", seed=3)
+        session.add_player("robot", bot='stand')
+        session.add_player("alice")
+        session.start_game()
+        session.current_player_index = 0
+        session.status = 'in_progress'
+        self.assertIsNotNone(play_bot_turn(session))
+        self.assertEqual(session.get_current_player().name, "alice")
+        self.assertIsNone(play_bot_turn(session))
+        self.assertEqual(session.actions[-1], ["stand", "robot"])
+
+class TestBotScheduler(unittest.TestCase):
+    def setUp(self):
+        self.manager = SessionManager()
+        self.scheduler = BotScheduler(self.manager, workers=2, think_time=0)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def wait_until_finished(self, session_ids, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(self.manager.get(s).status == 'finished' for s in session_ids):
+                return
+            time.sleep(0.01)
+        self.fail(f"bots didn't finish: {self.scheduler.stats()}")
+
+    def test_bots_play_whole_rounds(self):
+        """Test that bot-only tables play to the end and replay exactly"""
+        session_ids = [f"t{number}" for number in range(20)]
+        for number, session_id in enumerate(session_ids):
+            self.manager.add(bot_table(session_id, 3, seed=number))
+            with self.manager.locked(session_id) as session:
+                session.start_game()
+        self.wait_until_finished(session_ids)
+
+        stats = self.scheduler.stats()
+        self.assertGreaterEqual(stats['actions'], 20)
+        self.assertEqual(stats['errors'], 0)
+        session = self.manager.get("t0")
+        self.assertEqual(comparable_state(replay(session.replay_log()).get_game_state()),
+                         comparable_state(session.get_game_state()))
+
+    def test_tables_take_turns(self):
+        """Test that one table's bots don't run ahead of another table's"""
+        self.scheduler = BotScheduler(SessionManager(), workers=1, think_time=0.05)
+        manager = self.scheduler.manager
+        moves = []
+        lock = threading.Lock()
+
+        def record(session):
+            with lock:
+                if session.actions[-1][0] in ('hit', 'stand'):
+                    moves.append(session.session_id)
+
+        for session_id in ("a", "b"):
+            table = bot_table(session_id, 5, seed=1)
+            table.add_listener(record)
+            manager.add(table)
+        for session_id in ("a", "b"):
+            with manager.locked(session_id) as session:
+                session.start_game()
+        deadline = time.monotonic() + 5
+        while len(moves) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(moves[:4], ["a", "b", "a", "b"])
+
+    def test_tables_from_before_a_restart(self):
+        """Test that tables left on a bot's turn are played on after a restart"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'sessions.journal')
+
+            def restart(start_rounds):
+                # Leave the tables on a bot's turn, then open the journal again
+                store = JournaledSessionStore(path, fsync=False)
+                manager = SessionManager(store)
+                for session_id in start_rounds:
+                    if manager.get(session_id) is None:
+                        manager.add(bot_table(session_id, 2, seed=4))
+                    with manager.locked(session_id) as session:
+                        session.reset_round()
+                        self.assertIsNotNone(session.current_bot())
+                store.close()
+                self.scheduler.stop()
+                self.manager = SessionManager(JournaledSessionStore(path, fsync=False))
+                self.scheduler = BotScheduler(self.manager, workers=2, think_time=0)
+
+            # Found by scanning the store...
+            restart(["r1", "r2"])
+            self.scheduler.resume()
+            self.wait_until_finished(["r1", "r2"])
+            self.manager.store.close()
+
+            # ... or when somebody loads the table
+            restart(["r1"])
+            self.wait_until_finished(["r1"])
+            self.assertEqual(self.scheduler.stats()['errors'], 0)
+            self.manager.store.close()
+
+    def test_resume_leaves_other_tables_unloaded(self):
+        """Test that resuming doesn't replay tables that can't have a bot up"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'sessions.journal')
+            store = JournaledSessionStore(path, fsync=False)
+            manager = SessionManager(store)
+            manager.add(bot_table("waiting", 2, seed=4))
+            humans = GameSession("humans", "alice", seed=4)
+            humans.add_player("alice")
+            manager.add(humans)
+            with manager.locked("humans") as session:
+                session.start_game()
+            store.close()
+
+            store = JournaledSessionStore(path, fsync=False)
+            self.scheduler.stop()
+            self.manager = SessionManager(store)
+            self.scheduler = BotScheduler(self.manager, workers=2, think_time=0)
+            self.scheduler.resume()
+            self.assertEqual(self.scheduler.stats()['queued'], 0)
+            self.assertEqual(sorted(store._recoverable), ["humans", "waiting"])
+            store.close()
+
+class TestBotApi(unittest.TestCase):
+    def setUp(self):
+        app_module.active_sessions.clear()
+        self.client = app_module.app.test_client()
+        response = self.client.post('/api/sessions', json={'creator_name': 'alice'})
+        self.session_id = response.get_json()['session_id']
+
+    def test_add_bots(self):
+        url = f'/api/sessions/{self.session_id}/bots'
+        self.assertEqual(self.client.post(url, json={'strategy': 'card counting'}).status_code, 400)
+        self.assertEqual(self.client.post(url, json={'chips': 'lots'}).status_code, 400)
+        data = self.client.post(url, json={}).get_json()
+        self.assertEqual(data['player_name'], 'Bot 1')
+        data = self.client.post(url, json={'strategy': 'threshold:16'}).get_json()
+        self.assertEqual(data['player_name'], 'Bot 2')
+        state = self.client.get(f'/api/sessions/{self.session_id}/status').get_json()
+        self.assertEqual([p['bot'] for p in state['players']], [False, True, True])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import random
+import threading
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import app as app_module
+from black_jack.src.app import app
+from black_jack.src.player import calculate
+
+PLAYERS = ['p1', 'p2', 'p3', 'p4', 'p5']
+
+class TestConcurrentActions(unittest.TestCase):
+    def setUp(self):
+        """Start several full tables"""
+        app_module.active_sessions.clear()
+        client = app.test_client()
+        self.session_ids = []
+        for _ in range(4):
+            response = client.post('/api/sessions', json={'creator_name': PLAYERS[0]})
+            session_id = response.get_json()['session_id']
+            for name in PLAYERS[1:]:
+                client.post(f'/api/sessions/{session_id}/join', json={'player_name': name})
+            client.post(f'/api/sessions/{session_id}/start')
+            self.session_ids.append(session_id)
+
+    def hammer(self, session_id, accepted):
+        """Fire random hit/stand requests as random players until the round ends"""
+        client = app.test_client()
+        session = app_module.active_sessions.get(session_id)
+        for _ in range(500):
+            if session.status == 'finished':
+                return
+            action = random.choice(['hit', 'stand'])
+            response = client.post(f'/api/sessions/{session_id}/{action}',
+                                   json={'player_name': random.choice(PLAYERS)})
+            if response.status_code == 200:
+                accepted.append(response.get_json()['message'])
+
+    def test_concurrent_hit_stand(self):
+        """Test that concurrent actions on many tables keep every table consistent"""
+        sessions = {session_id: app_module.active_sessions.get(session_id) for session_id in self.session_ids}
+        start_versions = {session_id: session.version for session_id, session in sessions.items()}
+        accepted = {session_id: [] for session_id in self.session_ids}
+
+        threads = [
+            threading.Thread(target=self.hammer, args=(session_id, accepted[session_id]))
+            for session_id in self.session_ids for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for session_id, session in sessions.items():
+            self.assertEqual(session.status, 'finished')
+
+            # Every accepted action bumped the version exactly once
+            self.assertEqual(session.version - start_versions[session_id], len(accepted[session_id]))
+
+            # Exactly one turn ended per player: a stand, a bust or reaching 21
+            turns_ended = [message for message in accepted[session_id]
+                           if 'stands' in message or 'busted' in message or 'Blackjack' in message]
+            self.assertEqual(len(turns_ended), len(PLAYERS))
+
+            # No card was dealt twice and none went missing
+            hands = [p.cards for p in session.players] + [session.dealer.cards]
+            dealt = [card for hand in hands for card in hand]
+            self.assertEqual(len(set(dealt)), len(dealt))
+            self.assertEqual(len(dealt) + session.shoe.remaining, 52)
+            for player in session.players:
+                self.assertEqual(player.total, calculate(player.cards))
+
+if __name__ == '__main__':
+    unittest.main()
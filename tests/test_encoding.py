@@ -0,0 +1,59 @@
+import unittest
+import json
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import encoding
+from black_jack.src.gameSession import GameSession
+
+class TestStateEncoding(unittest.TestCase):
+    def setUp(self):
+        self.session = GameSession("abc", "alice", seed=7)
+        for name in ("alice", "bob", "carol"):
+            self.session.add_player(name)
+
+    def assert_matches_state(self):
+        self.assertEqual(json.loads(self.session.encoded_state()), self.session.get_game_state())
+
+    def test_matches_game_state(self):
+        """Test that the encoding follows the state through a round"""
+        self.assert_matches_state()
+        self.session.start_game()
+        self.assert_matches_state()
+        for name in ("alice", "bob", "carol"):
+            self.session.current_player_index = ["alice", "bob", "carol"].index(name)
+            self.session.status = "in_progress"
+            self.session.stand(name)
+            self.assert_matches_state()
+        self.session.reset_round()
+        self.assert_matches_state()
+
+    def test_stdlib_fallback(self):
+        orjson = encoding.orjson
+        encoding.orjson = None
+        try:
+            self.session.start_game()
+            self.assert_matches_state()
+        finally:
+            encoding.orjson = orjson
+
+    def test_cached_per_version(self):
+        """Test that only the player who acted is re-encoded"""
+        self.session.start_game()
+        self.session.current_player_index = 0
+        self.session.status = "in_progress"
+        body = self.session.encoded_state()
+        self.assertIs(self.session.encoded_state(), body)
+
+        fragments = dict(self.session._encoder.players)
+        self.session.stand("alice")
+        self.assertIsNot(self.session.encoded_state(), body)
+        players = self.session._encoder.players
+        self.assertIsNot(players["alice"], fragments["alice"])
+        self.assertIs(players["carol"], fragments["carol"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src.expiry import ExpiryIndex, SessionSweeper
+from black_jack.src.gameSession import GameSession
+from black_jack.src.sessionManager import SessionManager
+
+class TestExpiryIndex(unittest.TestCase):
+    def test_pop_in_deadline_order(self):
+        """Test that only due sessions are popped and rescheduling replaces the old deadline"""
+        index = ExpiryIndex()
+        index.schedule("a", 10)
+        index.schedule("b", 20)
+        index.schedule("a", 30)
+
+        self.assertEqual(index.next_deadline(), 20)
+        self.assertEqual(index.pop_expired(25), ["b"])
+        self.assertEqual(index.pop_expired(29), [])
+        self.assertEqual(index.pop_expired(30), ["a"])
+        self.assertEqual(len(index), 0)
+
+class TestSessionSweeper(unittest.TestCase):
+    def setUp(self):
+        self.expired = []
+        self.manager = SessionManager()
+        self.sweeper = SessionSweeper(self.manager, idle_ttl=100, finished_ttl=10,
+                                      on_expire=self.expired.append)
+
+    def add_session(self, session_id):
+        session = GameSession(session_id, "alice")
+        session.add_player("alice")
+        self.manager.add(session)
+        return session
+
+    def test_idle_and_finished_ttls(self):
+        """Test that finished tables expire sooner than idle ones"""
+        idle = self.add_session("idle")
+        finished = self.add_session("finished")
+        finished.start_game()
+        finished.stand("alice")
+        self.assertEqual(finished.status, "finished")
+
+        self.assertEqual(self.sweeper.sweep(finished.last_activity + 11), 1)
+        self.assertEqual(self.expired, ["finished"])
+        self.assertIsNone(self.manager.get("finished"))
+
+        self.assertEqual(self.sweeper.sweep(idle.last_activity + 101), 1)
+        self.assertEqual(self.sweeper.evicted, {'idle': 1, 'finished': 1})
+
+    def test_activity_postpones_expiry(self):
+        """Test that a change pushes the deadline back"""
+        session = self.add_session("table")
+        session.last_activity -= 50
+        self.sweeper.touch(session)
+        session.add_player("bob")
+
+        self.assertEqual(self.sweeper.sweep(session.last_activity + 99), 0)
+        self.assertIsNotNone(self.manager.get("table"))
+
+if __name__ == '__main__':
+    unittest.main()
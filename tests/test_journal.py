@@ -0,0 +1,190 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src.expiry import SessionSweeper
+from black_jack.src.gameSession import GameSession
+from black_jack.src.journal import JournaledSessionStore
+from black_jack.src.lobby import LobbyCache
+from black_jack.src.replay import comparable_state
+from black_jack.src.sessionManager import SessionManager
+
+class TestJournaledSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'sessions.journal')
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self.tmpdir.cleanup()
+
+    def open_store(self, **kwargs):
+        store = JournaledSessionStore(self.path, fsync=False, **kwargs)
+        self.stores.append(store)
+        return store
+
+    def play(self, manager, session_id, rounds):
+        session = GameSession(session_id, "alice", seed=3)
+        session.add_player("alice")
+        manager.add(session)
+        with manager.locked(session_id) as session:
+            session.add_player("bob")
+        for _ in range(rounds):
+            with manager.locked(session_id) as session:
+                session.reset_round()
+            for name in ("alice", "bob"):
+                with manager.locked(session_id) as session:
+                    if session.is_players_turn(name) and session.players[0].total < 15:
+                        session.hit(name)
+                with manager.locked(session_id) as session:
+                    if session.is_players_turn(name):
+                        session.stand(name)
+        return manager.get(session_id)
+
+    def test_sessions_survive_restart(self):
+        """Test that tables, chips and the shoe are rebuilt after a restart, on first access"""
+        store = self.open_store(snapshot_every=5)
+        before = self.play(SessionManager(store), "t1", rounds=8)
+        expected = comparable_state(before.get_game_state())
+        store.journal.flush()
+
+        recovered = self.open_store()
+        self.assertEqual(len(recovered._recoverable), 1)
+        session = recovered.get("t1")
+        self.assertEqual(len(recovered._recoverable), 0)
+        self.assertEqual(comparable_state(session.get_game_state()), expected)
+        self.assertEqual(session.shoe.cards, before.shoe.cards)
+        self.assertEqual(session.shoe.position, before.shoe.position)
+
+        # ... and keep being journaled from there
+        with SessionManager(recovered).locked("t1") as session:
+            session.reset_round()
+        recovered.journal.flush()
+        self.assertEqual(self.open_store().get("t1").version, session.version)
+
+    def test_concurrent_recovery_never_misses(self):
+        """Test that a table being recovered is found by every concurrent get()"""
+        store = self.open_store()
+        manager = SessionManager(store)
+        for number in range(20):
+            self.play(manager, f"t{number}", rounds=1)
+        store.journal.flush()
+
+        recovered = self.open_store()
+        misses = []
+        def get_all():
+            for number in range(20):
+                if recovered.get(f"t{number}") is None:
+                    misses.append(number)
+        threads = [threading.Thread(target=get_all) for _ in range(4)]
+        threads.append(threading.Thread(target=recovered.items))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(misses, [])
+
+    def test_sweeper_tracks_without_recovering(self):
+        """Test that the sweeper indexes journaled tables without rebuilding them"""
+        store = self.open_store()
+        self.play(SessionManager(store), "t1", rounds=2)
+        store.journal.flush()
+        last_activity = store.get("t1").last_activity
+
+        recovered = self.open_store()
+        sweeper = SessionSweeper(SessionManager(recovered), idle_ttl=100, finished_ttl=10)
+        sweeper.track_existing()
+        self.assertEqual(len(recovered._recoverable), 1)
+        self.assertAlmostEqual(sweeper.index.next_deadline(), last_activity + 10, places=3)
+        # Due: loaded then, and expired as a finished table
+        self.assertEqual(sweeper.sweep(now=last_activity + 11), 1)
+        self.assertIsNone(recovered.get("t1"))
+
+    def test_lobby_lists_without_recovering(self):
+        """Test that the lobby and the session count don't rebuild journaled tables"""
+        store = self.open_store(snapshot_every=3)
+        manager = SessionManager(store)
+        self.play(manager, "t1", rounds=2)
+        waiting = GameSession("t2", "carol")
+        waiting.add_player("carol")
+        manager.add(waiting)
+        store.journal.flush()
+        expected = sorted(session.summary()['status'] for _, session in store.items())
+
+        recovered = self.open_store()
+        manager = SessionManager(recovered)
+        page = json.loads(LobbyCache(manager).page())
+        self.assertEqual(len(manager), 2)
+        self.assertEqual(len(recovered._recoverable), 2)
+        self.assertEqual(sorted(summary['status'] for summary in page['sessions']), expected)
+        self.assertEqual([summary['player_count'] for summary in page['sessions']], [2, 1])
+
+        # Recovered tables are listed from memory, once
+        recovered.get("t1")
+        self.assertEqual(len(manager), 2)
+        self.assertEqual(sorted(summary['session_id'] for summary in manager.summaries()), ["t1", "t2"])
+
+    def test_removed_sessions_stay_gone(self):
+        store = self.open_store()
+        manager = SessionManager(store)
+        self.play(manager, "t1", rounds=1)
+        self.play(manager, "t2", rounds=1)
+        manager.remove("t1")
+        store.journal.flush()
+
+        recovered = self.open_store()
+        self.assertEqual([session_id for session_id, _ in recovered.items()], ["t2"])
+
+    def test_torn_tail_is_dropped(self):
+        """Test that a half-written last record is ignored and overwritten"""
+        store = self.open_store()
+        self.play(SessionManager(store), "t1", rounds=2)
+        store.journal.flush()
+        with open(self.path, 'ab') as f:
+            f.write(b'\x40\x00\x00\x00garbage')
+
+        recovered = self.open_store()
+        self.assertIsNotNone(recovered.get("t1"))
+        self.play(SessionManager(recovered), "t2", rounds=1)
+        recovered.journal.flush()
+        self.assertEqual(sorted(session_id for session_id, _ in self.open_store().items()), ["t1", "t2"])
+
+    def test_compaction(self):
+        """Test that compaction drops superseded records without losing state"""
+        store = self.open_store(snapshot_every=2)
+        before = self.play(SessionManager(store), "t1", rounds=10)
+        store.journal.flush()
+        size = os.path.getsize(self.path)
+
+        self.assertLess(store.journal.compact(), size)
+        recovered = self.open_store()
+        self.assertEqual(comparable_state(recovered.get("t1").get_game_state()),
+                         comparable_state(before.get_game_state()))
+
+    def test_when_durable_without_waiting(self):
+        """Test that appends can return at once and signal durability from the writer"""
+        store = self.open_store(wait=False)
+        session = GameSession("d1", "alice", seed=3)
+        session.add_player("alice")
+        SessionManager(store).add(session)
+        sequence = store.journal.appended
+        done = threading.Event()
+        store.journal.when_durable(sequence, done.set)
+        self.assertTrue(done.wait(5))
+        self.assertIsNotNone(self.open_store().get("d1"))
+
+        # Already durable (or closed): called right away
+        called = []
+        store.journal.when_durable(sequence, lambda: called.append(True))
+        self.assertEqual(called, [True])
+
+if __name__ == '__main__':
+    unittest.main()
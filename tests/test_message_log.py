@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src.messageLog import MessageLog
+
+class TestMessageLog(unittest.TestCase):
+    def test_dedupe_is_exact_and_per_round(self):
+        """Test that only exact repeats within a round are dropped"""
+        log = MessageLog()
+        self.assertTrue(log.add("jimbob wins 10 chips!"))
+        self.assertTrue(log.add("bob wins 10 chips!"))
+        self.assertFalse(log.add("bob wins 10 chips!"))
+        log.new_round()
+        self.assertTrue(log.add("bob wins 10 chips!"))
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log.recent(), [log.records[-1].format()])
+
+    def test_bounded_history(self):
+        log = MessageLog(maxlen=12)
+        for number in range(20):
+            log.add(f"message {number}")
+        self.assertEqual([record.seq for record in log.records], list(range(9, 21)))
+        self.assertEqual(len(log.recent()), MessageLog.RECENT)
+        # An evicted message may be logged again
+        self.assertTrue(log.add("message 0"))
+
+    def test_round_trip(self):
+        log = MessageLog(maxlen=20)
+        log.add("Dealer's hand: 10H, 7S (Total: 17)", timestamp=1700000000)
+        log.new_round()
+        log.add("alice wins 10 chips!", timestamp=1700000060)
+        restored = MessageLog.from_dict(log.to_dict())
+        self.assertEqual(list(restored.records), list(log.records))
+        self.assertEqual(restored.recent(), ["[22:14:20] alice wins 10 chips!"])
+        self.assertFalse(restored.add("alice wins 10 chips!"))
+
+    def test_loads_formatted_messages(self):
+        """Test that sessions saved with a list of formatted strings still load"""
+        log = MessageLog.from_dict(["[12:00:00] alice wins 10 chips!"])
+        self.assertEqual([record.text for record in log.records], ["alice wins 10 chips!"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+import tempfile
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import app as app_module
+from black_jack.src import metrics
+from black_jack.src.expiry import SessionSweeper
+from black_jack.src.gameSession import GameSession
+from black_jack.src.journal import JournaledSessionStore
+from black_jack.src.replay import generate, replay
+from black_jack.src.sessionManager import SessionManager
+
+class TestRegistry(unittest.TestCase):
+    def test_disabled_metrics_record_nothing(self):
+        registry = metrics.Registry(enabled=False)
+        counter = registry.counter('things_total', 'Things')
+        histogram = registry.histogram('thing_seconds', 'Thing time')
+        counter.inc()
+        histogram.observe(0.1)
+        self.assertEqual(counter.value(), 0)
+        self.assertEqual(histogram.count(), 0)
+
+    def test_exposition_format(self):
+        registry = metrics.Registry(enabled=True)
+        counter = registry.counter('things_total', 'Things', labels=('kind',))
+        histogram = registry.histogram('thing_seconds', 'Thing time', buckets=(0.1, 1))
+        registry.gauge('things_open', 'Open things', lambda: 3)
+        counter.inc('a')
+        counter.inc('a', amount=2)
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        text = registry.render()
+        self.assertIn('# TYPE things_total counter', text)
+        self.assertIn('things_total{kind="a"} 3', text)
+        self.assertIn('thing_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('thing_seconds_bucket{le="1"} 2', text)
+        self.assertIn('thing_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('thing_seconds_count 3', text)
+        self.assertIn('things_open 3', text)
+
+    def test_slow_request_profiler(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profiler = metrics.SlowRequestProfiler(tmpdir, threshold=0.01, sample_rate=1)
+            profile = profiler.start()
+            if profile is None:
+                self.skipTest('another profiler is active')
+            self.assertIsNone(profiler.finish(profile, 0.001, 'GET /fast'))
+            profile = profiler.start()
+            path = profiler.finish(profile, 0.5, 'GET /api/sessions/<session_id>/status')
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(profiler.dumped, 1)
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.enabled = metrics.REGISTRY.enabled
+        metrics.REGISTRY.enabled = True
+        app_module.active_sessions.clear()
+        self.client = app_module.app.test_client()
+
+    def tearDown(self):
+        metrics.REGISTRY.enabled = self.enabled
+        app_module.active_sessions.clear()
+
+    def test_game_and_request_metrics(self):
+        rounds = metrics.ROUNDS.value()
+        stands = metrics.STANDS.value()
+        status_requests = metrics.REQUEST_SECONDS.count('/api/sessions/<session_id>/status', 'GET', '200')
+
+        session = GameSession('abc', 'alice')
+        session.add_player('alice')
+        app_module.active_sessions.add(session)
+        session.start_game()
+        session.current_player_index = 0
+        session.status = 'in_progress'
+        session.stand('alice')
+        self.client.get('/api/sessions/abc/status')
+
+        self.assertEqual(metrics.ROUNDS.value(), rounds + 1)
+        self.assertEqual(metrics.STANDS.value(), stands + 1)
+        self.assertGreater(metrics.SECTION_SECONDS.count('dealer_turn'), 0)
+        self.assertEqual(metrics.REQUEST_SECONDS.count('/api/sessions/<session_id>/status', 'GET', '200'),
+                         status_requests + 1)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.get_data(as_text=True)
+        self.assertIn('blackjack_active_sessions 1', text)
+        self.assertIn('blackjack_active_players 1', text)
+        self.assertIn('blackjack_section_seconds_count{section="determine_winners"}', text)
+
+    def test_sweeper_metrics(self):
+        expired = metrics.SESSIONS_EXPIRED.value('idle')
+        sweeps = metrics.SWEEPS.value()
+
+        manager = SessionManager()
+        sweeper = SessionSweeper(manager, idle_ttl=100)
+        session = GameSession('abc', 'alice')
+        session.add_player('alice')
+        manager.add(session)
+        sweeper.sweep(now=session.last_activity + 200)
+
+        self.assertEqual(metrics.SESSIONS_EXPIRED.value('idle'), expired + 1)
+        self.assertEqual(metrics.SWEEPS.value(), sweeps + 1)
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('blackjack_sessions_expired_total{reason="idle"}', text)
+        self.assertIn('blackjack_sweeps_total', text)
+
+    def test_replayed_actions_are_not_counted(self):
+        log = generate(players=2, rounds=5, seed=4)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'sessions.journal')
+            store = JournaledSessionStore(path, fsync=False)
+            session = GameSession('abc', 'alice', seed=4)
+            session.add_player('alice')
+            manager = SessionManager(store)
+            manager.add(session)
+            for _ in range(3):
+                with manager.locked('abc') as session:
+                    session.reset_round()
+                with manager.locked('abc') as session:
+                    if session.is_players_turn('alice'):
+                        session.stand('alice')
+            store.close()
+
+            counts = [counter.value() for counter in (metrics.HITS, metrics.STANDS, metrics.ROUNDS)]
+            replay(log)
+            recovered = JournaledSessionStore(path, fsync=False)
+            self.assertEqual(recovered.get('abc').version, session.version)
+            recovered.close()
+            self.assertEqual([counter.value() for counter in (metrics.HITS, metrics.STANDS, metrics.ROUNDS)],
+                             counts)
+
+    def test_rejected_batch_is_not_counted(self):
+        session = GameSession('abc', 'alice', seed=0)
+        session.add_player('alice')
+        session.add_player('bob')
+        session.start_game()
+        counts = [counter.value() for counter in (metrics.HITS, metrics.STANDS)]
+        # alice's decisions are undone with the hit she can't make after standing
+        self.assertEqual(session.play_actions([['hit', 'alice'], ['stand', 'alice'], ['hit', 'alice']]), ([], 2))
+        self.assertEqual([counter.value() for counter in (metrics.HITS, metrics.STANDS)], counts)
+
+        messages, rejected = session.play_actions([['hit', 'alice'], ['stand', 'alice']])
+        self.assertIsNone(rejected)
+        self.assertEqual([counter.value() for counter in (metrics.HITS, metrics.STANDS)],
+                         [counts[0] + 1, counts[1] + 1])
+
+    def test_disabled_endpoint(self):
+        metrics.REGISTRY.enabled = False
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import app as app_module
+from black_jack.src import odds
+from black_jack.src.app import app
+from black_jack.src.gameSession import GameSession
+
+@unittest.skipUnless(odds.available(), "numpy is not installed")
+class TestOdds(unittest.TestCase):
+    def test_stacked_shoe(self):
+        """Test exact results when every unseen card is a ten"""
+        result = odds.estimate(12, 0, 10, [10] * 40, trials=100)
+        self.assertEqual(result['dealer_totals']['20'], 1.0)
+        self.assertEqual(result['ev'], {'stand': -1.0, 'hit': -1.0})
+
+        # 11 + 10 makes 21, which pays 3:2 at this table
+        result = odds.estimate(11, 0, 10, [10] * 40, trials=100)
+        self.assertEqual(result['ev'], {'stand': -1.0, 'hit': 1.5})
+        self.assertEqual(result['advice'], 'hit')
+
+    def test_deal_matrix_draws_without_replacement(self):
+        """Test that each row is the start of a shuffle of the unseen cards"""
+        unseen = [2] * 3 + [10] * 5 + [11]
+        deck = odds.deal_matrix(unseen, 2000, odds.np.random.default_rng(0), cards=6)
+        self.assertEqual(deck.shape, (2000, 6))
+        for value, count in ((2, 3), (10, 5), (11, 1)):
+            self.assertTrue(((deck == value).sum(axis=1) <= count).all())
+        # Every card is equally likely to come first
+        self.assertAlmostEqual((deck[:, 0] == 10).mean(), 5 / 9, delta=0.05)
+        self.assertEqual(odds.deal_matrix(unseen, 10, cards=50).shape, (10, 9))
+
+    def test_dealer_draws_to_17(self):
+        """Test that the dealer hits soft and hard hands below 17, like GameSession"""
+        # 6 up, 6 in the hole, then A (soft 23 -> hard 13), then 5 -> 18
+        deck = odds.np.array([[6, 11, 5, 10]], dtype=odds.np.int8)
+        total = odds.play_dealer(deck, 6, odds.np.zeros(1, dtype=odds.np.int64))
+        self.assertEqual(total.tolist(), [18])
+
+    def test_standing_on_21(self):
+        """Test that hitting isn't offered on 21"""
+        result = odds.estimate(21, 1, 6, list(range(2, 12)) * 4, trials=1000)
+        self.assertIsNone(result['ev']['hit'])
+        self.assertEqual(result['advice'], 'stand')
+        self.assertAlmostEqual(sum(result['dealer_totals'].values()), 1.0)
+
+@unittest.skipUnless(odds.available(), "numpy is not installed")
+class TestHintApi(unittest.TestCase):
+    def setUp(self):
+        app_module.active_sessions.clear()
+        self.client = app.test_client()
+        session = GameSession("hint1", "alice")
+        session.add_player("alice")
+        session.add_player("bob")
+        session.start_game()
+        # Fix the hands so alice is still to play
+        session.players[0].cards = ['10H', '6D']
+        session.players[0].total = 16
+        session.players[0].blackjack = False
+        session.current_player_index = 0
+        session.status = "in_progress"
+        session.dealer.cards = ['5C', '10S']
+        app_module.active_sessions.add(session)
+
+    def test_hint(self):
+        response = self.client.get('/api/sessions/hint1/hint?player_name=alice&trials=2000')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['player_total'], 16)
+        self.assertEqual(data['dealer_upcard'], '10S')
+        self.assertEqual(data['trials'], 2000)
+        self.assertIn(data['advice'], ('hit', 'stand'))
+
+    def test_exact_hint(self):
+        """Test that ?exact=1 answers from the exact solver"""
+        response = self.client.get('/api/sessions/hint1/hint?player_name=alice&exact=1')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertNotIn('trials', data)
+        self.assertIn(data['advice'], ('hit', 'stand'))
+
+    def test_not_your_turn(self):
+        response = self.client.get('/api/sessions/hint1/hint?player_name=bob')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
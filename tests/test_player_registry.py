@@ -0,0 +1,170 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import rules
+from black_jack.src.gameSession import GameSession
+from black_jack.src.playerRegistry import PlayerRegistry
+
+class TestPlayerRegistry(unittest.TestCase):
+    def test_stats_and_names(self):
+        """Test that hands are counted under one record whatever the name's case"""
+        registry = PlayerRegistry()
+        self.assertEqual(registry.buy_in('alice', registry.balance('alice')), 100)
+        registry.record('Alice', rules.BLACKJACK, 15)
+        registry.record('ALICE', rules.PUSH, 0)
+        registry.record('alice', rules.BUST, -10)
+        stats = registry.get('aLiCe')
+        self.assertEqual((stats.hands, stats.wins, stats.pushes, stats.losses, stats.blackjacks),
+                         (3, 1, 1, 1, 1))
+        self.assertEqual((stats.net, stats.chips), (5, 105))
+        self.assertEqual(len(registry), 1)
+
+    def test_leaderboard_follows_every_hand(self):
+        """Test that top() and rank() match a full sort after each settled hand"""
+        registry = PlayerRegistry()
+        hands = [('ann', 10), ('bob', -10), ('cat', 15), ('bob', 30), ('ann', -10), ('dan', 0), ('cat', -15)]
+        net = {}
+        for name, amount in hands:
+            registry.record(name, rules.WIN if amount > 0 else rules.LOSE, amount)
+            net[name] = net.get(name, 0) + amount
+            expected = sorted(net, key=lambda n: (-net[n], n))
+            self.assertEqual([stats.name for stats in registry.top(len(net))], expected)
+            for place, name in enumerate(expected, 1):
+                self.assertEqual(registry.rank(name), place)
+        self.assertEqual([stats.name for stats in registry.top(2)], ['bob', 'ann'])
+        self.assertIsNone(registry.rank('eve'))
+
+    def test_starting_chips(self):
+        """Test that players sit down with their balance, or a new stack once broke"""
+        registry = PlayerRegistry(starting_chips=100)
+        self.assertIsNone(registry.balance('new'))
+        self.assertEqual(registry.stack(registry.balance('new')), 100)
+        # Working out the stack records nothing
+        self.assertIsNone(registry.get('new'))
+        self.assertEqual(registry.buy_in('new', None), 100)
+        registry.record('new', rules.WIN, 20)
+        self.assertEqual(registry.buy_in('NEW', registry.balance('new')), 120)
+        registry.record('new', rules.LOSE, -150)
+        self.assertEqual(registry.balance('new'), -30)
+        self.assertEqual(registry.stack(-30), 100)
+        self.assertEqual(registry.balance('new'), -30)
+        self.assertEqual(registry.buy_in('new', -30), 100)
+        self.assertEqual(registry.balance('new'), 100)
+        self.assertEqual(registry.get('new').net, -130)
+        # Buying in doesn't put anybody on the leaderboard
+        registry.buy_in('idle', None)
+        self.assertEqual(len(registry), 1)
+        self.assertIsNone(registry.rank('idle'))
+
+    def test_persisted_in_batches(self):
+        """Test that records are written in batches and merged by registries sharing the file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'players.db')
+            first = PlayerRegistry(path, flush_interval=60)
+            second = PlayerRegistry(path, flush_interval=60)
+            first.buy_in('alice', None)
+            for _ in range(5):
+                first.record('alice', rules.WIN, 10)
+            self.assertEqual(first.balance('alice'), 150)
+            second.record('Alice', rules.LOSE, -10)
+            second.record('bob', rules.BLACKJACK, 15)
+            first.close()
+            second.close()
+            self.assertEqual((first.batches, first.rows_written), (1, 1))
+
+            reopened = PlayerRegistry(path)
+            alice = reopened.get('alice')
+            self.assertEqual((alice.hands, alice.wins, alice.losses, alice.net, alice.chips),
+                             (6, 5, 1, 40, 140))
+            self.assertEqual([stats.name for stats in reopened.top()], ['Alice', 'bob'])
+            self.assertEqual(reopened.rank('bob'), 2)
+            reopened.close()
+
+    def test_balances_shared_between_workers(self):
+        """Test that a balance changed on one worker is picked up by another at sit-down"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'players.db')
+            first, second = PlayerRegistry(path, flush_interval=60), PlayerRegistry(path, flush_interval=60)
+            self.assertEqual(first.buy_in('alice', first.balance('alice')), 100)
+            first.record('alice', rules.WIN, 10)
+            first.close()
+            self.assertEqual(second.buy_in('alice', second.balance('alice')), 110)
+            second.record('alice', rules.BLACKJACK, 15)
+            second.close()
+
+            reopened = PlayerRegistry(path)
+            self.assertEqual(reopened.balance('alice'), 125)
+            self.assertEqual(reopened.get('alice').hands, 2)
+            reopened.close()
+
+    def test_stats_shared_between_workers(self):
+        """Test that hands settled on one worker reach another's records and leaderboard"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'players.db')
+            first, second = PlayerRegistry(path, flush_interval=60), PlayerRegistry(path, flush_interval=60)
+            first.record('alice', rules.WIN, 10)
+            second.record('bob', rules.WIN, 5)
+            first.close()
+            self.assertIsNone(second.get('alice'))
+            second.refresh()
+            alice = second.get('alice')
+            self.assertEqual((alice.hands, alice.net), (1, 10))
+            self.assertEqual([stats.name for stats in second.top()], ['alice', 'bob'])
+            self.assertEqual(second.rank('bob'), 2)
+
+            # What this worker hasn't written yet still counts
+            second.record('bob', rules.WIN, 20)
+            second.refresh()
+            self.assertEqual(second.get('bob').net, 25)
+            self.assertEqual(second.rank('bob'), 1)
+            second.close()
+
+    def test_records_settled_rounds_once(self):
+        """Test that a session's settled round is recorded once, without its bots"""
+        registry = PlayerRegistry()
+        session = GameSession('s1', 'alice', seed=7)
+        session.add_listener(registry.session_saved)
+        session.add_player('alice', registry.buy_in('alice', None))
+        session.add_player('Bot 1', bot='stand')
+        session.start_game()
+        for name in ('alice', 'Bot 1'):
+            session.stand(name)
+        self.assertEqual(session.status, 'finished')
+        session.mark_changed()
+
+        alice = registry.get('alice')
+        self.assertEqual(alice.hands, 1)
+        self.assertEqual(alice.chips, session.get_player('ALICE').chips)
+        self.assertEqual(alice.net, alice.chips - 100)
+        self.assertIsNone(registry.get('bot 1'))
+
+class TestSeatIndex(unittest.TestCase):
+    def test_names_are_case_insensitive(self):
+        """Test that seats are found, refused and freed regardless of case"""
+        session = GameSession('s1', 'alice')
+        self.assertTrue(session.add_player('Alice'))
+        self.assertFalse(session.add_player('ALICE'))
+        self.assertTrue(session.add_player('bob'))
+        self.assertIs(session.get_player('alice'), session.players[0])
+        session.start_game()
+        self.assertIsNone(session.hit('bob'))
+        self.assertIsNotNone(session.stand('aLICE'))
+        self.assertTrue(session.remove_player('BOB'))
+        self.assertIsNone(session.get_player('bob'))
+        self.assertTrue(session.add_player('Bob'))
+
+    def test_index_survives_round_trip(self):
+        """Test that a session rebuilt from its dict finds its players by name"""
+        session = GameSession('s1', 'alice')
+        session.add_player('Alice')
+        restored = GameSession.from_dict(session.to_dict())
+        self.assertIs(restored.get_player('ALICE'), restored.players[0])
+        self.assertFalse(restored.add_player('alice'))
+
+if __name__ == '__main__':
+    unittest.main()
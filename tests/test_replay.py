@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src import app as app_module
+from black_jack.src.app import app
+from black_jack.src.gameSession import GameSession
+from black_jack.src.replay import ReplayError, comparable_state, generate, replay
+from black_jack.src.simulator import STRATEGIES, play_session_round
+from black_jack.src.sessionStore import decode_session, encode_session
+
+class TestSeededSessions(unittest.TestCase):
+    def test_same_seed_same_shoe(self):
+        first = GameSession("a", "alice", decks=2, seed=42)
+        second = GameSession("b", "bob", decks=2, seed=42)
+        self.assertEqual(first.shoe.cards, second.shoe.cards)
+        self.assertNotEqual(first.shoe.cards, GameSession("c", "carol", decks=2, seed=43).shoe.cards)
+
+    def test_reshuffles_survive_serialization(self):
+        """Test that a session reloaded from a store keeps shuffling the same way"""
+        session = GameSession("a", "alice", seed=7)
+        session.add_player("alice")
+        restored = decode_session(encode_session(session))
+        for shoe in (session.shoe, restored.shoe):
+            shoe.position = shoe.cut
+            shoe.start_round()
+        self.assertEqual(session.shoe.cards, restored.shoe.cards)
+
+class TestReplay(unittest.TestCase):
+    def test_generated_log_replays_exactly(self):
+        """Test that replaying a recorded session rebuilds the same game"""
+        log = generate(players=3, rounds=25, seed=5, decks=2)
+        original = generate(players=3, rounds=25, seed=5, decks=2)
+        self.assertEqual(log, original)
+
+        session = replay(log)
+        self.assertEqual(session.version, log["version"])
+        self.assertEqual(session.replay_log(), log)
+
+    def test_tampered_log_is_rejected(self):
+        log = generate(players=1, rounds=2, seed=1)
+        log["actions"].append(["stand", "nobody"])
+        with self.assertRaises(ReplayError):
+            replay(log)
+
+    def test_batch_replays_as_one_version(self):
+        """Test that decisions played together replay under a single version"""
+        session = GameSession("batch", "alice", seed=0)
+        session.add_player("alice")
+        session.add_player("bob")
+        session.start_game()
+        version = session.version
+        messages, rejected = session.play_actions([["hit", "alice"], ["stand", "alice"], ["stand", "bob"]])
+        self.assertEqual((len(messages), rejected), (3, None))
+        self.assertEqual(session.version, version + 1)
+
+        restored = replay(session.replay_log())
+        self.assertEqual(restored.version, session.version)
+        self.assertEqual(comparable_state(restored.get_game_state()), comparable_state(session.get_game_state()))
+
+    def test_replay_api_session(self):
+        """Test that a session played through the API replays to the same state"""
+        app_module.active_sessions.clear()
+        client = app.test_client()
+        response = client.post('/api/sessions', json={'creator_name': 'alice', 'seed': 99})
+        session_id = response.get_json()['session_id']
+        client.post(f'/api/sessions/{session_id}/join', json={'player_name': 'bob'})
+        client.post(f'/api/sessions/{session_id}/start')
+        for name in ('alice', 'bob'):
+            client.post(f'/api/sessions/{session_id}/hit', json={'player_name': name})
+            client.post(f'/api/sessions/{session_id}/stand', json={'player_name': name})
+
+        log = client.get(f'/api/sessions/{session_id}/log').get_json()
+        self.assertEqual(log['session']['seed'], 99)
+        expected = client.get(f'/api/sessions/{session_id}/status').get_json()
+        self.assertEqual(comparable_state(replay(log).get_game_state()), comparable_state(expected))
+
+    def test_long_log_starts_over_from_a_checkpoint(self):
+        """Test that the action log stays short and still replays exactly"""
+        class ShortLogSession(GameSession):
+            MAX_LOGGED_ACTIONS = 20
+
+        session = ShortLogSession("long", "p0", max_players=2, seed=9)
+        session.add_player("p0")
+        session.add_player("p1")
+        for _ in range(30):
+            play_session_round(session, [STRATEGIES['basic']] * 2)
+        self.assertIsNotNone(session.checkpoint)
+        self.assertLess(len(session.actions), 40)
+
+        restored = replay(session.replay_log())
+        self.assertEqual(restored.version, session.version)
+        self.assertEqual(comparable_state(restored.get_game_state()), comparable_state(session.get_game_state()))
+
+    def test_snapshots_leave_the_log_out(self):
+        """Test that a stored session doesn't carry its log but can still be replayed"""
+        session = GameSession("stored", "alice", seed=4)
+        session.add_player("alice")
+        session.start_game()
+        self.assertNotIn("actions", session.to_dict())
+
+        restored = decode_session(encode_session(session))
+        restored.stand("alice")
+        session.stand("alice")
+        replayed = replay(restored.replay_log())
+        self.assertEqual(comparable_state(replayed.get_game_state()), comparable_state(session.get_game_state()))
+
+if __name__ == '__main__':
+    unittest.main()
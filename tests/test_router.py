@@ -0,0 +1,194 @@
+import unittest
+import secrets
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src.router import HashRing, NodeClient, Router, create_app, spawn_nodes, wait_until_ready
+
+def free_ports(count):
+    sockets = [socket.socket() for _ in range(count)]
+    for sock in sockets:
+        sock.bind(('127.0.0.1', 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+class TestHashRing(unittest.TestCase):
+    def test_adding_a_node_moves_only_its_share(self):
+        keys = [f"session{number}" for number in range(4000)]
+        ring = HashRing(["a", "b", "c"])
+        before = {key: ring.node_for(key) for key in keys}
+        counts = {node: list(before.values()).count(node) for node in "abc"}
+        self.assertTrue(all(800 < count < 1900 for count in counts.values()), counts)
+
+        ring.add("d")
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        self.assertTrue(all(ring.node_for(key) == "d" for key in moved))
+        self.assertTrue(0.15 < len(moved) / len(keys) < 0.35, len(moved))
+
+        ring.remove("d")
+        self.assertEqual({key: ring.node_for(key) for key in keys}, before)
+
+class TestNodeClient(unittest.TestCase):
+    def test_acted_on_requests_are_not_resent(self):
+        """Test that only requests safe to repeat are retried after the node hangs up"""
+        received = []
+
+        class HangUp(socketserver.StreamRequestHandler):
+            # Read the request, as if acting on it, then drop the connection unanswered
+            def handle(self):
+                received.append(self.rfile.readline().split()[0].decode())
+
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), HangUp)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = NodeClient(f"http://127.0.0.1:{server.server_address[1]}", timeout=5)
+        try:
+            for method, headers, sent in (('POST', {}, 1), ('GET', {}, 2), ('POST', {'Idempotency-Key': 'k'}, 2)):
+                received.clear()
+                with self.assertRaises(ConnectionError):
+                    client.request(method, '/api/sessions/abc/hit', b'{}', headers)
+                self.assertEqual(received, [method] * sent)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+class TestRouter(unittest.TestCase):
+    """Runs real game servers as child processes"""
+    @classmethod
+    def setUpClass(cls):
+        cls.token = secrets.token_hex(8)
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        ports = free_ports(4)
+        cls.nodes = [f"http://127.0.0.1:{port}" for port in ports]
+        cls.processes = spawn_nodes(ports, cls.token, env={
+            'BLACKJACK_PLAYER_DB': os.path.join(cls.tmpdir.name, 'players.db'), 'BLACKJACK_METRICS': '1'})
+        try:
+            wait_until_ready(cls.nodes)
+        except Exception:
+            cls.tearDownClass()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        for process in cls.processes:
+            process.terminate()
+            process.wait()
+        cls.tmpdir.cleanup()
+
+    def setUp(self):
+        self.router = Router(self.nodes[:3], self.token)
+        self.client = create_app(self.router).test_client()
+
+    def tearDown(self):
+        # Empty every node for the next test
+        for node in self.nodes:
+            client = self.router.client(node)
+            for session_id in client.json('GET', '/internal/sessions')[1]['session_ids']:
+                client.json('POST', f'/internal/sessions/{session_id}/evict')
+
+    def create_tables(self, count):
+        session_ids = []
+        for number in range(count):
+            response = self.client.post('/api/sessions', json={'creator_name': f'p{number}'})
+            self.assertEqual(response.status_code, 201)
+            session_ids.append(response.get_json()['session_id'])
+        return session_ids
+
+    def test_routes_by_session_id(self):
+        session_ids = self.create_tables(12)
+        for session_id in session_ids:
+            node = self.router.client(self.router.node_for(session_id))
+            self.assertEqual(node.json('GET', f'/api/sessions/{session_id}/status')[0], 200)
+
+        session_id = session_ids[0]
+        self.client.post(f'/api/sessions/{session_id}/join', json={'player_name': 'bob'})
+        self.client.post(f'/api/sessions/{session_id}/start')
+        response = self.client.get(f'/api/sessions/{session_id}/status')
+        self.assertEqual(response.get_json()['status'], 'in_progress')
+        self.assertEqual(self.client.get(f'/api/sessions/{session_id}/status',
+                                         headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+        self.assertEqual(self.client.get('/internal/sessions').status_code, 404)
+
+    def test_lobby_merges_all_nodes(self):
+        session_ids = self.create_tables(12)
+        seen, cursor = [], None
+        while True:
+            page = self.client.get('/api/sessions?limit=5' + (f'&cursor={cursor}' if cursor else '')).get_json()
+            self.assertEqual(page['total'], 12)
+            seen += [summary['session_id'] for summary in page['sessions']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), sorted(session_ids))
+        self.assertEqual(len(seen), 12)
+
+    def test_rebalance_moves_only_reassigned_tables(self):
+        session_ids = self.create_tables(30)
+        self.client.post(f'/api/sessions/{session_ids[0]}/start')
+        versions = {session_id: self.client.get(f'/api/sessions/{session_id}/status').get_json()['version']
+                    for session_id in session_ids}
+        owners = {session_id: self.router.node_for(session_id) for session_id in session_ids}
+
+        moved = self.router.add_node(self.nodes[3])
+        self.assertEqual(moved, sum(self.router.node_for(s) != owners[s] for s in session_ids))
+        self.assertLess(moved, 20)
+        moved = self.router.remove_node(self.nodes[0])
+        self.assertEqual(self.router.ring.nodes, self.nodes[1:])
+        for session_id in session_ids:
+            state = self.client.get(f'/api/sessions/{session_id}/status').get_json()
+            self.assertEqual(state['version'], versions[session_id])
+
+    def test_failed_move_keeps_table_on_source(self):
+        """Test that tables stay playable where they were when their new node won't take them"""
+        session_ids = self.create_tables(20)
+        dead_node = f"http://127.0.0.1:{free_ports(1)[0]}"
+        self.assertEqual(self.router.add_node(dead_node), 0)
+        self.assertEqual(self.router.stranded, {})
+        self.assertFalse(self.router._moving)
+        for session_id in session_ids:
+            self.assertEqual(self.client.get(f'/api/sessions/{session_id}/status').status_code, 200)
+
+        self.router.remove_node(dead_node)
+        self.assertEqual(self.router._pinned, {})
+        for session_id in session_ids:
+            self.assertEqual(self.client.get(f'/api/sessions/{session_id}/status').status_code, 200)
+
+    def test_players_and_metrics_span_nodes(self):
+        """Test that player records and metrics cover the hands played on every node"""
+        names = [f'ranked{number}' for number in range(6)]
+        for name in names:
+            session_id = self.client.post('/api/sessions', json={'creator_name': name}).get_json()['session_id']
+            self.client.post(f'/api/sessions/{session_id}/start')
+            self.client.post(f'/api/sessions/{session_id}/stand', json={'player_name': name})
+            self.assertEqual(self.client.get(f'/api/sessions/{session_id}/status').get_json()['status'], 'finished')
+
+        # Each node writes its players about once a second and reads the others' back
+        deadline = time.monotonic() + 10
+        while True:
+            boards = [{player['name'] for player in self.router.client(node).json(
+                'GET', '/api/leaderboard?limit=100')[1]['players']} for node in self.router.ring.nodes]
+            if all(board.issuperset(names) for board in boards) or time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        for board in boards:
+            self.assertTrue(board.issuperset(names), board)
+        self.assertEqual(self.client.get('/api/players/RANKED0').get_json()['hands'], 1)
+        self.assertEqual(self.client.get('/api/nothing').status_code, 404)
+
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertEqual(text.count('# TYPE blackjack_rounds_total counter'), 1)
+        for node in self.router.ring.nodes:
+            self.assertIn(f'blackjack_rounds_total{{node="{node}"}}', text)
+            self.assertIn(f'blackjack_node_up{{node="{node}"}} 1', text)
+
+if __name__ == '__main__':
+    unittest.main()
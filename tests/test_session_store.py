@@ -0,0 +1,188 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src.delta import unpack_changes
+from black_jack.src.gameSession import GameSession
+from black_jack.src.sessionManager import SessionManager
+from black_jack.src.sessionStore import (
+    ConcurrentModificationError, RedisSessionStore, SQLiteSessionStore, WatchError,
+    decode_session, encode_session
+)
+
+class FakeRedis:
+    """Just enough of the redis-py client for RedisSessionStore"""
+    def __init__(self):
+        self.hashes = {}
+        self.sets = {}
+        self.revisions = {}
+
+    def _encode(self, value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update({k: self._encode(v) for k, v in mapping.items()})
+        self.revisions[key] = self.revisions.get(key, 0) + 1
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+        self.revisions[key] = self.revisions.get(key, 0) + 1
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(self._encode(member))
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(self._encode(member))
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.watched = {}
+        self.queued = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.watched, self.queued = {}, None
+
+    def watch(self, key):
+        self.watched[key] = self.client.revisions.get(key, 0)
+
+    def multi(self):
+        self.queued = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        if self.queued is None:
+            return method
+        return lambda *args, **kwargs: self.queued.append((method, args, kwargs))
+
+    def execute(self):
+        if any(self.client.revisions.get(key, 0) != revision for key, revision in self.watched.items()):
+            raise WatchError()
+        for method, args, kwargs in self.queued:
+            method(*args, **kwargs)
+
+class TestSerialization(unittest.TestCase):
+    def test_round_trip(self):
+        """Test that a session in the middle of a round survives encoding"""
+        session = GameSession("abc", "alice")
+        session.add_player("alice")
+        session.add_player("bob")
+        session.start_game()
+        session.hit("alice")
+
+        restored = decode_session(encode_session(session))
+        self.assertEqual(restored.get_game_state(), session.get_game_state())
+        self.assertEqual(restored.shoe.cards, session.shoe.cards)
+        self.assertEqual(restored.shoe.position, session.shoe.position)
+        self.assertEqual(restored.created_at, session.created_at)
+        self.assertEqual(restored.get_state_delta(1), session.get_state_delta(1))
+
+    def test_replies_survive_encoding(self):
+        """Test that remembered idempotent replies travel with the session"""
+        session = GameSession("abc", "alice")
+        session.remember_reply("k1", [{"message": "hi"}, 200])
+        restored = decode_session(encode_session(session))
+        self.assertEqual(restored.reply_for("k1"), [{"message": "hi"}, 200])
+        self.assertIsNone(restored.reply_for("k2"))
+
+    def test_history_in_dict_form(self):
+        """Test that sessions saved with change dicts in their history still load"""
+        session = GameSession("abc", "alice")
+        session.add_player("alice")
+        session.add_player("bob")
+        data = session.to_dict()
+        data["history"] = [[version, unpack_changes(changes)] for version, changes in session.history]
+        restored = GameSession.from_dict(data)
+        self.assertEqual(restored.get_state_delta(0), session.get_state_delta(0))
+
+class SharedStoreTests:
+    """Behaviour every shared store must have; `make_store` opens a new handle on the same data"""
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.worker_a = SessionManager(self.make_store())
+        self.worker_b = SessionManager(self.make_store())
+        session = GameSession("table1", "alice")
+        session.add_player("alice")
+        self.assertTrue(self.worker_a.add(session))
+
+    def test_changes_visible_to_other_worker(self):
+        """Test that a join on one worker is seen by another"""
+        with self.worker_b.locked("table1") as session:
+            session.add_player("bob")
+
+        with self.worker_a.locked("table1") as session:
+            self.assertEqual([p.name for p in session.players], ["alice", "bob"])
+        self.assertEqual(self.worker_a.version("table1"), session.version)
+
+    def test_duplicate_id_rejected(self):
+        """Test that adding an existing session ID fails"""
+        self.assertFalse(self.worker_b.add(GameSession("table1", "mallory")))
+
+    def test_stale_write_rejected(self):
+        """Test optimistic concurrency: the second writer of the same version loses"""
+        first = self.worker_a.get("table1")
+        second = self.worker_b.get("table1")
+
+        first.add_player("bob")
+        self.worker_a.store.save(first, first.version - 1)
+
+        second.add_player("carol")
+        with self.assertRaises(ConcurrentModificationError):
+            self.worker_b.store.save(second, second.version - 1)
+
+    def test_wait_for_change_polls_store(self):
+        """Test that long-poll waiting notices writes from another worker"""
+        version = self.worker_a.version("table1")
+        self.assertFalse(self.worker_a.wait_for_change("table1", version, 0))
+
+        with self.worker_b.locked("table1") as session:
+            session.add_player("bob")
+        self.assertTrue(self.worker_a.wait_for_change("table1", version, 1))
+
+class TestSQLiteSessionStore(SharedStoreTests, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'sessions.db')
+        super().setUp()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_store(self):
+        return SQLiteSessionStore(self.path)
+
+class TestRedisSessionStore(SharedStoreTests, unittest.TestCase):
+    def setUp(self):
+        self.client = FakeRedis()
+        super().setUp()
+
+    def make_store(self):
+        return RedisSessionStore(self.client)
+
+    def test_items_and_remove(self):
+        """Test listing and removing sessions through the ID index"""
+        self.assertEqual([session_id for session_id, _ in self.worker_b.items()], ["table1"])
+        self.worker_b.remove("table1")
+        self.assertEqual(self.worker_a.items(), [])
+        self.assertIsNone(self.worker_a.get("table1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+import random
+from collections import Counter
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src.shoe import Shoe
+
+class TestShoe(unittest.TestCase):
+    def test_multi_deck_contents(self):
+        """Test that an n-deck shoe holds each card n times"""
+        shoe = Shoe(decks=6, rng=random.Random(1))
+        self.assertEqual(len(shoe), 312)
+        self.assertEqual(set(Counter(shoe.cards).values()), {6})
+
+    def test_invalid_configuration(self):
+        """Test that deck count and penetration are validated"""
+        with self.assertRaises(ValueError):
+            Shoe(decks=9)
+        with self.assertRaises(ValueError):
+            Shoe(penetration=0)
+
+    def test_reshuffle_only_at_cut_card(self):
+        """Test that rounds keep dealing from the same shoe until the cut card"""
+        shoe = Shoe(decks=2, penetration=0.5, rng=random.Random(2))
+        shoe.start_round()
+        for _ in range(51):
+            shoe.deal()
+        shoe.start_round()
+        self.assertEqual(shoe.shuffles, 1)
+
+        shoe.deal()
+        shoe.start_round()
+        self.assertEqual(shoe.shuffles, 2)
+        self.assertEqual(shoe.position, 0)
+
+    def test_running_dry_mid_round(self):
+        """Test that discards are reshuffled in without repeating cards on the table"""
+        shoe = Shoe(decks=1, penetration=1, rng=random.Random(3))
+        shoe.start_round()
+        for _ in range(40):
+            shoe.deal()
+        shoe.round_start = shoe.position  # a new round starts without reaching the cut card
+
+        in_play = [shoe.deal() for _ in range(30)]
+        self.assertEqual(len(set(in_play)), 30)
+        self.assertEqual(shoe.shuffles, 2)
+
+    def test_seeded_shoes_shuffle_alike(self):
+        """Test that a seeded shoe repeats its shuffles, also after a restore, with its own generator"""
+        shoe, twin = Shoe(decks=2, seed=7), Shoe(decks=2, seed=7)
+        self.assertEqual(shoe.cards, twin.cards)
+        self.assertIsNot(shoe.rng, twin.rng)
+
+        restored = Shoe.from_dict(shoe.to_dict())
+        self.assertIsNone(restored.rng)
+        shoe.shuffle()
+        restored.shuffle()
+        self.assertEqual(shoe.cards, restored.cards)
+
+if __name__ == '__main__':
+    unittest.main()
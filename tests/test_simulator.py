@@ -0,0 +1,50 @@
+import unittest
+import random
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src.gameSession import GameSession
+from black_jack.src.rules import PAYOUTS
+from black_jack.src.shoe import Shoe
+from black_jack.src.simulator import STRATEGIES, play_round, play_session_round, simulate
+
+class TestSimulator(unittest.TestCase):
+    def test_fast_path_matches_game_session(self):
+        """Test that the headless round deals and settles exactly like GameSession"""
+        for strategy in STRATEGIES.values():
+            strategies = [strategy] * 3
+            shoe = Shoe(2, 0.75, random.Random(7))
+
+            session = GameSession("sim", "p0", decks=2)
+            session.shoe = Shoe(2, 0.75, random.Random(7))
+            for seat in range(3):
+                session.add_player(f"p{seat}")
+            chips = [p.chips for p in session.players]
+
+            for _ in range(200):
+                expected = play_session_round(session, strategies)
+                self.assertEqual(play_round(shoe, strategies), expected)
+                for seat, outcome in enumerate(expected):
+                    chips[seat] += 10 * PAYOUTS[outcome]
+                self.assertEqual(shoe.position, session.shoe.position)
+            self.assertEqual([p.chips for p in session.players], chips)
+
+    def test_simulate_is_reproducible(self):
+        """Test that a seeded run gives the same totals and counts every hand"""
+        first = simulate(2000, 'basic', seats=2, seed=11, workers=1)
+        second = simulate(2000, 'basic', seats=2, seed=11, workers=1)
+        self.assertEqual(first.rounds, 2000)
+        self.assertEqual(first.hands, 4000)
+        self.assertEqual(sum(first.outcomes.values()), first.hands)
+        self.assertEqual((first.net, first.outcomes), (second.net, second.outcomes))
+        self.assertGreaterEqual(first.variance, 0)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            simulate(10, 'martingale')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from black_jack.src.gameSession import GameSession
+from black_jack.src.solver import LRUCache, StrategySolver, composition, full_shoe
+
+class TestStrategySolver(unittest.TestCase):
+    def test_stacked_shoe(self):
+        """Test exact results when every unseen card is a ten"""
+        solver = StrategySolver()
+        tens = composition([10] * 40)
+        result = solver.evaluate(11, 0, 10, tens)
+        self.assertEqual(result['dealer_totals']['20'], 1.0)
+        # 11 + 10 makes 21, which pays 3:2 at this table
+        self.assertEqual(result['ev'], {'stand': -1.0, 'hit': 1.5})
+        self.assertEqual(result['advice'], 'hit')
+
+    def test_dealer_odds_sum_to_one(self):
+        solver = StrategySolver()
+        for upcard in range(2, 12):
+            self.assertAlmostEqual(sum(solver.dealer_odds(upcard, full_shoe(1))), 1.0)
+
+    def test_known_decisions(self):
+        """Test a few clear-cut decisions off a fresh six-deck shoe"""
+        # Not all textbook plays hold here: a drawn 21 paying 3:2 makes
+        # hitting worth more, e.g. 12 against a 6 is a (narrow) hit
+        solver = StrategySolver()
+        shoe = full_shoe(6)
+        self.assertEqual(solver.evaluate(20, 0, 6, shoe)['advice'], 'stand')
+        self.assertEqual(solver.evaluate(12, 0, 10, shoe)['advice'], 'hit')
+        self.assertEqual(solver.evaluate(17, 1, 7, shoe)['advice'], 'hit')
+        self.assertEqual(solver.evaluate(19, 0, 10, shoe)['advice'], 'stand')
+
+    def test_table_round_trip(self):
+        """Test that a saved table is loaded lazily and answers without recomputing"""
+        shoe = full_shoe(2)
+        solver = StrategySolver()
+        expected = solver.evaluate(16, 0, 10, shoe)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'strategy.bin')
+            self.assertGreater(solver.save(path), 0)
+
+            loaded = StrategySolver(path)
+            self.assertEqual(loaded.stats['table'], 0)
+            result = loaded.evaluate(16, 0, 10, shoe)
+            self.assertGreater(loaded.stats['table'], 0)
+            self.assertEqual(loaded.stats['decisions'], 0)
+        self.assertEqual(result['advice'], expected['advice'])
+        self.assertAlmostEqual(result['ev']['hit'], expected['ev']['hit'], places=5)
+
+    def test_lru_eviction(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+
+    def test_game_session_hook(self):
+        """Test that a session can answer what's optimal for the player to act"""
+        session = GameSession("solve1", "alice")
+        session.add_player("alice")
+        session.start_game()
+        session.players[0].cards = ['10H', '6D']
+        session.current_player_index = 0
+        session.status = "in_progress"
+        session.dealer.cards = ['5C', '10S']
+
+        result = session.optimal_play("alice")
+        self.assertIn(result['advice'], ('hit', 'stand'))
+        self.assertIsNone(session.optimal_play("bob"))
+
+if __name__ == '__main__':
+    unittest.main()